@@ -0,0 +1,126 @@
+import time
+import random
+import asyncio
+
+from universe import AsyncHttp, AsyncUserSession, AsyncFNSModule, AsyncVODModule
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+REFRESH = "https://auth.universe-official.io/refresh"
+
+def make_session(server, ttl = 3600, **kwargs):
+    return AsyncUserSession(make_token(time.time() + ttl), make_token(time.time() + 86400, "refresh"),
+                            hosts = server.Hosts(), **kwargs)
+
+async def test_http(server):
+    # 12 requests of 0.2 seconds, 4 at once
+    server.latency = 0.2
+    server.peak_in_flight = 0
+    async with AsyncHttp(make_token(time.time() + 3600), config.JWE_KEY, max_in_flight = 4,
+                         hosts = server.Hosts()) as x:
+        start = time.monotonic()
+        results = await asyncio.gather(*[x.Get(FEEDS, {"planet_id": 34, "next": float(i)}) for i in range(12)])
+        elapsed = time.monotonic() - start
+        if [code for code, _, _ in results] != [0] * 12 or results[3][1]["fns"]["next"] != 13.0:
+            fail("async_http", -1, "Wrong responses", [code for code, _, _ in results])
+        if server.peak_in_flight != 4 or not 0.55 <= elapsed < 1.5:
+            fail("async_http", -1, "Requests in flight not bounded", (server.peak_in_flight, elapsed))
+
+        code, data, _ = await x.Post(REFRESH)
+        if code != 0 or not "access_token" in data["auth"]:
+            fail("async_http", code, "Post failed", data)
+    server.latency = 0.0
+    success("async_http")
+
+async def test_session(server):
+    # an expired access token is refreshed by the first call
+    async with make_session(server, ttl = -10) as sess:
+        results = await asyncio.gather(*[sess.Get(FEEDS, {"planet_id": 34}) for _ in range(3)])
+        if [code for code, _, _ in results] != [0] * 3:
+            fail("async_session", -1, "Expired token not refreshed", [code for code, _, _ in results])
+    success("async_session")
+
+async def test_fns(server):
+    async with make_session(server) as sess:
+        fns = AsyncFNSModule(sess)
+        feeds, next = await fns.LoadFeed(34, size = 20)
+        if len(feeds) != 20 or next != 20.0 or len(fns.feeds[34]) != 20:
+            fail("async_fns", -1, "Feeds not loaded", (len(feeds), next))
+        feeds, next = await fns.LoadFeed(34, next = next, size = 20)
+        if len(fns.feeds[34]) != 40 or fns.LatestFeeds(34, 1)[0].feed_id != server.feed(34, 99)["id"]:
+            fail("async_fns", -1, "Second page not loaded", len(fns.feeds[34]))
+    success("async_fns")
+
+async def test_vod(server):
+    async with make_session(server) as sess:
+        vod = AsyncVODModule(sess)
+        if await vod.LoadSeries(34) != 4:
+            fail("async_vod", -1, "Series not loaded", vod.vod_series)
+        count = await vod.LoadAllVOD()
+        if count != 12 or not all(v.FETCHED for v in vod.vod[34].values()):
+            fail("async_vod", -1, "VOD not loaded", count)
+        if await vod.LoadVODFromSeries(34, 1, fetchVOD = False) != 3:
+            fail("async_vod", -1, "VOD series not loaded", "")
+    success("async_vod")
+
+async def test_vod_workers(server):
+    async with make_session(server) as sess:
+        vod = AsyncVODModule(sess)
+        await vod.LoadSeries(34)
+
+        # at most max_workers requests at once, VOD in the order of the series and bridges
+        server.latency = 0.05
+        server.peak_in_flight = 0
+        count = await vod.LoadAllVOD(max_workers = 2)
+        server.latency = 0.0
+        expected = [str(s * 1000 + v) for s in range(4) for v in range(3)]
+        if count != 12 or list(vod.vod[34]) != expected or server.peak_in_flight != 2 or vod.errors:
+            fail("async_vod_workers", -1, "Wrong VOD or requests in flight", (list(vod.vod[34]), server.peak_in_flight))
+        if await vod.LoadVODFromPlanet(34, max_workers = 3) != 12 or \
+                await vod.LoadVODFromSeries(34, 2, fetchVOD = False, max_workers = 1) != 3:
+            fail("async_vod_workers", -1, "Wrong counts", "")
+        success("async_vod_workers")
+
+        # failures are collected, a VOD whose view failed is added from the bridge
+        random.seed(2)
+        server.error_rate = 0.3
+        server.errors = 0
+        count = await vod.LoadAllVOD(max_workers = 4)
+        server.error_rate = 0.0
+        bridges = [e for e in vod.errors if e[2] is None]
+        views = [e for e in vod.errors if e[2] is not None]
+        unfetched = [v for v in vod.vod[34].values() if not v.FETCHED]
+        if len(vod.errors) != server.errors or count != 12 - 3 * len(bridges) or len(unfetched) < len(views):
+            fail("async_vod_errors", -1, "Failures not collected", (count, len(bridges), len(views), server.errors))
+        if not vod.errors:
+            fail("async_vod_errors", -1, "No failure happened", server.errors)
+
+        # without max_workers, failures are raised
+        server.error_rate = 1.0
+        try:
+            await vod.LoadAllVOD()
+            fail("async_vod_errors", -1, "Failure not raised", "")
+        except Exception:
+            pass
+        server.error_rate = 0.0
+    success("async_vod_errors")
+
+async def run(server):
+    await test_http(server)
+    await test_session(server)
+    await test_fns(server)
+    await test_vod(server)
+    await test_vod_workers(server)
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 100, vod_series = 4, vods = 3)
+    server.Start()
+    try:
+        asyncio.run(run(server))
+    finally:
+        server.Stop()
+    success("===ASYNC_TEST===")
+
+do_test()
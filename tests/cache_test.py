@@ -0,0 +1,90 @@
+import time
+import tempfile
+
+from universe import UserSession, ResponseCache
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+SERIES = "https://api.universe-official.io/media/vodseries"
+FEEDS = "https://api.universe-official.io/fns/feeds"
+
+def test_ttl():
+    cache = ResponseCache(ttls = {"/media/vodseries": 0.5})
+    cache.Put(1, SERIES, {"planet_id": 34}, "series")
+    if cache.Get(1, SERIES, {"planet_id": 34}) != (True, "series"):
+        fail("cache_ttl", -1, "Live entry missed", cache.Stats())
+    time.sleep(0.6)
+    if cache.Get(1, SERIES, {"planet_id": 34}) != (False, None) or cache.Stats()["entries"] != 0:
+        fail("cache_ttl", -1, "Expired entry served", cache.Stats())
+
+    # endpoints without a TTL are not cached
+    cache.Put(1, FEEDS, {"planet_id": 34}, "feeds")
+    if cache.Get(1, FEEDS, {"planet_id": 34})[0]:
+        fail("cache_ttl", -1, "Uncached endpoint served", cache.Stats())
+    success("cache_ttl")
+
+def test_keys():
+    cache = ResponseCache()
+    cache.Put(1, SERIES, {"planet_id": 34, "lang": "ko"}, "series")
+    if not cache.Get(1, SERIES, {"lang": "ko", "planet_id": 34})[0]:
+        fail("cache_keys", -1, "Same query in another order missed", cache.Stats())
+    if cache.Get(2, SERIES, {"planet_id": 34, "lang": "ko"})[0]:
+        fail("cache_keys", -1, "Response served to another account", cache.Stats())
+    if cache.Get(1, SERIES, {"planet_id": 35, "lang": "ko"})[0]:
+        fail("cache_keys", -1, "Response served to another query", cache.Stats())
+    success("cache_keys")
+
+def test_lru():
+    cache = ResponseCache(max_entries = 3)
+    for i in range(3):
+        cache.Put(1, SERIES, {"planet_id": i}, i)
+    cache.Get(1, SERIES, {"planet_id": 0})     # 1 is now the least recently used
+    cache.Put(1, SERIES, {"planet_id": 3}, 3)
+    live = [i for i in range(4) if cache.Get(1, SERIES, {"planet_id": i})[0]]
+    if live != [0, 2, 3] or cache.evictions != 1:
+        fail("cache_lru", -1, "Wrong entry evicted", (live, cache.Stats()))
+    success("cache_lru")
+
+def test_disk():
+    directory = tempfile.mkdtemp()
+    ResponseCache(directory = directory).Put(1, SERIES, {"planet_id": 34}, {"vod_series": []})
+    cache = ResponseCache(directory = directory)
+    if cache.Get(1, SERIES, {"planet_id": 34}) != (True, {"vod_series": []}):
+        fail("cache_disk", -1, "Entry not read from disk", cache.Stats())
+    cache.Clear()
+    if ResponseCache(directory = directory).Get(1, SERIES, {"planet_id": 34})[0]:
+        fail("cache_disk", -1, "Cleared entry read from disk", cache.Stats())
+    success("cache_disk")
+
+def test_session(server):
+    cache = ResponseCache()
+    with UserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                     hosts = server.Hosts(), cache = cache) as sess:
+        for _ in range(5):
+            code, data, _ = sess.Get(SERIES, {"planet_id": 34})
+            if code != 0 or len(data["media"]["vod_series"]) != 5:
+                fail("cache_session", code, "Wrong cached response", data)
+        for _ in range(3):
+            sess.Get(FEEDS, {"planet_id": 34})
+    if server.requests.get("/media/vodseries") != 1 or server.requests.get("/fns/feeds") != 3:
+        fail("cache_session", -1, "Wrong number of requests sent", server.requests)
+    if cache.hits != 4:
+        fail("cache_session", -1, "Wrong number of hits", cache.Stats())
+    success("cache_session")
+
+def do_test():
+    test_ttl()
+    test_keys()
+    test_lru()
+    test_disk()
+
+    server = FakeUniverse(config.JWE_KEY, feeds = 50)
+    server.Start()
+    try:
+        test_session(server)
+    finally:
+        server.Stop()
+    success("===CACHE_TEST===")
+
+do_test()
@@ -0,0 +1,111 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from universe import Http
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+
+def make_http(server, **kwargs):
+    return Http(make_token(time.time() + 3600), config.JWE_KEY, hosts = server.Hosts(), **kwargs)
+
+def get(x, i = 0):
+    code, data, _ = x.Get(FEEDS, {"planet_id": 34, "next": float(i)})
+    if code != 0:
+        fail("connection", code, data, "")
+
+def wait_closed(server, count):
+    """ Wait for the server to see count connections closed """
+    deadline = time.monotonic() + 2
+    while server.closed < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return server.closed >= count
+
+def test_reuse(server):
+    # sequential requests share one connection
+    server.connections = server.closed = 0
+    with make_http(server) as x:
+        for i in range(20):
+            get(x, i)
+        if server.connections != 1 or server.closed != 0:
+            fail("connection_reuse", -1, "Connection not reused", (server.connections, server.closed))
+    if not wait_closed(server, 1):
+        fail("connection_reuse", -1, "Connection not closed by Close", server.closed)
+
+    # concurrent requests open at most pool_maxsize connections when the pool blocks
+    server.connections = server.closed = 0
+    server.latency = 0.02
+    with make_http(server, pool_maxsize = 3, pool_block = True) as x:
+        with ThreadPoolExecutor(max_workers = 8) as executor:
+            list(executor.map(lambda i: get(x, i), range(40)))
+        if not 1 <= server.connections <= 3:
+            fail("connection_reuse", -1, "Pool not bounded", server.connections)
+    server.latency = 0.0
+    success("connection_reuse")
+
+def test_keep_alive(server):
+    server.connections = server.closed = 0
+    with make_http(server, keep_alive = 0.3) as x:
+        get(x)
+        time.sleep(0.1)
+        get(x)
+        if server.connections != 1:
+            fail("connection_keep_alive", -1, "Connection dropped before keep_alive", server.connections)
+
+        # idle for longer than keep_alive, the connection is dropped before the request
+        time.sleep(0.5)
+        get(x)
+        if server.connections != 2 or not wait_closed(server, 1):
+            fail("connection_keep_alive", -1, "Idle connection reused", (server.connections, server.closed))
+        get(x)
+        if server.connections != 2:
+            fail("connection_keep_alive", -1, "New connection not reused", server.connections)
+
+    # without keep_alive, idle connections are kept
+    server.connections = server.closed = 0
+    with make_http(server, keep_alive = None) as x:
+        get(x)
+        time.sleep(0.2)
+        get(x)
+        if server.connections != 1:
+            fail("connection_keep_alive", -1, "Connection dropped without keep_alive", server.connections)
+    success("connection_keep_alive")
+
+def test_remount(server):
+    server.connections = server.closed = 0
+    with make_http(server) as x:
+        get(x)
+
+        # the previous pool is closed, the new one opens its own connection and reuses it
+        x.setPool(pool_connections = 2, pool_maxsize = 2)
+        if not wait_closed(server, 1):
+            fail("connection_remount", -1, "Previous pool not closed by setPool", server.closed)
+        get(x)
+        get(x)
+        if server.connections != 2:
+            fail("connection_remount", -1, "Wrong connections after setPool", server.connections)
+
+        # connections made through a proxy are dropped by unsetProxy
+        x.unsetProxy()
+        if not wait_closed(server, 2):
+            fail("connection_remount", -1, "Connections not closed by unsetProxy", server.closed)
+        get(x)
+        get(x)
+        if server.connections != 3:
+            fail("connection_remount", -1, "Wrong connections after unsetProxy", server.connections)
+    success("connection_remount")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY)
+    server.Start()
+    try:
+        test_reuse(server)
+        test_keep_alive(server)
+        test_remount(server)
+    finally:
+        server.Stop()
+    success("===CONNECTION_TEST===")
+
+do_test()
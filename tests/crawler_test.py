@@ -0,0 +1,77 @@
+import time
+
+from universe import Crawler, FNSModule, VODModule
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+def make_tokens(accounts):
+    return [(make_token(time.time() + 3600, account_no = i), make_token(time.time() + 86400, "refresh", account_no = i))
+            for i in range(accounts)]
+
+def test_merge(server, accounts):
+    name = "crawler_merge {}".format(accounts)
+    crawler = Crawler(make_tokens(accounts), processes = 2, threads = 2, hosts = server.Hosts())
+    fns = FNSModule(None)
+    vod = VODModule(None)
+    # every artist id returns the same feeds, which are merged once
+    counts = crawler.Crawl([34, 35], fns, vod, artist_ids = (1, 2), page_size = 20)
+    if crawler.errors:
+        fail(name, -1, "Crawl failed", crawler.errors)
+    if counts != {"feeds": 200, "vod_series": 4, "vods": 12}:
+        fail(name, -1, "Wrong counts", counts)
+    for planet_id in (34, 35):
+        if len(fns.feeds[planet_id]) != 100 or len(vod.vod[planet_id]) != 6:
+            fail(name, -1, "Objects missing", (len(fns.feeds[planet_id]), len(vod.vod[planet_id])))
+        if fns.LatestFeeds(planet_id, 1)[0].feed_id != server.feed(planet_id, 99)["id"]:
+            fail(name, -1, "Wrong latest feed", planet_id)
+    if not all(v.FETCHED for p in (34, 35) for v in vod.vod[p].values()):
+        fail(name, -1, "VOD views not merged", "")
+
+    # 2 planets * 2 artists * 5 pages, and per planet 1 series list, 2 bridges and 6 views
+    throughput = crawler.Throughput()
+    if sum(w["requests"] for w in throughput.values()) != 38 or not all(w["rate"] > 0 for w in throughput.values()):
+        fail(name, -1, "Wrong throughput", throughput)
+    success(name)
+
+def test_without_vod(server):
+    crawler = Crawler(make_tokens(1), processes = 1, hosts = server.Hosts())
+    fns = FNSModule(None)
+    counts = crawler.Crawl([34], fns, page_size = 50, max_pages = 1)
+    if counts != {"feeds": 50, "vod_series": 0, "vods": 0} or len(fns.feeds[34]) != 50:
+        fail("crawler_max_pages", -1, "Wrong counts", counts)
+    success("crawler_max_pages")
+
+def test_errors(server):
+    # failed tasks are collected, not raised
+    server.error_rate = 1.0
+    crawler = Crawler(make_tokens(1), processes = 1, hosts = server.Hosts())
+    vod = VODModule(None)
+    counts = crawler.Crawl([34, 35], vod = vod)
+    server.error_rate = 0.0
+    if counts != {"feeds": 0, "vod_series": 0, "vods": 0} or len(crawler.errors) != 2:
+        fail("crawler_errors", -1, "Errors not collected", crawler.errors)
+    if sorted(task for task, _ in crawler.errors) != [("vod_series", 34, None), ("vod_series", 35, None)]:
+        fail("crawler_errors", -1, "Wrong failed tasks", crawler.errors)
+
+    try:
+        Crawler([])
+        fail("crawler_errors", -1, "Crawler without token created", "")
+    except Exception:
+        pass
+    success("crawler_errors")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 100, vod_series = 2, vods = 3)
+    server.Start()
+    try:
+        test_merge(server, 1)
+        test_merge(server, 2)
+        test_without_vod(server)
+        test_errors(server)
+    finally:
+        server.Stop()
+    success("===CRAWLER_TEST===")
+
+if __name__ == "__main__":
+    do_test()
@@ -0,0 +1,133 @@
+import os
+import hashlib
+import tempfile
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from universe import Downloader
+from tests.test_util import *
+
+# Local file server with ETag, conditional requests and Range support
+class FileHandler(BaseHTTPRequestHandler):
+    files = {}          # Dictionary<path, bytes>
+    cut_once = set()    # paths whose next response stops in the middle
+    requests = []       # List<(path, Range header, status)>
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.files.get(self.path)
+        if body is None:
+            return self.__reply(404, b"")
+
+        etag = '"{}"'.format(hashlib.sha256(body).hexdigest()[:16])
+        if self.headers.get("If-None-Match") == etag:
+            return self.__reply(304, b"", etag)
+
+        start = 0
+        rng = self.headers.get("Range")
+        if rng is not None and self.headers.get("If-Range", etag) == etag:
+            start = int(rng[len("bytes="):].split("-")[0])
+            if start >= len(body):
+                return self.__reply(416, b"", etag)
+            return self.__reply(206, body[start:], etag, "bytes {}-{}/{}".format(start, len(body) - 1, len(body)))
+        return self.__reply(200, body, etag)
+
+    def __reply(self, status, body, etag = None, content_range = None):
+        self.requests.append((self.path, self.headers.get("Range"), status))
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if content_range is not None:
+            self.send_header("Content-Range", content_range)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.path in self.cut_once and status == 200:
+            self.cut_once.discard(self.path)
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+def serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FileHandler)
+    Thread(target = server.serve_forever, daemon = True).start()
+    return server, "http://127.0.0.1:{}".format(server.server_address[1])
+
+def test_download_all(d, base):
+    urls = [base + "/img/{}.jpg".format(i) for i in range(20)]
+    paths = d.DownloadAll(urls)
+    if d.errors or len(paths) != 20:
+        fail("download_all", -1, "Missing files", d.errors)
+    for i, url in enumerate(urls):
+        with open(paths[url], "rb") as f:
+            if f.read() != FileHandler.files["/img/{}.jpg".format(i)]:
+                fail("download_all", -1, "Wrong content", url)
+    success("download_all")
+
+def test_download_dedup(d, base):
+    a = d.Download(base + "/same/a.vtt")
+    b = d.Download(base + "/same/b.vtt")
+    if a != b:
+        fail("download_dedup", -1, "Same content stored twice", (a, b))
+    success("download_dedup")
+
+def test_download_unchanged(d, base):
+    before = d.downloaded
+    d.DownloadAll([base + "/img/{}.jpg".format(i) for i in range(20)])
+    if d.downloaded != before or d.unchanged != 20:
+        fail("download_unchanged", -1, "Unchanged files downloaded again", d.downloaded - before)
+    success("download_unchanged")
+
+def test_download_changed(d, base):
+    FileHandler.files["/img/0.jpg"] = b"changed" * 1000
+    with open(d.Download(base + "/img/0.jpg"), "rb") as f:
+        if f.read() != FileHandler.files["/img/0.jpg"]:
+            fail("download_changed", -1, "Changed file not downloaded", "")
+    success("download_changed")
+
+def test_download_resume(d, base):
+    url = base + "/vod/big.jpg"
+    FileHandler.cut_once.add("/vod/big.jpg")
+    d.DownloadAll([url])
+    if not d.errors:
+        fail("download_resume", -1, "Interrupted download succeeded", "")
+
+    path = d.Download(url)
+    with open(path, "rb") as f:
+        if f.read() != FileHandler.files["/vod/big.jpg"]:
+            fail("download_resume", -1, "Wrong content after resume", "")
+    half = len(FileHandler.files["/vod/big.jpg"]) // 2
+    if FileHandler.requests[-1] != ("/vod/big.jpg", "bytes={}-".format(half), 206) or d.resumed != 1:
+        fail("download_resume", -1, "Not resumed with a Range request", FileHandler.requests[-1])
+    success("download_resume")
+
+def test_download_manifest(directory, base):
+    with Downloader(directory) as d:
+        if d.Path(base + "/img/1.jpg") is None:
+            fail("download_manifest", -1, "Manifest not reloaded", "")
+        d.DownloadAll([base + "/img/{}.jpg".format(i) for i in range(20)], revalidate = False)
+        if d.unchanged != 20 or d.received != 0:
+            fail("download_manifest", -1, "Files downloaded again", d.received)
+    success("download_manifest")
+
+def do_test():
+    FileHandler.files = {"/img/{}.jpg".format(i): os.urandom(100000 + i) for i in range(20)}
+    FileHandler.files["/same/a.vtt"] = FileHandler.files["/same/b.vtt"] = b"WEBVTT\n\n" * 100
+    FileHandler.files["/vod/big.jpg"] = os.urandom(3000000)
+    server, base = serve()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with Downloader(directory, max_workers = 4) as d:
+            test_download_all(d, base)
+            test_download_dedup(d, base)
+            test_download_unchanged(d, base)
+            test_download_changed(d, base)
+            test_download_resume(d, base)
+        test_download_manifest(directory, base)
+
+    server.shutdown()
+    success("===DOWNLOAD_TEST===")
+
+do_test()
@@ -0,0 +1,113 @@
+import os
+import csv
+import gzip
+import json
+import time
+import tempfile
+
+from universe import UserSession, FNSModule, VODModule, Exporter
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+class FailingSession():
+    """ Session whose requests to path fail once limit of them succeeded """
+
+    def __init__(self, sess, path, limit):
+        self.sess = sess
+        self.path = path
+        self.limit = limit
+
+    def Get(self, target, query = {}):
+        if self.path in target:
+            if self.limit <= 0:
+                return 1098, "Interrupted", None
+            self.limit -= 1
+        return self.sess.Get(target, query)
+
+def read_jsonl(directory, kind):
+    with open(os.path.join(directory, kind + ".jsonl"), "r") as f:
+        return [json.loads(line) for line in f]
+
+def test_feeds_resume(sess, directory):
+    # interrupted after 3 pages of 10 feeds, each page is committed
+    fns = FNSModule(FailingSession(sess, "/fns/feeds", 3))
+    try:
+        Exporter(directory, batch_size = 1).ExportFeeds(fns, 34, page_size = 10)
+        fail("export_feeds_resume", -1, "Interrupted export not raised", "")
+    except Exception:
+        pass
+    exported = read_jsonl(directory, "feeds")
+    if len(exported) != 30:
+        fail("export_feeds_resume", -1, "Wrong number of feeds before resume", len(exported))
+
+    # a partial batch written after the checkpoint is discarded
+    with open(os.path.join(directory, "feeds.jsonl"), "a") as f:
+        f.write('{"feed_id": "partial"\n')
+
+    fns = FNSModule(sess)
+    count = Exporter(directory, batch_size = 1).ExportFeeds(fns, 34, page_size = 10)
+    if fns.feeds or fns.artists or fns.attachments:
+        fail("export_feeds_resume", -1, "Exported feeds kept in the module", len(fns.feeds.get(34, {})))
+    feeds = read_jsonl(directory, "feeds")
+    ids = [f["feed_id"] for f in feeds]
+    if count != 70 or len(ids) != 100 or len(set(ids)) != 100:
+        fail("export_feeds_resume", -1, "Feeds missing or duplicated", (count, len(ids), len(set(ids))))
+    attachments = read_jsonl(directory, "attachments")
+    artists = read_jsonl(directory, "artists")
+    if len(attachments) != 200 or len(artists) != 10:
+        fail("export_feeds_resume", -1, "Wrong related records", (len(attachments), len(artists)))
+    feed = next(f for f in feeds if f["feed_id"] == attachments[-1]["feed_id"])
+    if feed["attachment_count"] != 2 or attachments[-1]["publish_date"] != feed["publish_date"] or \
+            not feed["publish_date"] or len(feed["tags"]) != 1 or not feed["tags"][0].startswith("tag"):
+        fail("export_feeds_resume", -1, "Wrong feed record", (feed, attachments[-1]))
+
+    # a finished query is skipped
+    if Exporter(directory).ExportFeeds(FNSModule(sess), 34, page_size = 10) != 0:
+        fail("export_feeds_resume", -1, "Finished export done again", "")
+    success("export_feeds_resume")
+
+def test_vod_resume(sess, directory):
+    # interrupted at the third VOD series
+    vod = VODModule(FailingSession(sess, "/media/vodbridge", 2))
+    try:
+        Exporter(directory, batch_size = 1).ExportVOD(vod, 34, fetchVOD = False)
+        fail("export_vod_resume", -1, "Interrupted export not raised", "")
+    except Exception:
+        pass
+    if len(read_jsonl(directory, "vods")) != 6:
+        fail("export_vod_resume", -1, "Wrong number of VOD before resume", len(read_jsonl(directory, "vods")))
+
+    vod = VODModule(sess)
+    count = Exporter(directory, batch_size = 1).ExportVOD(vod, 34, fetchVOD = False)
+    if vod.vod[34] or any(vs.vods for vs in vod.vod_series[34].values()):
+        fail("export_vod_resume", -1, "Exported VOD kept in the module", len(vod.vod[34]))
+    vods = [v["vod_no"] for v in read_jsonl(directory, "vods")]
+    series = read_jsonl(directory, "vod_series")
+    if count != 9 or len(vods) != 15 or len(set(vods)) != 15 or len(series) != 5:
+        fail("export_vod_resume", -1, "VOD missing or duplicated", (count, len(vods), len(series)))
+    success("export_vod_resume")
+
+def test_csv_gzip(sess, directory):
+    exporter = Exporter(directory, format = "csv", compress = True, batch_size = 25)
+    count = exporter.ExportFeeds(FNSModule(sess), 34, page_size = 10)
+    with gzip.open(os.path.join(directory, "feeds.csv.gz"), "rt", encoding = "utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if count != 100 or len(rows) != 100 or json.loads(rows[0]["tags"]) != ["tag1"]:
+        fail("export_csv_gzip", -1, "Wrong CSV export", (count, len(rows), rows[0]))
+    success("export_csv_gzip")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 100, vod_series = 5, vods = 3)
+    server.Start()
+    try:
+        with UserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                         hosts = server.Hosts()) as sess:
+            test_feeds_resume(sess, tempfile.mkdtemp())
+            test_vod_resume(sess, tempfile.mkdtemp())
+            test_csv_gzip(sess, tempfile.mkdtemp())
+    finally:
+        server.Stop()
+    success("===EXPORT_TEST===")
+
+do_test()
@@ -0,0 +1,247 @@
+import json
+import time
+import random
+import uuid
+import base64
+
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from urllib.parse import urlparse
+from authlib.jose import JsonWebEncryption, jwt
+
+# Stand-in for the Universe API and auth servers, speaking the same JWE as Http:
+# queries are read from the "Payload" header, responses are encrypted with the same key.
+
+def make_token(exp, type = "access", account_no = 1, np_game_account_id = "np-test"):
+    """ (Float, String, Int, String) -> String
+    Bearer token accepted by parse_bearer_token. The signature is not checked by the client.
+    """
+    payload = json.dumps({"exp": int(exp), "account_no": str(account_no),
+                          "np_game_account_id": np_game_account_id, "type": type})
+    return "eyJ0eXAiOiJKV1QiLCJhbGciOiJSUzI1NiJ9.{}.fake-signature".format(
+        base64.urlsafe_b64encode(payload.encode()).decode().rstrip("="))
+
+class FakeUniverse():
+    """
+    Local server answering /fns/feeds, /media/vodseries, /media/vodbridge,
+    /media/vodview and /refresh/ with synthetic data.
+    latency is added to every response, body_size is the length of feed bodies,
+    token_ttl is the lifetime of the access tokens issued by /refresh/.
+    If max_in_flight is given, requests beyond that many at once are answered 429
+    with a Retry-After of retry_after seconds.
+    A fraction error_rate of requests fail with 500, and a fraction slow_rate
+    of them take slow_latency more seconds.
+    /refresh/ fails with 500 for the account numbers in fail_refresh.
+    connections counts the connections accepted, closed those closed since.
+    """
+
+    JWE_HEADER = {"alg": "A256KW", "enc": "A256CBC-HS512", "zip": "DEF", "typ": "JWT"}
+    DATE = datetime(2021, 8, 1, tzinfo = timezone(timedelta(hours = 9)))
+
+    def __init__(self, key, latency = 0.0, feeds = 1000, artists = 10, attachments = 2, body_size = 200,
+                 vod_series = 5, vods = 10, token_ttl = 3600, max_in_flight = None, retry_after = 0,
+                 error_rate = 0.0, slow_rate = 0.0, slow_latency = 0.5):
+        self.key = bytes(bytearray(key))
+        self.latency = latency
+        self.feeds = feeds
+        self.artists = artists
+        self.attachments = attachments
+        self.body_size = body_size
+        self.vod_series = vod_series
+        self.vods = vods
+        self.token_ttl = token_ttl
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+
+        self.requests = {}      # Dictionary<path, Int>
+        self.throttled = 0
+        self.errors = 0
+        self.fail_refresh = set()   # Set<String>
+        self.edits = {}             # Dictionary<Int, Object> fields replacing those of feed i
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections = 0
+        self.closed = 0
+        self.lock = Lock()
+        self.jwe = JsonWebEncryption()
+        self.server = None
+
+    def Start(self):
+        """ Start serving on a free local port, returns the base url """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True   # headers and body are written separately
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def finish(self):
+                try:
+                    super().finish()
+                finally:
+                    with fake.lock:
+                        fake.closed += 1
+
+            def do_GET(self):
+                fake.handle(self)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        Thread(target = self.server.serve_forever, daemon = True).start()
+        return self.Url()
+
+    def Stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def Url(self):
+        return "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def Hosts(self):
+        """ hosts option of Http sending every request to this server """
+        return {"https://api.universe-official.io": self.Url(), "https://auth.universe-official.io": self.Url()}
+
+    def handle(self, handler):
+        path = urlparse(handler.path).path.rstrip("/")
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+        try:
+            decrypted = self.jwe.deserialize_compact(handler.headers["Payload"], self.key)
+            query = jwt.decode(decrypted["payload"].decode("utf-8-sig"), self.key)
+        except Exception:
+            return self.reply(handler, 400, b"bad payload")
+
+        routes = {
+            "/fns/feeds": self.fns_feeds,
+            "/media/vodseries": self.vod_series_list,
+            "/media/vodbridge": self.vod_bridge,
+            "/media/vodview": self.vod_view,
+            "/refresh": self.refresh
+        }
+        if not path in routes:
+            return self.reply(handler, 404, b"not found")
+        if path == "/refresh" and str(query.get("account_no")) in self.fail_refresh:
+            return self.reply(handler, 500, b"refresh failed")
+
+        with self.lock:
+            if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+                self.throttled += 1
+                throttled = True
+            else:
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                throttled = False
+        if throttled:
+            return self.reply(handler, 429, b"too many requests", {"Retry-After": str(self.retry_after)})
+
+        if self.error_rate and random.random() < self.error_rate:
+            with self.lock:
+                self.in_flight -= 1
+                self.errors += 1
+            return self.reply(handler, 500, b"internal error")
+
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if self.slow_rate and random.random() < self.slow_rate:
+                time.sleep(self.slow_latency)
+            data = routes[path](query)
+            body = self.jwe.serialize_compact(self.JWE_HEADER, json.dumps({"data": data}).encode(), self.key)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        self.reply(handler, 200, body)
+
+    def reply(self, handler, status, body, headers = {}):
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Type", "text/plain")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def feed(self, planet_id, i):
+        """ Synthetic FNS feed, i = 0 is the oldest """
+        account_no = 1000 + i % self.artists
+        date = (self.DATE + timedelta(minutes = i)).strftime("%Y-%m-%dT%H:%M:%S%z")
+        feed_id = str(uuid.uuid5(uuid.NAMESPACE_URL, "feed/{}/{}".format(planet_id, i)))
+        feed = {
+            "id": feed_id, "account_no": account_no, "artist_id": i % self.artists,
+            "nickname": "artist{}".format(account_no),
+            "profile_picture": "https://cdn.universe-official.io/profile/{}.jpg".format(account_no),
+            "body": ("post {} ".format(i) * self.body_size)[:self.body_size],
+            "create_date": date, "modify_date": date, "publish_date": date,
+            "attach_urls": [{
+                "id": "{}-{}".format(feed_id, a), "account_no": account_no, "type": "image",
+                "file": "https://cdn.universe-official.io/fns/{}/{}/{}.jpg".format(planet_id, i, a)
+            } for a in range(self.attachments)],
+            "tags": ["tag{}".format(i % 7)]
+        }
+        feed.update(self.edits.get(i, {}))
+        return feed
+
+    def fns_feeds(self, query):
+        # next is the number of feeds already returned, newest first
+        start = int(float(query.get("next") or 0))
+        size = int(query.get("size", 10))
+        end = min(start + size, self.feeds)
+        feeds = [self.feed(query["planet_id"], self.feeds - 1 - i) for i in range(start, end)]
+        return {"fns": {"feeds": feeds, "next": float(end) if end < self.feeds else 0.0}}
+
+    def thumbnail(self, name):
+        return {kind: {"s3path": "https://cdn.universe-official.io/vod/{}/{}.jpg".format(name, kind)}
+                for kind in ("landscape", "portrait", "square")}
+
+    def vod_series_list(self, query):
+        return {"media": {"vod_series": [{
+            "vod_series_no": s, "title": {"ko": "series {}".format(s)}, "thumbnail": self.thumbnail("s{}".format(s))
+        } for s in range(self.vod_series)]}}
+
+    def vod_bridge(self, query):
+        s = int(query["vod_series_no"])
+        return {"media": {"vod_bridge": {"vod_media": {
+            str(s * 1000 + v): {"title": {"ko": "vod {}".format(v)}, "duration_time": 600 + v,
+                                "thumbnail": self.thumbnail(s * 1000 + v)}
+            for v in range(self.vods)
+        }}}}
+
+    def vod_view(self, query):
+        no = query["media_no"]
+        cdn = "https://cdn.universe-official.io/vod/{}".format(no)
+        return {"media": {"vod_view": {
+            "title": {"ko": "vod {}".format(no)},
+            "thumbnail": self.thumbnail(no),
+            "vod_s3path": {
+                "duration_time": 600, "origin_filename": "{}.mp4".format(no), "assertion": "assertion",
+                "playready_license_server_url": "https://license.universe-official.io/playready",
+                "widevine_license_server_url": "https://license.universe-official.io/widevine",
+                "fairplay_license_server_url": "https://license.universe-official.io/fairplay",
+                "fairplay_cert_url": "https://license.universe-official.io/fairplay.cer",
+                "cloudfront_dash_playready_url": cdn + "/playready.mpd",
+                "cloudfront_dash_widevine_url": cdn + "/widevine.mpd",
+                "cloudfront_hls_fairplay_url": cdn + "/fairplay.m3u8"
+            },
+            "vod_subtitle": {lang: {"s3path": "{}/{}.vtt".format(cdn, lang)}
+                             for lang in ("ko", "en", "ja", "zh-cn", "zh-tw")}
+        }}}
+
+    def refresh(self, query):
+        return {"auth": {"access_token": make_token(time.time() + self.token_ttl, "access", query["account_no"],
+                                                    query["np_game_account_id"])}}
@@ -0,0 +1,99 @@
+import time
+
+from threading import Barrier, Event
+from concurrent.futures import ThreadPoolExecutor
+from universe import Http
+from universe import config
+from universe.util import SingleFlight
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+
+def test_shared_result():
+    flight = SingleFlight()
+    release = Event()
+    calls = []
+    def call():
+        calls.append(1)
+        release.wait()
+        return "result"
+
+    with ThreadPoolExecutor(max_workers = 5) as executor:
+        futures = [executor.submit(flight.Do, "key", call) for _ in range(5)]
+        time.sleep(0.2)
+        release.set()
+        results = [f.result() for f in futures]
+    if results != ["result"] * 5 or len(calls) != 1 or flight.shared != 4:
+        fail("flight_shared_result", -1, "Call not shared", (results, len(calls), flight.shared))
+
+    # once done, the next call is made again
+    flight.Do("key", call)
+    if len(calls) != 2:
+        fail("flight_shared_result", -1, "Finished call reused", len(calls))
+    success("flight_shared_result")
+
+def test_shared_exception():
+    flight = SingleFlight()
+    barrier = Barrier(3)
+    def call():
+        time.sleep(0.2)
+        raise ValueError("failed")
+    def do():
+        barrier.wait()
+        try:
+            flight.Do("key", call)
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers = 3) as executor:
+        results = list(executor.map(lambda _: do(), range(3)))
+    if results != ["failed"] * 3:
+        fail("flight_shared_exception", -1, "Exception not raised to every caller", results)
+    success("flight_shared_exception")
+
+def concurrent_get(x, queries):
+    barrier = Barrier(len(queries))
+    def get(query):
+        barrier.wait()
+        return x.Get(FEEDS, query)[0]
+    with ThreadPoolExecutor(max_workers = len(queries)) as executor:
+        return list(executor.map(get, queries))
+
+def test_http(server, token):
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts())
+    server.requests.clear()
+    codes = concurrent_get(x, [{"planet_id": 34, "size": 10}] * 8)
+    if codes != [0] * 8 or server.requests["/fns/feeds"] != 1 or x.CoalescedCount() != 7:
+        fail("flight_http", -1, "Identical Get not coalesced", (codes, server.requests, x.CoalescedCount()))
+
+    # different queries are sent separately
+    server.requests.clear()
+    concurrent_get(x, [{"planet_id": 34, "size": i} for i in range(1, 5)])
+    if server.requests["/fns/feeds"] != 4:
+        fail("flight_http", -1, "Different queries coalesced", server.requests)
+    success("flight_http")
+
+def test_disabled(server, token):
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False)
+    server.requests.clear()
+    concurrent_get(x, [{"planet_id": 34, "size": 10}] * 4)
+    if server.requests["/fns/feeds"] != 4 or x.CoalescedCount() != 0:
+        fail("flight_disabled", -1, "Get coalesced while disabled", server.requests)
+    success("flight_disabled")
+
+def do_test():
+    test_shared_result()
+    test_shared_exception()
+
+    server = FakeUniverse(config.JWE_KEY, latency = 0.3, feeds = 50)
+    server.Start()
+    token = make_token(time.time() + 3600)
+    try:
+        test_http(server, token)
+        test_disabled(server, token)
+    finally:
+        server.Stop()
+    success("===FLIGHT_TEST===")
+
+do_test()
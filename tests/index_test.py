@@ -0,0 +1,94 @@
+from universe import FNSModule
+from universe.Index import TextIndex
+from tests.test_util import *
+
+def make_index():
+    index = TextIndex()
+    index.Add("ko", "안녕 하세요")
+    index.Add("ja", "こんにちは世界")
+    index.Add("en", "Hello World, new Album teaser")
+    index.Add("mix", "BTS 새 앨범 teaser 公開")
+    return index
+
+def check(name, got, expected):
+    if got != expected:
+        fail(name, -1, "Wrong ids", (got, expected))
+
+def test_cjk(index):
+    # single characters, at the start, in the middle and at the end of a run
+    for query, expected in (("안", {"ko"}), ("녕", {"ko"}), ("요", {"ko"}), ("세", {"ko"}),
+                            ("こ", {"ja"}), ("ち", {"ja"}), ("界", {"ja"}), ("開", {"mix"})):
+        check("index_cjk " + query, index.Find(query), expected)
+    check("index_cjk bigram", index.Find("안녕"), {"ko"})
+    check("index_cjk run", index.Find("にちは世"), {"ja"})
+    check("index_cjk missing", index.Find("界こ"), set())
+    success("index_cjk")
+
+def test_latin(index):
+    check("index_latin", index.Find("hello"), {"en"})
+    check("index_latin case", index.Find("WORLD hello"), {"en"})
+    check("index_latin every word", index.Find("hello album"), {"en"})
+    check("index_latin missing word", index.Find("hello bts"), set())
+    check("index_latin partial word", index.Find("hell"), set())
+    success("index_latin")
+
+def test_mixed(index):
+    check("index_mixed", index.Find("teaser"), {"en", "mix"})
+    check("index_mixed scripts", index.Find("bts 앨범"), {"mix"})
+    check("index_mixed single character", index.Find("teaser 앨"), {"mix"})
+    check("index_mixed punctuation", index.Find("world,"), {"en"})
+    success("index_mixed")
+
+def test_prefix(index):
+    check("index_prefix", index.Find("hel", prefix = True), {"en"})
+    check("index_prefix last word", index.Find("world alb", prefix = True), {"en"})
+    check("index_prefix not first word", index.Find("wor album", prefix = True), set())
+    check("index_prefix cjk", index.Find("こんに", prefix = True), {"ja"})
+    check("index_prefix exact", index.Find("teas"), set())
+    success("index_prefix")
+
+def test_remove(index):
+    index.Remove("ko", "안녕 하세요")
+    check("index_remove", index.Find("요"), set())
+    check("index_remove others", index.Find("界"), {"ja"})
+    success("index_remove")
+
+def make_feed(i, body):
+    date = "2021-08-01T00:{:02d}:00+0900".format(i)
+    return {
+        "id": str(i), "account_no": 1000 + i % 2, "artist_id": i % 2, "nickname": "artist", "profile_picture": None,
+        "body": body, "create_date": date, "modify_date": date, "publish_date": date, "attach_urls": [], "tags": []
+    }
+
+def test_module():
+    fns = FNSModule(None)
+    bodies = ["New album teaser", "새 앨범 티저 공개", "album release day", "Concert teaser", "앨범 발매"]
+    fns.ProcessFeeds(34, {"feeds": [make_feed(i, body) for i, body in enumerate(bodies)], "next": 0.0})
+    if fns.texts:
+        fail("index_module", -1, "Text index built before a search", list(fns.texts))
+
+    ids = lambda feeds: [f.feed_id for f in feeds]
+    check("index_module search", set(ids(fns.SearchFeeds(34, "album"))), {"0", "2"})
+    check("index_module newest first", ids(fns.SearchFeeds(34, "앨범")), ["4", "1"])
+    check("index_module limit", ids(fns.SearchFeeds(34, "teaser", limit = 1)), ["3"])
+    check("index_module artist", ids(fns.SearchFeeds(34, "teaser", account_no = 1000)), ["0"])
+    check("index_module prefix", ids(fns.SearchFeeds(34, "rel", prefix = True)), ["2"])
+    check("index_module phrase", ids(fns.SearchFeeds(34, "album teaser", phrase = True)), ["0"])
+    check("index_module unknown planet", fns.SearchFeeds(35, "album"), [])
+
+    # feeds processed after the first search are indexed
+    fns.ProcessFeeds(34, {"feeds": [make_feed(5, "Album teaser two")], "next": 0.0})
+    check("index_module later feed", ids(fns.SearchFeeds(34, "album teaser")), ["5", "0"])
+    success("index_module")
+
+def do_test():
+    index = make_index()
+    test_cjk(index)
+    test_latin(index)
+    test_mixed(index)
+    test_prefix(index)
+    test_remove(index)
+    test_module()
+    success("===INDEX_TEST===")
+
+do_test()
@@ -0,0 +1,87 @@
+import json
+import time
+
+from authlib.jose import JsonWebEncryption, jwt
+from authlib.jose.errors import BadSignatureError
+from authlib.common.encoding import urlsafe_b64decode
+from universe import Http
+from universe import config
+from tests.fake_server import make_token
+from tests.test_util import *
+
+KEY = bytes(bytearray(config.JWE_KEY))
+
+def decrypt(jwe_str):
+    """ Decrypt jwe_str and verify its inner JWT with authlib, as the server does """
+    decrypted = JsonWebEncryption().deserialize_compact(jwe_str, KEY)
+    payload = decrypted["payload"]
+    if not payload.startswith(b"\xef\xbb\xbf"):
+        fail("jwe_envelope", -1, "BOM missing", payload[:8])
+    jwt_str = payload.decode("utf-8-sig")
+    return decrypted["header"], jwt_str, jwt.decode(jwt_str, KEY)
+
+def test_envelope(x):
+    jwe_str = x._Http__generateJWE({"planet_id": 34, "next": 1.5, "tags": "태그"})
+    header, jwt_str, claims = decrypt(jwe_str)
+    if header != Http.JWE_HEADER:
+        fail("jwe_envelope", -1, "Wrong JWE header", header)
+    if json.loads(urlsafe_b64decode(jwt_str.split(".")[0].encode())) != Http.JWT_HEADER or \
+            claims.header["alg"] != "HS256":
+        fail("jwe_envelope", -1, "Wrong JWT header", jwt_str)
+    if dict(claims) != {"account_no": 7, "np_game_account_id": "np-jwe", "planet_id": 34, "next": 1.5, "tags": "태그"}:
+        fail("jwe_envelope", -1, "Wrong claims", dict(claims))
+
+    # the signature is checked, and every envelope has its own key and iv
+    signing_input, signature = jwt_str.rsplit(".", 1)
+    try:
+        jwt.decode(signing_input + "." + signature[::-1], KEY)
+        fail("jwe_envelope", -1, "Tampered signature verified", "")
+    except BadSignatureError:
+        pass
+    other = x._Http__generateJWE({"planet_id": 34, "next": 1.5, "tags": "태그"})
+    if other == jwe_str or dict(decrypt(other)[2]) != dict(claims):
+        fail("jwe_envelope", -1, "Envelope reused without cache", "")
+
+    # what authlib encrypts is decrypted back
+    encrypted = JsonWebEncryption().serialize_compact(Http.JWE_HEADER, b'{"data": [1, 2]}', KEY)
+    if x._Http__decodeJWE(encrypted) != b'{"data": [1, 2]}':
+        fail("jwe_envelope", -1, "authlib JWE not decrypted", "")
+    success("jwe_envelope")
+
+def test_cache():
+    x = Http(make_token(time.time() + 3600, account_no = 7, np_game_account_id = "np-jwe"), config.JWE_KEY,
+             jwe_cache_size = 2)
+    first = x._Http__generateJWE({"planet_id": 34})
+    if x._Http__generateJWE({"planet_id": 34}) != first or x._Http__generateJWE({"planet_id": 35}) == first:
+        fail("jwe_cache", -1, "Envelope not cached by payload", "")
+
+    # least recently used envelopes are dropped
+    x._Http__generateJWE({"planet_id": 36})
+    x._Http__generateJWE({"planet_id": 37})
+    if x._Http__generateJWE({"planet_id": 34}) == first:
+        fail("jwe_cache", -1, "Cache not bounded", "")
+
+    # a new token clears the cache, the same token keeps it
+    cached = x._Http__generateJWE({"planet_id": 34})
+    x.UpdateToken(x.BEARER)
+    if x._Http__generateJWE({"planet_id": 34}) != cached:
+        fail("jwe_cache", -1, "Cache cleared by the same token", "")
+    x.UpdateToken(make_token(time.time() + 7200, account_no = 7, np_game_account_id = "np-jwe"))
+    renewed = x._Http__generateJWE({"planet_id": 34})
+    if renewed == cached or dict(decrypt(renewed)[2]) != dict(decrypt(cached)[2]):
+        fail("jwe_cache", -1, "Cache not cleared by UpdateToken", "")
+
+    # another account never reuses the envelope of the previous one
+    x.UpdateToken(make_token(time.time() + 7200, account_no = 8, np_game_account_id = "np-other"), False)
+    claims = decrypt(x._Http__generateJWE({"planet_id": 34}))[2]
+    if claims["account_no"] != 8 or claims["np_game_account_id"] != "np-other":
+        fail("jwe_cache", -1, "Envelope of the previous account", dict(claims))
+    success("jwe_cache")
+
+def do_test():
+    x = Http(make_token(time.time() + 3600, account_no = 7, np_game_account_id = "np-jwe"), config.JWE_KEY)
+    test_envelope(x)
+    test_cache()
+    success("===JWE_TEST===")
+
+do_test()
@@ -0,0 +1,151 @@
+import time
+
+from email.utils import formatdate
+from threading import Barrier
+from concurrent.futures import ThreadPoolExecutor
+from universe import Http, RateLimiter, AIMDController
+from universe import config
+from universe.Limiter import retry_after_seconds
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+
+def timed(func, *args):
+    start = time.monotonic()
+    func(*args)
+    return time.monotonic() - start
+
+def test_rate():
+    limiter = RateLimiter(rate = 20, burst = 1)
+    elapsed = timed(lambda: [limiter.Acquire("/fns/feeds") for _ in range(11)])
+    if not 0.45 <= elapsed < 0.8:
+        fail("limiter_rate", -1, "Rate not enforced", elapsed)
+
+    # other endpoints have their own bucket, rates their own rate
+    limiter = RateLimiter(rate = 20, burst = 1, rates = {"/media/vodview": 100})
+    limiter.Acquire("/fns/feeds")
+    if limiter.Acquire("/media/vodview") != 0:
+        fail("limiter_rate", -1, "Endpoints share a bucket", limiter.waited)
+    elapsed = timed(lambda: [limiter.Acquire("/media/vodview") for _ in range(10)])
+    if not 0.08 <= elapsed < 0.3:
+        fail("limiter_rate", -1, "Endpoint rate not enforced", elapsed)
+    success("limiter_rate")
+
+def test_burst():
+    limiter = RateLimiter(rate = 5, burst = 5)
+    waits = [limiter.Acquire("/fns/feeds") for _ in range(6)]
+    if any(waits[:5]) or not 0.15 <= waits[5] <= 0.2:
+        fail("limiter_burst", -1, "Burst not allowed", waits)
+
+    # the host-wide bucket limits every endpoint together
+    limiter = RateLimiter(rate = 100, total_rate = 10, total_burst = 2)
+    waits = [limiter.Acquire(endpoint) for endpoint in ("/a", "/b", "/c")]
+    if waits[:2] != [0.0, 0.0] or not 0.05 <= waits[2] <= 0.1:
+        fail("limiter_burst", -1, "Total rate not enforced", waits)
+    success("limiter_burst")
+
+def test_penalize():
+    limiter = RateLimiter(rate = 100)
+    limiter.Penalize("/fns/feeds", 0.3)
+    if limiter.Acquire("/media/vodview") != 0:
+        fail("limiter_penalize", -1, "Other endpoint blocked", limiter.waited)
+    if not 0.25 <= limiter.Acquire("/fns/feeds") <= 0.3:
+        fail("limiter_penalize", -1, "Endpoint not blocked", limiter.waited)
+
+    if retry_after_seconds("2") != 2.0 or retry_after_seconds("-1") != 0.0 or retry_after_seconds("soon") is not None:
+        fail("limiter_penalize", -1, "Retry-After seconds not parsed", retry_after_seconds("2"))
+    if not 8 <= retry_after_seconds(formatdate(time.time() + 10, usegmt = True)) <= 10:
+        fail("limiter_penalize", -1, "Retry-After date not parsed", "")
+    success("limiter_penalize")
+
+def test_aimd():
+    aimd = AIMDController(initial = 4, max_limit = 5, latency_tolerance = None)
+    for _ in range(8):
+        aimd.Acquire()
+        aimd.Release(0.01)
+    if aimd.limit != 5 or aimd.decreases:
+        fail("aimd_increase", -1, "Limit not increased to its maximum", aimd.limit)
+    success("aimd_increase")
+
+    # halved once per round trip, down to the minimum
+    aimd.Acquire()
+    aimd.Acquire()
+    aimd.Release(1.0, ok = False)
+    aimd.Release(1.0, ok = False)
+    if aimd.limit != 2.5 or aimd.decreases != 1:
+        fail("aimd_decrease", -1, "Limit not decreased once", (aimd.limit, aimd.decreases))
+    for _ in range(3):
+        aimd.Acquire()
+        aimd.Release(0.0, ok = False)
+    if aimd.limit != 1 or aimd.in_flight != 0:
+        fail("aimd_decrease", -1, "Limit below minimum", aimd.limit)
+
+    # latency rising above its baseline counts as congestion
+    aimd = AIMDController(initial = 8, latency_tolerance = 2.0)
+    aimd.Acquire()
+    aimd.Release(0.01)
+    aimd.Acquire()
+    aimd.Release(0.1)
+    if aimd.decreases != 1:
+        fail("aimd_decrease", -1, "Slow request not counted", aimd.limit)
+    success("aimd_decrease")
+
+def test_in_flight():
+    aimd = AIMDController(initial = 2, max_limit = 2, latency_tolerance = None)
+    peak = [0]
+    def work(_):
+        aimd.Acquire()
+        peak[0] = max(peak[0], aimd.in_flight)
+        time.sleep(0.05)
+        aimd.Release(0.05)
+    with ThreadPoolExecutor(max_workers = 6) as executor:
+        list(executor.map(work, range(12)))
+    if peak[0] != 2 or aimd.in_flight != 0:
+        fail("aimd_in_flight", -1, "Limit of requests in flight not kept", peak[0])
+    success("aimd_in_flight")
+
+def test_http(server, token):
+    # the server throttles above 2 requests in flight, 8 threads start with a limit of 8
+    aimd = AIMDController(initial = 8, latency_tolerance = None)
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False, concurrency = aimd)
+    barrier = Barrier(8)
+    def get(i):
+        barrier.wait()
+        return [x.Get(FEEDS, {"planet_id": 34, "next": float(i * 10 + j)})[0] for j in range(10)]
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        codes = sum(executor.map(get, range(8)), [])
+    if set(codes) - {0, 1097} or server.throttled == 0 or codes.count(1097) != server.throttled:
+        fail("limiter_http", -1, "Throttled requests not returned", (set(codes), server.throttled))
+    if aimd.decreases == 0 or aimd.limit >= 8 or aimd.in_flight != 0:
+        fail("limiter_http", -1, "Limit not decreased", (aimd.limit, aimd.decreases))
+
+    # Retry-After blocks the endpoint
+    server.retry_after = 1
+    limiter = RateLimiter(rate = 100)
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False, limiter = limiter)
+    server.max_in_flight = 0
+    code, _, _ = x.Get(FEEDS, {"planet_id": 34})
+    server.max_in_flight = None
+    elapsed = timed(x.Get, FEEDS, {"planet_id": 34})
+    if code != 1097 or not 0.9 <= elapsed < 1.5:
+        fail("limiter_http", code, "Retry-After not respected", elapsed)
+    server.retry_after = 0
+    success("limiter_http")
+
+def do_test():
+    test_rate()
+    test_burst()
+    test_penalize()
+    test_aimd()
+    test_in_flight()
+
+    server = FakeUniverse(config.JWE_KEY, latency = 0.05, feeds = 50, max_in_flight = 2)
+    server.Start()
+    try:
+        test_http(server, make_token(time.time() + 3600))
+    finally:
+        server.Stop()
+    success("===LIMITER_TEST===")
+
+do_test()
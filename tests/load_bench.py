@@ -0,0 +1,141 @@
+import sys
+import time
+import argparse
+
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from universe import UserSession, UserSessionPool, Crawler, FNSModule, VODModule, RateLimiter, AIMDController, RetryPolicy, HedgePolicy
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+
+# End-to-end benchmark of LoadFeed and LoadAllVOD against the local FakeUniverse
+
+class TimedSession():
+    """ UserSession wrapper recording the latency of every request """
+
+    def __init__(self, sess):
+        self.sess = sess
+        self.latencies = []
+        self.lock = Lock()
+
+    def Get(self, target, query = {}):
+        start = time.perf_counter()
+        result = self.sess.Get(target, query)
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+        return result
+
+    def Post(self, target, query = {}):
+        return self.sess.Post(target, query)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def report(name, timed, elapsed):
+    lat = timed.latencies
+    print("[+] {:<12} {:>6} requests in {:6.2f}s: {:8.1f} req/s, p50 {:6.2f}ms, p99 {:6.2f}ms".format(
+        name, len(lat), elapsed, len(lat) / elapsed, percentile(lat, 50) * 1000, percentile(lat, 99) * 1000))
+
+def bench_load_feed(sess, planet_id, pages, page_size, threads):
+    timed = TimedSession(sess)
+
+    # one planet per thread keeps the dictionaries of each FNSModule apart
+    def load_planet(p):
+        fns = FNSModule(timed)
+        for page in range(pages // threads):
+            fns.LoadFeed(planet_id + p, next = float(page * page_size), size = page_size)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = threads) as executor:
+        list(executor.map(load_planet, range(threads)))
+    report("LoadFeed", timed, time.perf_counter() - start)
+
+def bench_load_all_vod(sess, planet_id, max_workers):
+    timed = TimedSession(sess)
+    vod = VODModule(timed)
+
+    start = time.perf_counter()
+    vod.LoadSeries(planet_id)
+    vod.LoadAllVOD(max_workers = max_workers)
+    report("LoadAllVOD", timed, time.perf_counter() - start)
+    if vod.errors:
+        print("  [-] {} errors: {}".format(len(vod.errors), vod.errors[0]))
+
+def bench_crawl(tokens, processes, page_size, hosts):
+    crawler = Crawler(tokens, processes = processes, hosts = hosts)
+    fns, vod = FNSModule(None), VODModule(None)
+
+    start = time.perf_counter()
+    counts = crawler.Crawl(list(range(34, 34 + processes)), fns, vod, page_size = page_size)
+    elapsed = time.perf_counter() - start
+    print("[+] Crawl        {} processes in {:6.2f}s: {}".format(processes, elapsed, counts))
+    for pid, w in sorted(crawler.Throughput().items()):
+        print("  [+] worker {:>7}: {:>3} tasks, {:>5} requests, {:8.1f} req/s".format(
+            pid, w["tasks"], w["requests"], w["rate"]))
+    if crawler.errors:
+        print("  [-] {} errors: {}".format(len(crawler.errors), crawler.errors[0]))
+
+def bench(argv):
+    parser = argparse.ArgumentParser(description = "Load benchmark against a local fake Universe server")
+    parser.add_argument("--latency", type = float, default = 0.0, help = "server latency per request in seconds")
+    parser.add_argument("--feeds", type = int, default = 2000, help = "number of feeds per planet")
+    parser.add_argument("--body-size", type = int, default = 200, help = "length of feed bodies")
+    parser.add_argument("--page-size", type = int, default = 20)
+    parser.add_argument("--pages", type = int, default = 100, help = "number of LoadFeed calls")
+    parser.add_argument("--threads", type = int, default = 1, help = "threads calling LoadFeed")
+    parser.add_argument("--vod-series", type = int, default = 5)
+    parser.add_argument("--vods", type = int, default = 20, help = "number of VOD per series")
+    parser.add_argument("--workers", type = int, default = 8, help = "max_workers of LoadAllVOD")
+    parser.add_argument("--token-ttl", type = float, default = 3600, help = "lifetime of access tokens")
+    parser.add_argument("--server-max-in-flight", type = int, default = None,
+                        help = "requests the server handles at once before answering 429")
+    parser.add_argument("--rate", type = float, default = None, help = "client rate limit per endpoint (req/s)")
+    parser.add_argument("--aimd", action = "store_true", help = "adapt the number of requests in flight")
+    parser.add_argument("--error-rate", type = float, default = 0.0, help = "fraction of requests failing with 500")
+    parser.add_argument("--slow-rate", type = float, default = 0.0, help = "fraction of requests 0.5s slower")
+    parser.add_argument("--retries", type = int, default = None, help = "attempts of the retry policy")
+    parser.add_argument("--hedge", type = float, default = None, help = "hedge Get after this latency percentile")
+    parser.add_argument("--accounts", type = int, default = 1, help = "accounts of a UserSessionPool")
+    parser.add_argument("--processes", type = int, default = None, help = "also crawl a planet per process with Crawler")
+    args = parser.parse_args(argv)
+
+    server = FakeUniverse(config.JWE_KEY, latency = args.latency, feeds = args.feeds, body_size = args.body_size,
+                          vod_series = args.vod_series, vods = args.vods, token_ttl = args.token_ttl,
+                          max_in_flight = args.server_max_in_flight, error_rate = args.error_rate,
+                          slow_rate = args.slow_rate)
+    server.Start()
+
+    concurrency = AIMDController(max_limit = max(args.threads, args.workers)) if args.aimd else None
+    options = {
+        "hosts": server.Hosts(), "pool_maxsize": max(args.threads, args.workers),
+        "limiter": RateLimiter(args.rate) if args.rate else None, "concurrency": concurrency,
+        "retry": RetryPolicy(args.retries) if args.retries else None,
+        "hedge": HedgePolicy(args.hedge) if args.hedge else None
+    }
+    tokens = [(make_token(time.time() + args.token_ttl, account_no = 1 + i),
+               make_token(time.time() + 86400, "refresh", account_no = 1 + i)) for i in range(args.accounts)]
+    if args.accounts > 1:
+        sess = UserSessionPool(tokens = tokens, **options)
+    else:
+        sess = UserSession(tokens[0][0], tokens[0][1], **options)
+    try:
+        bench_load_feed(sess, 34, args.pages, args.page_size, args.threads)
+        bench_load_all_vod(sess, 34, args.workers)
+        if args.processes:
+            bench_crawl(tokens, args.processes, args.page_size, server.Hosts())
+        if args.accounts > 1:
+            print("[+] Requests per account: {}".format([s["requests"] for s in sess.Stats()]))
+        else:
+            print("[+] Refresh: {}".format(sess.RefreshStats()))
+        if args.accounts == 1 and (args.retries or args.hedge):
+            print("[+] Retries: {}".format(sess.RetryStats()))
+        if args.server_max_in_flight is not None:
+            print("[+] Throttled by the server: {}".format(server.throttled))
+        if concurrency is not None:
+            print("[+] Concurrency limit: {:.1f}, {} decreases".format(concurrency.limit, concurrency.decreases))
+    finally:
+        sess.Close()
+        server.Stop()
+
+bench(sys.argv[1:])
@@ -0,0 +1,45 @@
+import gc
+import json
+import uuid
+import tracemalloc
+
+from universe import FNSModule
+
+# Synthetic /fns/feeds pages shaped like the API response
+def make_pages(planet_id, count, page_size = 20, artists = 30):
+    pages = []
+    for start in range(0, count, page_size):
+        feeds = []
+        for i in range(start, min(start + page_size, count)):
+            account_no = 1000 + i % artists
+            date = "2021-{:02d}-{:02d}T{:02d}:{:02d}:00+0900".format(1 + i % 12, 1 + i % 28, i % 24, i % 60)
+            feeds.append({
+                "id": str(uuid.uuid4()), "account_no": account_no, "artist_id": i % artists,
+                "nickname": "artist{}".format(account_no),
+                "profile_picture": "https://cdn.universe-official.io/profile/{}.jpg".format(account_no),
+                "body": "feed body number {} ".format(i) * 4,
+                "create_date": date, "modify_date": date, "publish_date": date,
+                "attach_urls": [{
+                    "id": str(uuid.uuid4()), "account_no": account_no, "type": "image",
+                    "file": "https://cdn.universe-official.io/fns/{}/{}.jpg".format(planet_id, uuid.uuid4())
+                } for _ in range(2)],
+                "tags": ["tag{}".format(i % 7)]
+            })
+        pages.append(json.dumps({"feeds": feeds, "next": 0}))
+    return pages
+
+def bench(count = 20000):
+    pages = make_pages(34, count)
+    module = FNSModule(None)
+
+    gc.collect()
+    tracemalloc.start()
+    for page in pages:
+        module.ProcessFeeds(34, json.loads(page))
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("[+] {} feeds with 2 attachments each: {:.0f} bytes per feed".format(count, used / count))
+
+bench()
@@ -0,0 +1,58 @@
+import time
+
+from universe import Http, Metrics, RateLimiter, ResponseCache
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+SERIES = "https://api.universe-official.io/media/vodseries"
+
+def test_phases(server, token):
+    metrics = Metrics()
+    records = []
+    metrics.AddHook(records.append)
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), metrics = metrics)
+    for i in range(5):
+        x.Get(FEEDS, {"planet_id": 34, "next": float(i)})
+
+    phases = metrics.Snapshot()["/fns/feeds"]["phases"]
+    if set(phases) != set(Metrics.PHASES) - {"queue"} or records[0]["phases"].keys() != phases.keys():
+        fail("metrics_phases", -1, "Wrong phases", list(phases))
+    # the server latency is spent connecting, sending and waiting for the response headers
+    if phases["connect_wait"]["count"] != 5 or phases["connect_wait"]["sum"] < 0.5:
+        fail("metrics_phases", -1, "Server latency not in connect_wait", phases["connect_wait"])
+    success("metrics_phases")
+
+def test_queue_and_events(server, token):
+    metrics = Metrics()
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), metrics = metrics, cache = ResponseCache(),
+             limiter = RateLimiter(rate = 2, burst = 1))
+    for _ in range(3):
+        x.Get(SERIES, {"planet_id": 34})
+    x.Get(FEEDS, {"planet_id": 34})
+    x.Get(FEEDS, {"planet_id": 34, "next": 10.0})
+
+    snapshot = metrics.Snapshot()
+    if snapshot["/media/vodseries"]["events"] != {"cache_hit": 2} or snapshot["/media/vodseries"]["requests"] != 1:
+        fail("metrics_events", -1, "Cache hits not counted", snapshot["/media/vodseries"])
+    queue = snapshot["/fns/feeds"]["phases"]["queue"]
+    if queue["count"] != 2 or queue["sum"] < 0.3:
+        fail("metrics_events", -1, "Rate limit not in queue", queue)
+    text = metrics.Prometheus()
+    if 'phase="connect_wait"' not in text or 'universe_events_total{endpoint="/media/vodseries",event="cache_hit"} 2' not in text:
+        fail("metrics_events", -1, "Wrong Prometheus text", text)
+    success("metrics_events")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, latency = 0.1, feeds = 50)
+    server.Start()
+    token = make_token(time.time() + 3600)
+    try:
+        test_phases(server, token)
+        test_queue_and_events(server, token)
+    finally:
+        server.Stop()
+    success("===METRICS_TEST===")
+
+do_test()
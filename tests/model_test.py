@@ -0,0 +1,69 @@
+from universe import FNSModule, VOD
+from universe.FNS import FNSAttachment
+from tests.test_util import *
+
+DATE = "2021-08-01T00:00:00+0900"
+
+def make_feed(id, nickname = "artist", type = "image", file = "https://cdn.universe-official.io/fns/1.jpg",
+              tags = ("tag",)):
+    return {
+        "id": id, "account_no": 1000, "artist_id": 1, "nickname": nickname, "profile_picture": None,
+        "body": "body", "create_date": DATE, "modify_date": DATE, "publish_date": DATE,
+        "attach_urls": [{"id": id + "-0", "account_no": 1000, "type": type, "file": file}],
+        "tags": list(tags)
+    }
+
+def test_null_fields():
+    # null values from the API are kept as they are, not interned
+    fns = FNSModule(None)
+    try:
+        fns.ProcessFeeds(34, {"feeds": [make_feed("a", nickname = None, type = None, file = None, tags = (None,))],
+                              "next": 0.0})
+    except Exception as e:
+        fail("model_null_fields", -1, "Null fields not accepted", e)
+    attachment = fns.attachments[34]["a-0"]
+    if attachment.file is not None or attachment.type is not None or fns.artists[34][1000].nickname is not None:
+        fail("model_null_fields", -1, "Null fields changed", (attachment.file, attachment.type))
+
+    # the artist is completed by a later feed
+    fns.ProcessFeeds(34, {"feeds": [make_feed("b")], "next": 0.0})
+    fns.ProcessFeeds(34, {"feeds": [make_feed("a")], "next": 0.0})
+    if fns.artists[34][1000].nickname != "artist" or fns.attachments[34]["a-0"].file is None:
+        fail("model_null_fields", -1, "Fields not updated", fns.artists[34][1000].nickname)
+    success("model_null_fields")
+
+def test_interned():
+    fns = FNSModule(None)
+    fns.ProcessFeeds(34, {"feeds": [make_feed(str(i)) for i in range(3)], "next": 0.0})
+    a, b = fns.attachments[34]["0-0"], fns.attachments[34]["1-0"]
+    if a.type is not b.type or a.file != "https://cdn.universe-official.io/fns/1.jpg":
+        fail("model_interned", -1, "Attachments not interned", (a.type, a.file))
+    success("model_interned")
+
+def test_file_setter():
+    attachment = FNSAttachment("a")
+    attachment.file = "https://cdn.universe-official.io/fns/2.jpg"
+    if attachment.file != "https://cdn.universe-official.io/fns/2.jpg":
+        fail("model_file_setter", -1, "File not set", attachment.file)
+    attachment.file = None
+    if attachment.file is not None:
+        fail("model_file_setter", -1, "File not cleared", attachment.file)
+    success("model_file_setter")
+
+def test_vod_drm():
+    # a VOD without fairplay
+    vod = VOD(1)
+    vod.SetDRMInfo("https://license.universe-official.io/playready", "https://license.universe-official.io/widevine",
+                   None, None)
+    if vod.DRM_fairplay is not None or vod.DRM_playready != "https://license.universe-official.io/playready":
+        fail("model_vod_drm", -1, "Wrong DRM info", vod.DRM_fairplay)
+    success("model_vod_drm")
+
+def do_test():
+    test_null_fields()
+    test_interned()
+    test_file_setter()
+    test_vod_drm()
+    success("===MODEL_TEST===")
+
+do_test()
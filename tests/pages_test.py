@@ -0,0 +1,81 @@
+import time
+import asyncio
+
+from universe import UserSession, FNSModule, AsyncUserSession, AsyncFNSModule
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+def make_session(server):
+    return UserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                       hosts = server.Hosts())
+
+def test_all_pages(sess):
+    fns = FNSModule(sess)
+    pages = [len(feeds) for feeds, _ in fns.IterFeedPages(34, page_size = 30)]
+    if pages != [30, 30, 30, 10] or len(fns.feeds[34]) != 100:
+        fail("pages_all", -1, "Wrong pages", pages)
+    ids = [f.feed_id for f in FNSModule(sess).IterFeeds(34, limit = 45, page_size = 20)]
+    if len(ids) != 45 or len(set(ids)) != 45:
+        fail("pages_all", -1, "Wrong number of feeds", len(ids))
+    success("pages_all")
+
+def test_early_break(server, sess):
+    # the following page is being fetched when the consumer stops, it is not waited for
+    server.latency = 1.0
+    fns = FNSModule(sess)
+    pages = fns.IterFeedPages(34, page_size = 10)
+    next(pages)
+    time.sleep(0.2)
+    start = time.monotonic()
+    pages.close()
+    elapsed = time.monotonic() - start
+    server.latency = 0.0
+    if elapsed > 0.5:
+        fail("pages_early_break", -1, "Stopping waited for the next page", elapsed)
+    if len(fns.feeds[34]) != 10:
+        fail("pages_early_break", -1, "Unused page processed", len(fns.feeds[34]))
+    success("pages_early_break")
+
+def test_async_pages(server):
+    async def run():
+        async with AsyncUserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                                    hosts = server.Hosts()) as sess:
+            fns = AsyncFNSModule(sess)
+            pages = [len(feeds) async for feeds, _ in fns.IterFeedPages(34, page_size = 30)]
+            if pages != [30, 30, 30, 10] or len(fns.feeds[34]) != 100:
+                fail("pages_async_all", -1, "Wrong pages", pages)
+            ids = [f.feed_id async for f in AsyncFNSModule(sess).IterFeeds(34, limit = 45, page_size = 20)]
+            if len(ids) != 45 or len(set(ids)) != 45:
+                fail("pages_async_all", -1, "Wrong number of feeds", len(ids))
+            success("pages_async_all")
+
+            # closing while the following page is in flight cancels it
+            server.latency = 1.0
+            fns = AsyncFNSModule(sess)
+            pages = fns.IterFeedPages(34, page_size = 10)
+            await pages.__anext__()
+            await asyncio.sleep(0.2)
+            start = time.monotonic()
+            await pages.aclose()
+            elapsed = time.monotonic() - start
+            if elapsed > 0.5 or len(fns.feeds[34]) != 10:
+                fail("pages_async_early_break", -1, "Closing waited for the next page", elapsed)
+            await asyncio.sleep(1)
+            server.latency = 0.0
+            success("pages_async_early_break")
+    asyncio.run(run())
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 100)
+    server.Start()
+    try:
+        with make_session(server) as sess:
+            test_all_pages(sess)
+            test_early_break(server, sess)
+        test_async_pages(server)
+    finally:
+        server.Stop()
+    success("===PAGES_TEST===")
+
+do_test()
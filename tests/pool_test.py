@@ -0,0 +1,93 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from universe import UserSession, UserSessionPool, FNSModule
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+
+def make_session(server, account_no, ttl = 3600):
+    return UserSession(make_token(time.time() + ttl, account_no = account_no),
+                       make_token(time.time() + 86400, "refresh", account_no = account_no), hosts = server.Hosts())
+
+def test_least_outstanding(server):
+    with UserSessionPool(sessions = [make_session(server, i) for i in range(3)]) as pool:
+        def call(i):
+            return pool.Get(FEEDS, {"planet_id": 34, "next": float(i)})[0]
+        with ThreadPoolExecutor(max_workers = 6) as executor:
+            codes = list(executor.map(call, range(60)))
+        requests = [s["requests"] for s in pool.Stats()]
+        if set(codes) != {0} or max(requests) - min(requests) > 6:
+            fail("pool_least_outstanding", -1, "Calls not spread", (set(codes), requests))
+        if any(s["outstanding"] for s in pool.Stats()):
+            fail("pool_least_outstanding", -1, "Calls left in flight", pool.Stats())
+    success("pool_least_outstanding")
+
+def test_round_robin(server):
+    with UserSessionPool(sessions = [make_session(server, i) for i in range(3)], strategy = "round_robin") as pool:
+        for i in range(7):
+            pool.Get(FEEDS, {"planet_id": 34})
+        requests = [s["requests"] for s in pool.Stats()]
+        if requests != [3, 2, 2]:
+            fail("pool_round_robin", -1, "Calls not in turn", requests)
+    success("pool_round_robin")
+
+def test_modules(server):
+    # the pool is accepted wherever a UserSession is
+    with UserSessionPool(sessions = [make_session(server, i) for i in range(2)]) as pool:
+        fns = FNSModule(pool)
+        feeds, _ = fns.LoadFeed(34, size = 10)
+        if len(feeds) != 10:
+            fail("pool_modules", -1, "Feeds not loaded", len(feeds))
+    success("pool_modules")
+
+def test_failover(server):
+    # account 7 cannot refresh: a failed refresh in advance keeps it in rotation while its token is valid,
+    # once the token expired its calls go to the other account and it is quarantined
+    server.fail_refresh.add("7")
+    pool = UserSessionPool(sessions = [make_session(server, 7, ttl = 3), make_session(server, 1)],
+                           strategy = "round_robin")
+    time.sleep(1.6)
+    codes = [pool.Get(FEEDS, {"planet_id": 34})[0] for _ in range(2)]
+    stats = pool.Stats()
+    if codes != [0, 0] or stats[0]["refresh"]["failures"] != 1 or pool.quarantines != 0:
+        fail("pool_failover", -1, "Valid session quarantined", (codes, stats))
+
+    time.sleep(2)
+    codes = [pool.Get(FEEDS, {"planet_id": 34})[0] for _ in range(4)]
+    stats = pool.Stats()
+    if codes != [0] * 4 or not stats[0]["quarantined"] or pool.quarantines != 1:
+        fail("pool_failover", -1, "Expired session not quarantined", (codes, stats))
+    if stats[1]["requests"] != 5:
+        fail("pool_failover", -1, "Calls not sent to the other session", stats)
+    pool.Close()
+    server.fail_refresh.clear()
+    success("pool_failover")
+
+def test_all_failed(server):
+    server.fail_refresh.add("8")
+    pool = UserSessionPool(sessions = [make_session(server, 8, ttl = 2)])
+    time.sleep(2.1)
+    code, _, _ = pool.Get(FEEDS, {"planet_id": 34})
+    if code != 9999 or pool.quarantines != 1:
+        fail("pool_all_failed", code, "Wrong result when every session failed", pool.Stats())
+    pool.Close()
+    server.fail_refresh.clear()
+    success("pool_all_failed")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 100)
+    server.Start()
+    try:
+        test_least_outstanding(server)
+        test_round_robin(server)
+        test_modules(server)
+        test_failover(server)
+        test_all_failed(server)
+    finally:
+        server.Stop()
+    success("===POOL_TEST===")
+
+do_test()
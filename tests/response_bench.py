@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+import requests
+
+from authlib.jose import JsonWebEncryption
+from universe import Http
+from universe import config
+from universe.util import JSON_BACKEND
+from tests.fake_server import FakeUniverse, make_token
+
+# Micro-benchmark of the response path of Http on large /fns/feeds pages:
+# the previous str based path against the bytes based one, CPU time and peak allocation per response
+
+def make_response(body):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers["Content-Type"] = "text/plain"
+    resp._content = body
+    return resp
+
+def text_path(jwe, key, resp):
+    """ previous path: resp.text -> deserialize_compact -> decode -> json.loads """
+    decrypted = jwe.deserialize_compact(resp.text, key)
+    return json.loads(decrypted["payload"].decode())["data"]
+
+def measure(name, func, body, runs):
+    # fresh Response objects, so that resp.text is not cached between runs
+    responses = [make_response(body) for _ in range(runs)]
+    func(make_response(body))
+
+    start = time.process_time()
+    for resp in responses:
+        func(resp)
+    cpu = (time.process_time() - start) / runs
+
+    tracemalloc.start()
+    func(make_response(body))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print("[+] {:<6} {:8.2f}ms CPU, peak {:8.1f}KB per response".format(name, cpu * 1000, peak / 1024))
+    return cpu, peak
+
+def bench(argv):
+    parser = argparse.ArgumentParser(description = "Benchmark of the decryption and parsing of API responses")
+    parser.add_argument("--page-size", type = int, default = 100, help = "feeds per page")
+    parser.add_argument("--body-size", type = int, default = 2000, help = "length of feed bodies")
+    parser.add_argument("--runs", type = int, default = 50)
+    args = parser.parse_args(argv)
+
+    fake = FakeUniverse(config.JWE_KEY, feeds = args.page_size, body_size = args.body_size)
+    data = fake.fns_feeds({"planet_id": 34, "size": args.page_size})
+    for feed in data["fns"]["feeds"]:
+        # random text compresses like real posts, not like repeated synthetic ones
+        feed["body"] = os.urandom(args.body_size // 2).hex()
+    body = fake.jwe.serialize_compact(fake.JWE_HEADER, json.dumps({"data": data}).encode(), fake.key)
+    print("[+] Page of {} feeds: {:.1f}KB encrypted, JSON backend {}".format(args.page_size, len(body) / 1024,
+                                                                             JSON_BACKEND))
+
+    http = Http(make_token(time.time() + 3600), config.JWE_KEY)
+    jwe = JsonWebEncryption()
+    key = bytes(bytearray(config.JWE_KEY))
+    if text_path(jwe, key, make_response(body)) != http._Http__handleResponse(make_response(body))[1]:
+        print("[-] Different results")
+        return
+
+    old_cpu, old_peak = measure("text", lambda resp: text_path(jwe, key, resp), body, args.runs)
+    new_cpu, new_peak = measure("bytes", http._Http__handleResponse, body, args.runs)
+    print("[+] bytes: {:.0f}% less CPU, {:.0f}% less peak allocation".format(
+        (1 - new_cpu / old_cpu) * 100, (1 - new_peak / old_peak) * 100))
+    http.Close()
+
+bench(sys.argv[1:])
@@ -0,0 +1,104 @@
+import time
+import random
+
+from concurrent.futures import ThreadPoolExecutor
+from universe import Http, UserSession, RetryPolicy, HedgePolicy
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+REFRESH = "https://auth.universe-official.io/refresh"
+
+def test_policy():
+    policy = RetryPolicy(attempts = 3, endpoints = {"/media/vodview": 5}, backoff = 0.1, max_backoff = 0.3)
+    if policy.Attempts("GET", "/fns/feeds") != 3 or policy.Attempts("GET", "/media/vodview") != 5 \
+            or policy.Attempts("POST", "/fns/feeds") != 1:
+        fail("retry_policy", -1, "Wrong number of attempts", policy.Attempts("GET", "/fns/feeds"))
+    if not policy.Retryable(1097) or not policy.Retryable(1098, 503) or policy.Retryable(1098, 404) \
+            or policy.Retryable(9999):
+        fail("retry_policy", -1, "Wrong retryable results", "")
+
+    for attempt, bound in ((0, 0.1), (1, 0.2), (2, 0.3), (5, 0.3)):
+        delays = [policy.Delay(attempt) for _ in range(200)]
+        if min(delays) < 0 or max(delays) > bound or max(delays) < bound / 2:
+            fail("retry_policy", -1, "Delay out of bounds", (attempt, min(delays), max(delays)))
+    if policy.Delay(0, retry_after = 2) != 2:
+        fail("retry_policy", -1, "Retry-After not respected", policy.Delay(0, retry_after = 2))
+    success("retry_policy")
+
+def test_retry(server, token):
+    server.error_rate = 0.3
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False,
+             retry = RetryPolicy(attempts = 8, backoff = 0.005))
+    codes = [x.Get(FEEDS, {"planet_id": 34, "next": float(i)})[0] for i in range(30)]
+    if codes != [0] * 30 or x.RetryStats()["retries"] != server.errors or server.errors == 0:
+        fail("retry_transient", -1, "Transient failures not retried", (set(codes), x.RetryStats(), server.errors))
+    success("retry_transient")
+
+    # permanent failures give up after the last attempt, POST are sent once
+    server.error_rate = 1.0
+    server.errors = 0
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False,
+             retry = RetryPolicy(attempts = 3, backoff = 0.005))
+    code, _, resp = x.Get(FEEDS, {"planet_id": 34})
+    if code != 1098 or resp.status_code != 500 or server.errors != 3 or x.RetryStats()["retries"] != 2:
+        fail("retry_give_up", code, "Wrong number of attempts", (server.errors, x.RetryStats()))
+    code, _, _ = x.Post(REFRESH)
+    if code != 1098 or server.errors != 4:
+        fail("retry_give_up", code, "POST retried", server.errors)
+    server.error_rate = 0.0
+    success("retry_give_up")
+
+def test_hedge(server, token):
+    server.slow_rate = 0.3
+    hedge = HedgePolicy(percentile = 50, min_samples = 5, min_delay = 0.05)
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False, hedge = hedge)
+    start = time.monotonic()
+    codes = [x.Get(FEEDS, {"planet_id": 34, "next": float(i)})[0] for i in range(40)]
+    elapsed = time.monotonic() - start
+    stats = x.RetryStats()
+    if codes != [0] * 40 or stats["hedges"] == 0 or stats["hedges_won"] == 0:
+        fail("retry_hedge", -1, "Slow Get not hedged", (set(codes), stats))
+    # about 12 slow requests of 0.5 seconds without hedging
+    if elapsed > 4:
+        fail("retry_hedge", -1, "Hedging did not cut latency", elapsed)
+    success("retry_hedge")
+
+    # only given endpoints are hedged
+    x = Http(token, config.JWE_KEY, hosts = server.Hosts(), coalesce = False,
+             hedge = HedgePolicy(min_samples = 1, endpoints = ["/media/vodview"]))
+    for i in range(10):
+        x.Get(FEEDS, {"planet_id": 34, "next": float(i)})
+    server.slow_rate = 0.0
+    if x.RetryStats()["hedges"] != 0:
+        fail("retry_hedge_endpoints", -1, "Other endpoint hedged", x.RetryStats())
+    success("retry_hedge_endpoints")
+
+def test_session(server):
+    server.error_rate = 0.3
+    with UserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                     hosts = server.Hosts(), retry = RetryPolicy(attempts = 8, backoff = 0.005)) as sess:
+        with ThreadPoolExecutor(max_workers = 4) as executor:
+            codes = list(executor.map(lambda i: sess.Get(FEEDS, {"planet_id": 34, "next": float(i)})[0], range(20)))
+        if codes != [0] * 20 or sess.RetryStats()["retries"] == 0:
+            fail("retry_session", -1, "Session requests not retried", (set(codes), sess.RetryStats()))
+    server.error_rate = 0.0
+    success("retry_session")
+
+def do_test():
+    random.seed(22)
+    test_policy()
+
+    server = FakeUniverse(config.JWE_KEY, latency = 0.01, feeds = 100, slow_latency = 0.5)
+    server.Start()
+    token = make_token(time.time() + 3600)
+    try:
+        test_retry(server, token)
+        test_hedge(server, token)
+        test_session(server)
+    finally:
+        server.Stop()
+    success("===RETRY_TEST===")
+
+do_test()
@@ -0,0 +1,61 @@
+import time
+
+from universe import UserSession
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+FEEDS = "https://api.universe-official.io/fns/feeds"
+
+def make_session(server, ttl, **kwargs):
+    return UserSession(make_token(time.time() + ttl), make_token(time.time() + 86400, "refresh"),
+                       hosts = server.Hosts(), **kwargs)
+
+def test_short_token(server):
+    # a token living less than the refresh margin is not refreshed before every request
+    with make_session(server, 30) as sess:
+        for _ in range(20):
+            code, _, _ = sess.Get(FEEDS, {"planet_id": 34})
+            if code != 0:
+                fail("session_short_token", code, "Request failed", "")
+        if sess.refresh_count != 0:
+            fail("session_short_token", -1, "Fresh token refreshed", sess.RefreshStats())
+    success("session_short_token")
+
+def test_proactive_refresh(server):
+    # refreshed within the second half of its lifetime, once per half lifetime at most
+    server.token_ttl = 2
+    with make_session(server, 2) as sess:
+        start = time.time()
+        while time.time() - start < 3.2:
+            code, _, _ = sess.Get(FEEDS, {"planet_id": 34})
+            if code != 0:
+                fail("session_proactive_refresh", code, "Request failed", sess.RefreshStats())
+            time.sleep(0.02)
+        if not 2 <= sess.refresh_count <= 6:
+            fail("session_proactive_refresh", -1, "Wrong number of refreshes", sess.RefreshStats())
+    server.token_ttl = 3600
+    success("session_proactive_refresh")
+
+def test_expired_token(server):
+    # an expired access token is refreshed before the first request
+    sess = UserSession(make_token(time.time() - 10), make_token(time.time() + 86400, "refresh"),
+                       hosts = server.Hosts())
+    code, _, _ = sess.Get(FEEDS, {"planet_id": 34})
+    if code != 0 or sess.refresh_count != 1:
+        fail("session_expired_token", code, "Expired token not refreshed", sess.RefreshStats())
+    sess.Close()
+    success("session_expired_token")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 50)
+    server.Start()
+    try:
+        test_short_token(server)
+        test_proactive_refresh(server)
+        test_expired_token(server)
+    finally:
+        server.Stop()
+    success("===SESSION_TEST===")
+
+do_test()
@@ -0,0 +1,123 @@
+import os
+import time
+import sqlite3
+import tempfile
+
+from universe import UserSession, FNSModule, VODModule, Store
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+def make_session(server):
+    return UserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                       hosts = server.Hosts())
+
+def test_save(sess, path):
+    with Store(path) as store:
+        fns = FNSModule(sess, store)
+        for _ in fns.IterFeedPages(34, page_size = 10, limit = 30):
+            pass
+        vod = VODModule(sess, store)
+        vod.LoadSeries(34)
+        vod.LoadVODFromPlanet(34, fetchVOD = False)
+
+        feeds = store.LoadFeeds(34)
+        if len(feeds) != 30 or len(store.LoadVODSeries(34)) != 2 or len(store.LoadVODs(34)) != 6:
+            fail("store_save", -1, "Wrong number of saved objects", len(feeds))
+        # saving the same page again replaces it
+        fns.ProcessFeeds(34, {"feeds": [f for _, f in feeds[:10]], "next": 0.0})
+        if len(store.LoadFeeds(34)) != 30:
+            fail("store_save", -1, "Feeds saved twice", len(store.LoadFeeds(34)))
+        found = store.FindFeeds(34, tag = "tag0")
+        if not found or set(found) - {f["id"] for _, f in feeds if "tag0" in f["tags"]}:
+            fail("store_save", -1, "Wrong feeds by tag", found)
+    success("store_save")
+
+def test_warm_start(path):
+    # no session: everything comes from the store
+    with Store(path) as store:
+        fns = FNSModule(None, store)
+        vod = VODModule(None, store)
+        if len(fns.feeds[34]) != 30 or len(vod.vod_series[34]) != 2 or len(vod.vod[34]) != 6:
+            fail("store_warm_start", -1, "Wrong number of loaded objects", len(fns.feeds[34]))
+        latest = fns.LatestFeeds(34, 1)[0]
+        if latest.feed_id != store.FindFeeds(34, limit = 1)[0]:
+            fail("store_warm_start", -1, "Wrong latest feed", latest.feed_id)
+    success("store_warm_start")
+
+def test_tag_change(path):
+    with Store(path) as store:
+        f = dict(store.LoadFeeds(34)[0][1])
+        old = f["tags"][0]
+        f["tags"] = ["renamed"]
+        store.SaveFeeds(34, [f])
+        if f["id"] in store.FindFeeds(34, tag = old):
+            fail("store_tag_change", -1, "Removed tag still found", old)
+        if store.FindFeeds(34, tag = "renamed") != [f["id"]]:
+            fail("store_tag_change", -1, "New tag not found", store.FindFeeds(34, tag = "renamed"))
+
+        f["tags"] = []
+        store.SaveFeeds(34, [f])
+        if store.FindFeeds(34, tag = "renamed"):
+            fail("store_tag_change", -1, "Cleared tag still found", "renamed")
+    success("store_tag_change")
+
+def test_wal_reopen(path):
+    store = Store(path)
+    mode = sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0]
+    if mode != "wal":
+        fail("store_wal_reopen", -1, "Not in WAL mode", mode)
+    f = dict(store.LoadFeeds(34)[0][1])
+    f["tags"] = ["reopened"]
+    store.SaveFeeds(34, [f])
+    # visible to another connection before the store is closed
+    count = sqlite3.connect(path).execute("SELECT COUNT(*) FROM feed_tags WHERE tag = 'reopened'").fetchone()[0]
+    if count != 1:
+        fail("store_wal_reopen", -1, "Write not visible", count)
+    store.Close()
+
+    with Store(path) as store:
+        if store.FindFeeds(34, tag = "reopened") != [f["id"]] or len(store.LoadFeeds(34)) != 30:
+            fail("store_wal_reopen", -1, "Data lost on reopen", store.FindFeeds(34, tag = "reopened"))
+    success("store_wal_reopen")
+
+def make_feed(i, tags):
+    return {"id": "feed-{}".format(i), "account_no": 1000 + i % 10, "publish_date": "2021-08-01T00:00:00+0900",
+            "tags": tags}
+
+def test_resave_many(path):
+    # re-saving feeds with changed tags looks tags up by feed, not through every tag of the planet
+    with Store(path) as store:
+        for start in range(0, 4000, 100):
+            store.SaveFeeds(34, [make_feed(i, ["old", "tag{}".format(i % 50)]) for i in range(start, start + 100)])
+        begin = time.monotonic()
+        for start in range(0, 4000, 100):
+            store.SaveFeeds(34, [make_feed(i, ["new"]) for i in range(start, start + 100)])
+        elapsed = time.monotonic() - begin
+        if store.FindFeeds(34, tag = "old") or store.FindFeeds(34, tag = "tag7") or \
+                len(store.FindFeeds(34, tag = "new")) != 4000:
+            fail("store_resave_many", -1, "Stale tags left", len(store.FindFeeds(34, tag = "old")))
+
+    plan = sqlite3.connect(path).execute("EXPLAIN QUERY PLAN DELETE FROM feed_tags WHERE planet_id = ? AND feed_id = ?",
+                                         (34, "feed-0")).fetchall()
+    if not "feed_tags_by_feed" in plan[0][-1] or elapsed > 2:
+        fail("store_resave_many", -1, "Tags of a feed not found by index", (plan, elapsed))
+    success("store_resave_many")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, feeds = 100, vod_series = 2, vods = 3)
+    server.Start()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "universe.db")
+    try:
+        with make_session(server) as sess:
+            test_save(sess, path)
+        test_warm_start(path)
+        test_tag_change(path)
+        test_wal_reopen(path)
+        test_resave_many(os.path.join(directory, "many.db"))
+    finally:
+        server.Stop()
+    success("===STORE_TEST===")
+
+do_test()
@@ -0,0 +1,94 @@
+import time
+import asyncio
+
+from universe import UserSession, FNSModule, AsyncUserSession, AsyncFNSModule
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+def make_tokens():
+    return make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh")
+
+async def scenario(name, server, fns, sync):
+    """ Run the same syncs with the coroutine sync, of a FNSModule or an AsyncFNSModule """
+    server.feeds = 50
+    server.edits = {}
+
+    # the first sync scans every page
+    server.requests.clear()
+    changed = await sync(34, page_size = 10)
+    if len(changed) != 50 or server.requests["/fns/feeds"] != 5 or len(fns.feeds[34]) != 50:
+        fail(name + "_first", -1, "Not every page scanned", (len(changed), server.requests))
+    if changed[0].feed_id != server.feed(34, 49)["id"]:
+        fail(name + "_first", -1, "Changes not newest first", changed[0].feed_id)
+    success(name + "_first")
+
+    # nothing changed, the first page reaches the mark
+    server.requests.clear()
+    changed = await sync(34, page_size = 10)
+    if changed or server.requests["/fns/feeds"] != 1:
+        fail(name + "_unchanged", -1, "Sync did not stop at the mark", (len(changed), server.requests))
+    success(name + "_unchanged")
+
+    # new feeds are published
+    server.feeds = 53
+    server.requests.clear()
+    changed = await sync(34, page_size = 10)
+    expected = [server.feed(34, i)["id"] for i in (52, 51, 50)]
+    if [f.feed_id for f in changed] != expected or server.requests["/fns/feeds"] != 1:
+        fail(name + "_new", -1, "New feeds not synced", ([f.feed_id for f in changed], server.requests))
+    success(name + "_new")
+
+    # a feed is edited: body and tags are reindexed
+    fns.SearchFeeds(34, "post")
+    edited = server.feed(34, 51)
+    old_tag = edited["tags"][0]
+    server.edits[51] = {"body": "edited 공지 body", "tags": ["edited"], "modify_date": "2022-01-01T00:00:00+0900"}
+    changed = await sync(34, page_size = 10)
+    feed = fns.feeds[34][edited["id"]]
+    if [f.feed_id for f in changed] != [edited["id"]] or feed.body != "edited 공지 body" or feed.tags != ["edited"]:
+        fail(name + "_edited", -1, "Edited feed not updated", ([f.feed_id for f in changed], feed.body, feed.tags))
+    if [f.feed_id for f in fns.QueryTags(34, all_of = ["edited"])] != [edited["id"]] or \
+            edited["id"] in [f.feed_id for f in fns.QueryTags(34, all_of = [old_tag])]:
+        fail(name + "_edited", -1, "Tags not reindexed", old_tag)
+    if [f.feed_id for f in fns.SearchFeeds(34, "공지")] != [edited["id"]] or \
+            edited["id"] in [f.feed_id for f in fns.SearchFeeds(34, "post 51")]:
+        fail(name + "_edited", -1, "Body not reindexed", feed.body)
+    if await sync(34, page_size = 10):
+        fail(name + "_edited", -1, "Edited feed synced twice", "")
+    success(name + "_edited")
+
+    # queries have their own marks, a new one scans up to max_pages
+    server.requests.clear()
+    changed = await sync(34, page_size = 10, tags = "tag1", max_pages = 2)
+    if changed or server.requests["/fns/feeds"] != 2:
+        fail(name + "_marks", -1, "Mark of another query used", server.requests)
+    success(name + "_marks")
+
+def test_sync(server):
+    access, refresh = make_tokens()
+    with UserSession(access, refresh, hosts = server.Hosts()) as sess:
+        fns = FNSModule(sess)
+        async def sync(*args, **kwargs):
+            return fns.SyncFeeds(*args, **kwargs)
+        asyncio.run(scenario("sync", server, fns, sync))
+
+def test_async_sync(server):
+    async def run():
+        access, refresh = make_tokens()
+        async with AsyncUserSession(access, refresh, hosts = server.Hosts()) as sess:
+            fns = AsyncFNSModule(sess)
+            await scenario("async_sync", server, fns, fns.SyncFeeds)
+    asyncio.run(run())
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY)
+    server.Start()
+    try:
+        test_sync(server)
+        test_async_sync(server)
+    finally:
+        server.Stop()
+    success("===SYNC_TEST===")
+
+do_test()
@@ -0,0 +1,115 @@
+from datetime import date
+from universe import FNSModule, FeedTable
+from universe import Table
+from tests.test_util import *
+
+def make_feed(id, account_no, publish, types, tags, artist_id = 1):
+    return {
+        "id": id, "account_no": account_no, "artist_id": artist_id, "nickname": "artist{}".format(account_no),
+        "profile_picture": None, "body": "body", "create_date": publish, "modify_date": publish, "publish_date": publish,
+        "attach_urls": [{"id": "{}-{}".format(id, i), "account_no": account_no, "type": type,
+                         "file": "https://cdn.universe-official.io/fns/{}.jpg".format(id)} for i, type in enumerate(types)],
+        "tags": tags
+    }
+
+def make_module():
+    fns = FNSModule(None)
+    fns.ProcessFeeds(34, {"feeds": [
+        make_feed("a", 1000, "2021-08-01T23:30:00+0900", ["image", "image"], ["teaser", "bts"]),
+        make_feed("b", 1000, "2021-08-02T08:00:00+0900", ["video"], []),
+        make_feed("c", 1001, "2021-08-01T10:00:00+0900", [], ["bts"], artist_id = None),
+        make_feed("d", 1001, "", ["image"], ["live"])
+    ], "next": 0.0})
+    fns.ProcessFeeds(35, {"feeds": [make_feed("e", 2000, "2021-08-01T12:00:00+0900", ["video"], ["teaser"])],
+                          "next": 0.0})
+    return fns
+
+def test_from_module(fns):
+    table = FeedTable.FromModule(fns)
+    if len(table) != 5 or sorted(table.feed_id) != ["a", "b", "c", "d", "e"]:
+        fail("table_from_module", -1, "Wrong feeds", table.feed_id)
+    if len(FeedTable.FromModule(fns, 35)) != 1 or len(FeedTable.FromModule(fns, 36)) != 0:
+        fail("table_from_module", -1, "Wrong planet filter", "")
+
+    # columns of the same length, artist id and date missing as -1
+    lengths = {len(c) for c in (table.feed_id, table.planet_id, table.account_no, table.create_ts, table.modify_ts,
+                                table.publish_ts, table.attachment_count)}
+    row = table.feed_id.index("c")
+    artist = list(table.artist_account_no).index(1001)
+    if lengths != {5} or table.artist_id[artist] != -1 or table.publish_ts[table.feed_id.index("d")] != -1:
+        fail("table_from_module", -1, "Missing values not stored as -1", (lengths, list(table.artist_id)))
+
+    tags = [table.tag_names[c] for c in table.tag_codes[table.tag_offsets[row]:table.tag_offsets[row + 1]]]
+    if tags != ["bts"] or len(table.attachment_id) != 5 or len(table.artist_account_no) != 3:
+        fail("table_from_module", -1, "Wrong tags, attachments or artists", tags)
+    success("table_from_module")
+
+def test_append(fns):
+    table = FeedTable()
+    feeds = list(fns.feeds[34].values())
+    if table.Append(34, feeds[:2]) != 2 or table.Append(34, feeds) != 2 or table.Append(34, feeds) != 0:
+        fail("table_append", -1, "Feeds appended twice", table.feed_id)
+    # the same feed id of another planet is another row
+    if table.Append(35, feeds[:1]) != 1 or len(table) != 5 or len(table.tag_offsets) != 6:
+        fail("table_append", -1, "Wrong rows", table.feed_id)
+    success("table_append")
+
+def test_export(fns):
+    table = FeedTable.FromModule(fns)
+    arrays = table.ToNumpy()
+    if arrays["feeds"]["publish_ts"].tolist() != list(table.publish_ts) or \
+            arrays["attachments"]["feed"].tolist() != list(table.attachment_feed) or \
+            arrays["artists"]["artist_id"].tolist() != list(table.artist_id):
+        fail("table_export", -1, "Wrong NumPy columns", arrays["feeds"])
+
+    tables = table.ToArrow()
+    feeds = tables["feeds"].to_pydict()
+    row = feeds["feed_id"].index("a")
+    if feeds["tags"][row] != ["teaser", "bts"] or feeds["publish_date"][feeds["feed_id"].index("d")] is not None:
+        fail("table_export", -1, "Wrong Arrow feeds", feeds["tags"])
+    attachments = tables["attachments"].to_pydict()
+    if attachments["feed_id"][attachments["attachment_id"].index("b-0")] != "b" or \
+            attachments["type"].count("image") != 3:
+        fail("table_export", -1, "Wrong Arrow attachments", attachments)
+    success("table_export")
+
+def check_analytics(name, fns):
+    table = FeedTable.FromModule(fns)
+    # a at 23:30 and b at 08:00 in +0900, c at 10:00
+    posts = table.PostsPerArtistPerDay(34, utc_offset = 9 * 3600)
+    if posts != {(1000, date(2021, 8, 1)): 1, (1000, date(2021, 8, 2)): 1, (1001, date(2021, 8, 1)): 1}:
+        fail(name, -1, "Wrong posts per day in +0900", posts)
+    posts = table.PostsPerArtistPerDay(34)
+    if posts != {(1000, date(2021, 8, 1)): 2, (1001, date(2021, 8, 1)): 1}:
+        fail(name, -1, "Wrong posts per day in UTC", posts)
+    if table.PostsPerArtistPerDay(36) != {} or len(table.PostsPerArtistPerDay()) != 3:
+        fail(name, -1, "Wrong planet filter", table.PostsPerArtistPerDay())
+
+    if table.AttachmentTypeMix() != {"image": 3, "video": 2} or table.AttachmentTypeMix(35) != {"video": 1}:
+        fail(name, -1, "Wrong attachment types", table.AttachmentTypeMix())
+    success(name)
+
+def test_without_numpy(fns):
+    numpy = Table.numpy
+    Table.numpy = None
+    try:
+        check_analytics("table_analytics_stdlib", fns)
+        try:
+            FeedTable().ToNumpy()
+            fail("table_analytics_stdlib", -1, "ToNumpy without numpy", "")
+        except Exception:
+            pass
+    finally:
+        Table.numpy = numpy
+
+def do_test():
+    fns = make_module()
+    test_from_module(fns)
+    test_append(fns)
+    if Table.numpy is not None and Table.pyarrow is not None:
+        test_export(fns)
+        check_analytics("table_analytics_numpy", fns)
+    test_without_numpy(fns)
+    success("===TABLE_TEST===")
+
+do_test()
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from universe import FNSModule
+from universe.util import convert_epoch
+from tests.test_util import *
+
+START = datetime(2021, 8, 1, tzinfo = timezone(timedelta(hours = 9)))
+
+# (tags, account_no) of feeds 0 to 7, a minute apart, 7 is the newest
+FEEDS = [
+    (["teaser", "bts"], 1000),
+    (["teaser", "ive"], 1001),
+    (["live", "bts"], 1000),
+    (["live"], 1001),
+    (["teaser", "bts", "live"], 1000),
+    ([], 1001),
+    (["ive"], 1001),
+    (["bts"], 1000)
+]
+
+def make_feed(i, tags, account_no):
+    date = (START + timedelta(minutes = i)).strftime("%Y-%m-%dT%H:%M:%S%z")
+    return {
+        "id": str(i), "account_no": account_no, "artist_id": account_no - 1000, "nickname": "artist",
+        "profile_picture": None, "body": "post {}".format(i),
+        "create_date": date, "modify_date": date, "publish_date": date,
+        "attach_urls": [], "tags": tags
+    }
+
+def make_module():
+    fns = FNSModule(None)
+    fns.ProcessFeeds(34, {"feeds": [make_feed(i, *f) for i, f in enumerate(FEEDS)], "next": 0.0})
+    return fns
+
+def check(name, feeds, expected):
+    ids = [feed.feed_id for feed in feeds]
+    if ids != expected:
+        fail(name, -1, "Wrong feeds", (ids, expected))
+
+def test_all_of(fns):
+    check("tags_all_of", fns.QueryTags(34, all_of = ["bts"]), ["7", "4", "2", "0"])
+    check("tags_all_of two", fns.QueryTags(34, all_of = ["teaser", "bts"]), ["4", "0"])
+    check("tags_all_of unknown", fns.QueryTags(34, all_of = ["bts", "unknown"]), [])
+    success("tags_all_of")
+
+def test_any_of(fns):
+    check("tags_any_of", fns.QueryTags(34, any_of = ["ive", "live"]), ["6", "4", "3", "2", "1"])
+    check("tags_any_of with all_of", fns.QueryTags(34, all_of = ["teaser"], any_of = ["ive", "live"]), ["4", "1"])
+    check("tags_any_of unknown", fns.QueryTags(34, any_of = ["unknown"]), [])
+    success("tags_any_of")
+
+def test_none_of(fns):
+    check("tags_none_of", fns.QueryTags(34, none_of = ["bts", "live"]), ["6", "5", "1"])
+    check("tags_none_of with all_of", fns.QueryTags(34, all_of = ["bts"], none_of = ["teaser"]), ["7", "2"])
+    check("tags_none_of everything", fns.QueryTags(34), [str(i) for i in range(7, -1, -1)])
+    success("tags_none_of")
+
+def test_filters(fns):
+    since = convert_epoch((START + timedelta(minutes = 2)).strftime("%Y-%m-%dT%H:%M:%S%z"))
+    until = since + 3 * 60
+    check("tags_filters account", fns.QueryTags(34, all_of = ["teaser"], account_no = 1000), ["4", "0"])
+    check("tags_filters range", fns.QueryTags(34, any_of = ["bts", "ive"], since = since, until = until), ["4", "2"])
+    check("tags_filters limit", fns.QueryTags(34, all_of = ["bts"], limit = 2), ["7", "4"])
+    check("tags_filters unknown planet", fns.QueryTags(35, all_of = ["bts"]), [])
+    success("tags_filters")
+
+def do_test():
+    fns = make_module()
+    test_all_of(fns)
+    test_any_of(fns)
+    test_none_of(fns)
+    test_filters(fns)
+    success("===TAGS_TEST===")
+
+do_test()
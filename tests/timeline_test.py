@@ -0,0 +1,137 @@
+import time
+
+from datetime import datetime, timedelta, timezone
+from universe import FNSModule
+from universe.Index import Timeline
+from universe.util import convert_epoch
+from tests.test_util import *
+
+START = datetime(2021, 8, 1, tzinfo = timezone(timedelta(hours = 9)))
+EPOCH = convert_epoch(START.strftime("%Y-%m-%dT%H:%M:%S%z"))
+
+def make_feed(i):
+    # feed i is published i minutes after START, by one of two artists, with an image or a video
+    date = (START + timedelta(minutes = i)).strftime("%Y-%m-%dT%H:%M:%S%z")
+    return {
+        "id": str(i), "account_no": 1000 + i % 2, "artist_id": i % 2, "nickname": "artist",
+        "profile_picture": None, "body": "post {}".format(i),
+        "create_date": date, "modify_date": date, "publish_date": date,
+        "attach_urls": [{"id": "{}-0".format(i), "account_no": 1000 + i % 2, "type": "video" if i % 3 == 0 else "image",
+                         "file": "https://cdn.universe-official.io/fns/{}.jpg".format(i)}],
+        "tags": []
+    }
+
+def check(name, got, expected):
+    if got != expected:
+        fail(name, -1, "Wrong ids", (got, expected))
+
+def test_timeline():
+    timeline = Timeline()
+    for epoch, id in ((30, "c"), (10, "a"), (20, "b"), (20, "b2"), (None, "x"), (40, "d"), (10, "a")):
+        timeline.Add(epoch, id)
+    check("timeline_order", list(timeline), ["d", "c", "b", "b2", "a", "x"])
+    check("timeline_range", timeline.Range(10, 30), ["c", "b", "b2", "a"])
+    check("timeline_range inclusive", timeline.Range(20, 20), ["b", "b2"])
+    check("timeline_range open", timeline.Range(since = 25), ["d", "c"])
+    check("timeline_range limit", timeline.Range(until = 30, limit = 2), ["c", "b"])
+    check("timeline_range empty", timeline.Range(21, 29), [])
+    check("timeline_latest", timeline.Latest(2), ["d", "c"])
+
+    timeline.Remove(20, "b")
+    timeline.Remove(20, "missing")
+    check("timeline_remove", list(timeline), ["d", "c", "b2", "a", "x"])
+    success("timeline_unit")
+
+def test_bulk():
+    # entries in any order are sorted once
+    timeline = Timeline([(10, "a"), (30, "c"), (None, "x"), (20, "b")])
+    check("timeline_bulk", list(timeline), ["c", "b", "a", "x"])
+    timeline.Add(25, "b2")
+    check("timeline_bulk add", timeline.Range(20, 30), ["c", "b2", "b"])
+
+    start = time.monotonic()
+    timeline = Timeline((i, str(i)) for i in range(200000))
+    elapsed = time.monotonic() - start
+    if len(timeline) != 200000 or timeline.Latest(1) != ["199999"] or elapsed > 1:
+        fail("timeline_bulk", -1, "Slow bulk build", elapsed)
+    success("timeline_bulk")
+
+def test_page():
+    timeline = Timeline()
+    for i in range(5):
+        timeline.Add(i, str(i))
+    ids, cursor = timeline.Page(size = 2)
+    check("timeline_page first", ids, ["4", "3"])
+    # entries added between pages are skipped if newer than the cursor
+    timeline.Add(10, "new")
+    timeline.Add(-1, "old")
+    pages = []
+    while cursor is not None:
+        ids, cursor = timeline.Page(cursor, 2)
+        pages.append(ids)
+    check("timeline_page rest", pages, [["2", "1"], ["0", "old"]])
+    success("timeline_page")
+
+def test_module():
+    fns = FNSModule(None)
+    # pages arrive newest first
+    for page in (range(19, 9, -1), range(9, -1, -1)):
+        fns.ProcessFeeds(34, {"feeds": [make_feed(i) for i in page], "next": 0.0})
+
+    ids = lambda feeds: [f.feed_id for f in feeds]
+    check("timeline_between", ids(fns.FeedsBetween(34, EPOCH + 5 * 60, EPOCH + 8 * 60)), ["8", "7", "6", "5"])
+    check("timeline_between artist", ids(fns.FeedsBetween(34, EPOCH + 5 * 60, EPOCH + 8 * 60, account_no = 1001)),
+          ["7", "5"])
+    check("timeline_between limit", ids(fns.FeedsBetween(34, since = EPOCH + 15 * 60, limit = 2)), ["19", "18"])
+    check("timeline_latest", ids(fns.LatestFeeds(34, 3)), ["19", "18", "17"])
+    check("timeline_latest artist", ids(fns.LatestFeeds(34, 2, account_no = 1000)), ["18", "16"])
+    check("timeline_latest unknown", ids(fns.LatestFeeds(35, 3)), [])
+
+    seen = []
+    feeds, cursor = fns.PageFeeds(34, size = 7)
+    seen += ids(feeds)
+    while cursor is not None:
+        feeds, cursor = fns.PageFeeds(34, cursor, 7)
+        seen += ids(feeds)
+    check("timeline_pages", seen, [str(i) for i in range(19, -1, -1)])
+
+    attachments = [a.attachment_id for a in fns.LatestAttachments(34, 3)]
+    check("timeline_attachments", attachments, ["19-0", "18-0", "17-0"])
+    videos = [a.attachment_id for a in fns.LatestAttachments(34, 3, type = "video")]
+    check("timeline_attachments type", videos, ["18-0", "15-0", "12-0"])
+    check("timeline_attachments unknown", fns.LatestAttachments(34, 3, type = "audio"), [])
+    success("timeline_module")
+
+def test_lazy():
+    fns = FNSModule(None)
+    fns.ProcessFeeds(34, {"feeds": [make_feed(i) for i in range(10, 20)], "next": 0.0})
+    if fns.timelines or fns.attachment_timelines or fns.artists[34][1000].timeline is not None:
+        fail("timeline_lazy", -1, "Timelines built before a query", list(fns.timelines))
+
+    ids = lambda feeds: [f.feed_id for f in feeds]
+    check("timeline_lazy first", ids(fns.LatestFeeds(34, 2)), ["19", "18"])
+    check("timeline_lazy artist", ids(fns.LatestFeeds(34, 2, account_no = 1001)), ["19", "17"])
+    check("timeline_lazy attachments", [a.attachment_id for a in fns.LatestAttachments(34, 1, type = "video")], ["18-0"])
+
+    # built timelines follow newer and older feeds, and attachments changing type
+    fns.ProcessFeeds(34, {"feeds": [make_feed(i) for i in (25, 5)], "next": 0.0})
+    changed = make_feed(19)
+    changed["attach_urls"][0]["type"] = "video"
+    fns.ProcessFeeds(34, {"feeds": [changed], "next": 0.0})
+    check("timeline_lazy newer", ids(fns.LatestFeeds(34, 2)), ["25", "19"])
+    check("timeline_lazy older", ids(fns.FeedsBetween(34, until = EPOCH + 9 * 60)), ["5"])
+    check("timeline_lazy artist newer", ids(fns.LatestFeeds(34, 1, account_no = 1001)), ["25"])
+    check("timeline_lazy type", [a.attachment_id for a in fns.LatestAttachments(34, 2, type = "video")],
+          ["19-0", "18-0"])
+    check("timeline_lazy old type", [a.attachment_id for a in fns.LatestAttachments(34, 1, type = "image")], ["25-0"])
+    success("timeline_lazy")
+
+def do_test():
+    test_timeline()
+    test_bulk()
+    test_page()
+    test_module()
+    test_lazy()
+    success("===TIMELINE_TEST===")
+
+do_test()
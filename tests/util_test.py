@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from universe.util import convert_epoch, _iso_epoch, _day_epoch, _offset_seconds
+from tests.test_util import *
+
+# (time string, epoch seconds)
+CASES = [
+    ("2021-08-01T10:00:00+0900", 1627779600),
+    ("2021-08-01T10:00:00+09:00", 1627779600),
+    ("2021-08-01T10:00:00-0530", 1627831800),
+    ("2021-08-01T10:00:00-05:30", 1627831800),
+    ("2021-08-01T01:00:00Z", 1627779600),
+    ("2021-08-01T10:00:00.123+0900", 1627779600),
+    ("2021-08-01T10:00:59.999999+09:00", 1627779659),
+    ("2021-08-01T01:00:00.5Z", 1627779600),
+    ("2021-01-01T03:00:00+0900", 1609437600),   # previous day in UTC
+    ("2020-02-29T23:30:00-0100", 1583022600),   # next day in UTC, leap day
+]
+
+def test_fast_path():
+    # every case goes through the cached day and offset, and agrees with fromisoformat
+    _day_epoch.cache_clear()
+    _offset_seconds.cache_clear()
+    for timestr, epoch in CASES:
+        fast, slow = convert_epoch(timestr), _iso_epoch(timestr)
+        if fast != epoch or slow != epoch:
+            fail("util_convert_epoch_fast", -1, "Wrong epoch", (timestr, fast, slow, epoch))
+    days, offsets = _day_epoch.cache_info(), _offset_seconds.cache_info()
+    if days.hits + days.misses != len(CASES) or offsets.hits + offsets.misses != len(CASES) or days.hits == 0:
+        fail("util_convert_epoch_fast", -1, "Fast path not taken", (days, offsets))
+    success("util_convert_epoch_fast")
+
+def test_fallback():
+    # strings the fast path does not parse are left to fromisoformat
+    _day_epoch.cache_clear()
+    for timestr, epoch in [("2021-08-01 10:00:00+0900", 1627779600), ("2021-08-01T10:00+09:00", 1627779600),
+                           ("2021-08-01 01:00:00Z", 1627779600)]:
+        if convert_epoch(timestr) != epoch:
+            fail("util_convert_epoch_fallback", -1, "Wrong epoch", (timestr, convert_epoch(timestr), epoch))
+    if _day_epoch.cache_info().misses != 0:
+        fail("util_convert_epoch_fallback", -1, "Fast path taken", _day_epoch.cache_info())
+
+    # the formats the API sends, over a few years of offsets
+    for day in range(0, 1500, 7):
+        for offset in ("+0900", "-0530", "+0000", "+1345", "-1200"):
+            timestr = datetime.fromtimestamp(1577836800 + day * 86400 + day * 3727 % 86400, timezone.utc) \
+                              .strftime("%Y-%m-%dT%H:%M:%S") + offset
+            for variant in (timestr, timestr[:-2] + ":" + timestr[-2:]):
+                if convert_epoch(variant) != _iso_epoch(variant):
+                    fail("util_convert_epoch_fallback", -1, "Paths disagree", variant)
+    success("util_convert_epoch_fallback")
+
+def do_test():
+    test_fast_path()
+    test_fallback()
+    success("===UTIL_TEST===")
+
+do_test()
@@ -0,0 +1,109 @@
+import time
+import random
+
+from universe import UserSession, VODModule
+from universe import config
+from tests.fake_server import FakeUniverse, make_token
+from tests.test_util import *
+
+class ScriptedSession():
+    """ Session delaying the VOD bridge of slow series and failing the VOD view of failing VOD """
+
+    def __init__(self, sess, slow = (), failing = ()):
+        self.sess = sess
+        self.slow = set(slow)
+        self.failing = set(failing)
+        self.finished = []
+
+    def Get(self, target, query = {}):
+        if target.endswith("/media/vodbridge") and query["vod_series_no"] in self.slow:
+            time.sleep(0.2)
+        if target.endswith("/media/vodview") and query["media_no"] in self.failing:
+            return 1098, "Failed", None
+        result = self.sess.Get(target, query)
+        if target.endswith("/media/vodbridge"):
+            self.finished.append(query["vod_series_no"])
+        return result
+
+def expected_vods(series, vods = 3):
+    return [str(s * 1000 + v) for s in series for v in range(vods)]
+
+def is_bridge_vod(vod):
+    """ Whether vod was built from its VOD bridge data """
+    v = int(vod.vod_no) % 1000
+    return not vod.FETCHED and vod.title == "vod {}".format(v) and vod.duration == 600 + v and vod.filename is None
+
+def test_order(sess):
+    # the first series answers last, VOD are still in the order of the series and bridges
+    scripted = ScriptedSession(sess, slow = [0])
+    vod = VODModule(scripted)
+    vod.LoadSeries(34)
+    count = vod.LoadAllVOD(max_workers = 4)
+    if scripted.finished[-1] != 0:
+        fail("vod_parallel_order", -1, "First series not finished last", scripted.finished)
+    if count != 12 or list(vod.vod[34]) != expected_vods(range(4)) or vod.errors:
+        fail("vod_parallel_order", -1, "Wrong VOD order", list(vod.vod[34]))
+    if not all(v.FETCHED and v.filename == "{}.mp4".format(v.vod_no) for v in vod.vod[34].values()):
+        fail("vod_parallel_order", -1, "VOD not fetched", "")
+    for s in range(4):
+        if list(vod.vod_series[34][s].vods) != expected_vods([s]):
+            fail("vod_parallel_order", -1, "Wrong VOD of series", (s, list(vod.vod_series[34][s].vods)))
+    success("vod_parallel_order")
+
+def test_fallback(sess):
+    # failed VOD views are collected and the VOD are added from their bridge
+    vod = VODModule(ScriptedSession(sess, slow = [1], failing = ["1", "2002"]))
+    vod.LoadSeries(34)
+    count = vod.LoadAllVOD(max_workers = 3)
+    if count != 12 or list(vod.vod[34]) != expected_vods(range(4)):
+        fail("vod_parallel_fallback", -1, "VOD missing", list(vod.vod[34]))
+    if sorted((p, s, n) for p, s, n, _ in vod.errors) != [(34, 0, "1"), (34, 2, "2002")] or \
+            not all(isinstance(e, Exception) for _, _, _, e in vod.errors):
+        fail("vod_parallel_fallback", -1, "Wrong errors", vod.errors)
+    bridge = [v.vod_no for v in vod.vod[34].values() if is_bridge_vod(v)]
+    if bridge != ["1", "2002"] or sum(v.FETCHED for v in vod.vod[34].values()) != 10:
+        fail("vod_parallel_fallback", -1, "Failed VOD not added from the bridge", bridge)
+    success("vod_parallel_fallback")
+
+def test_error_rate(server, sess):
+    # random failures of bridges and views, a failed bridge drops its series
+    vod = VODModule(sess)
+    vod.LoadSeries(34)
+    random.seed(3)
+    server.errors = 0
+    server.error_rate = 0.3
+    try:
+        count = vod.LoadAllVOD(max_workers = 4)
+    finally:
+        server.error_rate = 0.0
+
+    if not vod.errors or len(vod.errors) != server.errors:
+        fail("vod_parallel_errors", -1, "Failures not collected", (len(vod.errors), server.errors))
+    failed_series = {s for _, s, n, _ in vod.errors if n is None}
+    failed_views = {n for _, _, n, _ in vod.errors if n is not None}
+    loaded = [s for s in range(4) if not s in failed_series]
+    if count != 3 * len(loaded) or list(vod.vod[34]) != expected_vods(loaded):
+        fail("vod_parallel_errors", -1, "Wrong VOD loaded", (count, failed_series, list(vod.vod[34])))
+    bridge = {v.vod_no for v in vod.vod[34].values() if is_bridge_vod(v)}
+    if bridge != failed_views or not all(v.FETCHED for v in vod.vod[34].values() if not v.vod_no in bridge):
+        fail("vod_parallel_errors", -1, "Failed VOD not added from the bridge", (bridge, failed_views))
+
+    # errors are reset by the next parallel load
+    if vod.LoadAllVOD(max_workers = 4) != 12 or vod.errors:
+        fail("vod_parallel_errors", -1, "Errors kept", vod.errors)
+    success("vod_parallel_errors")
+
+def do_test():
+    server = FakeUniverse(config.JWE_KEY, vod_series = 4, vods = 3)
+    server.Start()
+    try:
+        with UserSession(make_token(time.time() + 3600), make_token(time.time() + 86400, "refresh"),
+                         hosts = server.Hosts()) as sess:
+            test_order(sess)
+            test_fallback(sess)
+            test_error_rate(server, sess)
+    finally:
+        server.Stop()
+    success("===VOD_TEST===")
+
+do_test()
@@ -0,0 +1,388 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from .Http import Http
+from .UserSession import UserSession
+from .FNS import FNSModule
+from .VOD import VODModule
+
+class AsyncHttp():
+    """
+    Class AsyncHttp
+
+    asyncio counterpart of Http.
+    Blocking calls run on a thread pool of max_in_flight workers sharing the
+    connection pool of a single Http, and a semaphore bounds the number of
+    requests in flight.
+    """
+
+    __HTTP = None
+    __EXECUTOR = None
+    __SEMAPHORE = None
+    __MAX_IN_FLIGHT = 0
+
+    def __init__(self, bearer, key, max_in_flight = 32, **http_options):
+        """ (AsyncHttp, String, List<Int>, Int, ...) -> NoneType
+        Create new AsyncHttp instance with specific bearer token and JWE KEK.
+        http_options are passed to Http, the pool keeps max_in_flight connections by default.
+        """
+        http_options.setdefault("pool_maxsize", max_in_flight)
+        self.__HTTP = Http(bearer, key, **http_options)
+        self.__EXECUTOR = ThreadPoolExecutor(max_workers = max_in_flight)
+        self.__MAX_IN_FLIGHT = max_in_flight
+
+    async def __call(self, func, *args):
+        """ PRIVATE (AsyncHttp, Function, ...) -> Object
+        Run a blocking call on the worker pool, at most max_in_flight at once.
+        """
+        if self.__SEMAPHORE is None:
+            # created lazily to be bound to the running loop
+            self.__SEMAPHORE = asyncio.Semaphore(self.__MAX_IN_FLIGHT)
+
+        async with self.__SEMAPHORE:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__EXECUTOR, func, *args)
+
+    def UpdateToken(self, new_bearer, preserve_user = True):
+        """ (AsyncHttp, String, Boolean) -> NoneType
+        Update current AsyncHttp instance with new Bearer token.
+        """
+        self.__HTTP.UpdateToken(new_bearer, preserve_user)
+
+    async def Get(self, target, query = {}):
+        """ (AsyncHttp, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        Coroutine version of Http.Get.
+        """
+        return await self.__call(self.__HTTP.Get, target, query)
+
+    async def Post(self, target, query = {}, data = {}):
+        """ (AsyncHttp, String, Object, Object) -> (Int, Object | String, NoneType | Object | String)
+        Coroutine version of Http.Post.
+        """
+        return await self.__call(self.__HTTP.Post, target, query, data)
+
+    def Close(self):
+        """ (AsyncHttp) -> NoneType
+        Stop the worker pool and close the connection pool.
+        """
+        self.__EXECUTOR.shutdown(wait = True)
+        self.__HTTP.Close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.Close()
+
+class AsyncUserSession():
+    """
+    Class AsyncUserSession
+
+    asyncio counterpart of UserSession.
+    Wraps a UserSession, so the access token is refreshed on code 9999 the same way.
+    """
+
+    __SESS = None
+    __EXECUTOR = None
+    __SEMAPHORE = None
+    __MAX_IN_FLIGHT = 0
+
+    def __init__(self, access_token = "", refresh_token = "", max_in_flight = 32, **http_options):
+        """ (AsyncUserSession, String, String, Int, ...) -> NoneType
+        Initialize AsyncUserSession with given tokens.
+        Refreshing an expired access token here is blocking, as in UserSession.
+        """
+        http_options.setdefault("pool_maxsize", max_in_flight)
+        self.__SESS = UserSession(access_token, refresh_token, **http_options)
+        self.__EXECUTOR = ThreadPoolExecutor(max_workers = max_in_flight)
+        self.__MAX_IN_FLIGHT = max_in_flight
+
+    async def __call(self, func, *args):
+        """ PRIVATE (AsyncUserSession, Function, ...) -> Object
+        Run a blocking call on the worker pool, at most max_in_flight at once.
+        """
+        if self.__SEMAPHORE is None:
+            self.__SEMAPHORE = asyncio.Semaphore(self.__MAX_IN_FLIGHT)
+
+        async with self.__SEMAPHORE:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__EXECUTOR, func, *args)
+
+    async def Get(self, target, query = {}):
+        """ (AsyncUserSession, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        Coroutine version of UserSession.Get.
+        """
+        return await self.__call(self.__SESS.Get, target, query)
+
+    async def Post(self, target, query = {}):
+        """ (AsyncUserSession, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        Coroutine version of UserSession.Post.
+        """
+        return await self.__call(self.__SESS.Post, target, query)
+
+    def Close(self):
+        """ (AsyncUserSession) -> NoneType
+        Stop the worker pool and close the connection pool.
+        """
+        self.__EXECUTOR.shutdown(wait = True)
+        self.__SESS.Close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.Close()
+
+class AsyncFNSModule(FNSModule):
+    """
+    Class AsyncFNSModule
+
+    FNSModule loading feeds through an AsyncUserSession.
+    Feeds are processed on the event loop, so the dictionaries are never shared between threads.
+    Every method calling the API is a coroutine, or an async generator for IterFeedPages and IterFeeds.
+    """
+    __SESS = None
+
+    def __init__(self, sess, store = None):
+        """ (AsyncFNSModule, AsyncUserSession, Store?) -> NoneType
+        Initialize AsyncFNSModule with given AsyncUserSession
+        """
+        super().__init__(sess, store)
+        self.__SESS = sess
+
+    async def __fetchFeed(self, planet_id, artist_id, next, search_user, size, tags):
+        """ PRIVATE (AsyncFNSModule, Int, Int, Float, String, Int, String) -> Object
+        Fetch the "fns" object of a FNS feed page without processing it.
+        """
+        code, fns_obj, _ = await self.__SESS.Get("https://api.universe-official.io/fns/feeds", {
+            "planet_id": planet_id, "artist_id": artist_id, "next": next,
+            "search_user": search_user, "size": size, "tags": tags
+        })
+
+        if code != 0:
+            raise Exception("Error while fetching FNS feed")
+
+        return fns_obj["fns"]
+
+    async def LoadFeed(self, planet_id, artist_id = 1, next = 0.0, search_user = '', size = 10, tags = ''):
+        """ (AsyncFNSModule, Int, Int, Float, String, Int, String) -> (List<FNSFeed>, Float)
+        Coroutine version of FNSModule.LoadFeed.
+        """
+        fns_obj = await self.__fetchFeed(planet_id, artist_id, next, search_user, size, tags)
+        return self.ProcessFeeds(planet_id, fns_obj)
+
+    async def IterFeedPages(self, planet_id, artist_id = 1, next = 0.0, search_user = '', page_size = 10, tags = '',
+                            limit = None, raw = False):
+        """ (AsyncFNSModule, Int, Int, Float, String, Int, String, Int?, Boolean) -> AsyncGenerator<(List<FNSFeed>, Float)>
+        Async generator version of FNSModule.IterFeedPages.
+        The following page is fetched by a task while the current one is consumed,
+        the task is cancelled when the generator is closed early.
+        """
+        loaded = 0
+        task = asyncio.ensure_future(self.__fetchFeed(planet_id, artist_id, next, search_user, page_size, tags))
+        try:
+            while task is not None:
+                fns_obj = await task
+                cursor = fns_obj["next"]
+                loaded += len(fns_obj["feeds"])
+
+                task = None
+                if fns_obj["feeds"] and cursor and cursor != next and (limit is None or loaded < limit):
+                    task = asyncio.ensure_future(self.__fetchFeed(planet_id, artist_id, cursor, search_user,
+                                                                  page_size, tags))
+                next = cursor
+
+                yield (fns_obj["feeds"], cursor) if raw else self.ProcessFeeds(planet_id, fns_obj)
+        finally:
+            if task is not None and not task.cancel() and not task.cancelled():
+                # already fetched, its result or error is not used
+                task.exception()
+
+    async def IterFeeds(self, planet_id, artist_id = 1, limit = None, page_size = 10, search_user = '', tags = '',
+                        next = 0.0):
+        """ (AsyncFNSModule, Int, Int, Int?, Int, String, String, Float) -> AsyncGenerator<FNSFeed>
+        Async generator version of FNSModule.IterFeeds.
+        """
+        count = 0
+        pages = self.IterFeedPages(planet_id, artist_id, next, search_user, page_size, tags, limit)
+        try:
+            async for feeds, _ in pages:
+                for feed in feeds:
+                    if limit is not None and count >= limit:
+                        return
+                    count += 1
+                    yield feed
+        finally:
+            await pages.aclose()
+
+    async def SyncFeeds(self, planet_id, artist_id = 1, search_user = '', tags = '', page_size = 10, max_pages = None):
+        """ (AsyncFNSModule, Int, Int, String, String, Int, Int?) -> List<FNSFeed>
+        Coroutine version of FNSModule.SyncFeeds.
+        """
+        key = (planet_id, artist_id, tags, search_user)
+        mark = self.sync_marks.get(key)
+        newest = None
+        changed = []
+
+        next = 0.0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            fns_obj = await self.__fetchFeed(planet_id, artist_id, next, search_user, page_size, tags)
+            pages += 1
+
+            page_changed, page_newest, reached = self.ProcessSyncPage(planet_id, fns_obj, mark)
+            changed += page_changed
+            if newest is None:
+                newest = page_newest
+
+            cursor = fns_obj["next"]
+            if reached or not fns_obj["feeds"] or not cursor or cursor == next:
+                break
+            next = cursor
+
+        if newest is not None:
+            self.sync_marks[key] = newest
+        return changed
+
+class AsyncVODModule(VODModule):
+    """
+    Class AsyncVODModule
+
+    VODModule loading VOD through an AsyncUserSession.
+    VOD of a series, and series of a planet, are fetched concurrently.
+    As in VODModule, given max_workers bounds the requests in flight
+    and failures are collected into errors.
+    """
+    __SESS = None
+
+    def __init__(self, sess, store = None):
+        """ (AsyncVODModule, AsyncUserSession, Store?) -> NoneType
+        Initialize AsyncVODModule with given AsyncUserSession
+        """
+        super().__init__(sess, store)
+        self.__SESS = sess
+
+    async def LoadSeries(self, planet_id):
+        """ (AsyncVODModule, Int) -> Int
+        Coroutine version of VODModule.LoadSeries.
+        """
+        code, fns_obj, _ = await self.__SESS.Get("https://api.universe-official.io/media/vodseries", {
+            "planet_id": planet_id
+        })
+
+        if code != 0:
+            raise Exception("Error while fetching vod series")
+
+        return self.ProcessSeries(planet_id, fns_obj["media"])
+
+    async def __fetchVODBridge(self, planet_id, vod_series):
+        """ PRIVATE (AsyncVODModule, Int, Int) -> Object
+        Fetch the "vod_bridge" object of given VOD series.
+        """
+        code, vb_obj, _ = await self.__SESS.Get("https://api.universe-official.io/media/vodbridge", {
+            "planet_id": planet_id,
+            "vod_series_no": vod_series
+        })
+
+        if code != 0:
+            raise Exception("Error while fetching vod series")
+
+        return vb_obj["media"]["vod_bridge"]
+
+    async def __loadParallel(self, targets, fetchVOD, max_workers):
+        """ PRIVATE (AsyncVODModule, List<(Int, Int)>, Boolean, Int) -> Int
+        Coroutine version of VODModule.__loadParallel, with at most max_workers requests at once:
+        VOD are inserted in the order of targets, failures are collected into errors
+        and a VOD whose detail failed is added from its VOD bridge data.
+        """
+        self.errors = []
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def limited(func, *args):
+            async with semaphore:
+                return await func(*args)
+
+        async def load(planet_id, vod_series):
+            try:
+                vb_obj = await limited(self.__fetchVODBridge, planet_id, vod_series)
+            except Exception as e:
+                self.errors.append((planet_id, vod_series, None, e))
+                return None
+
+            vods = {}
+            if fetchVOD:
+                vod_nos = list(vb_obj["vod_media"])
+                fetched = await asyncio.gather(*[limited(self.FetchVOD, planet_id, vod_no) for vod_no in vod_nos],
+                                               return_exceptions = True)
+                for vod_no, vod in zip(vod_nos, fetched):
+                    if isinstance(vod, Exception):
+                        self.errors.append((planet_id, vod_series, vod_no, vod))
+                    else:
+                        vods[vod_no] = vod
+            return vb_obj, vods
+
+        results = await asyncio.gather(*[load(planet_id, vod_series) for planet_id, vod_series in targets])
+        count = 0
+        for (planet_id, vod_series), result in zip(targets, results):
+            if result is not None:
+                count += self.ProcessVODBridge(planet_id, vod_series, *result)
+        return count
+
+    async def LoadAllVOD(self, fetchVOD = True, max_workers = None):
+        """ (AsyncVODModule, Boolean, Int?) -> Int
+        Coroutine version of VODModule.LoadAllVOD.
+        """
+        if max_workers is not None:
+            targets = [(p, vs) for p in self.vod_series for vs in self.vod_series[p]]
+            return await self.__loadParallel(targets, fetchVOD, max_workers)
+
+        counts = await asyncio.gather(*[
+            self.LoadVODFromPlanet(p, fetchVOD = fetchVOD) for p in list(self.vod_series)
+        ])
+        return sum(counts)
+
+    async def LoadVODFromPlanet(self, planet_id, fetchVOD = True, max_workers = None):
+        """ (AsyncVODModule, Int, Boolean, Int?) -> Int
+        Coroutine version of VODModule.LoadVODFromPlanet.
+        """
+        if not planet_id in self.vod_series:
+            raise Exception("The planet {} is not loaded".format(planet_id))
+
+        if max_workers is not None:
+            targets = [(planet_id, vs) for vs in self.vod_series[planet_id]]
+            return await self.__loadParallel(targets, fetchVOD, max_workers)
+
+        counts = await asyncio.gather(*[
+            self.LoadVODFromSeries(planet_id, vs, fetchVOD = fetchVOD) for vs in list(self.vod_series[planet_id])
+        ])
+        return sum(counts)
+
+    async def LoadVODFromSeries(self, planet_id, vod_series, fetchVOD = True, max_workers = None):
+        """ (AsyncVODModule, Int, Int, Boolean, Int?) -> Int
+        Coroutine version of VODModule.LoadVODFromSeries.
+        """
+        if max_workers is not None:
+            return await self.__loadParallel([(planet_id, vod_series)], fetchVOD, max_workers)
+
+        vb_obj = await self.__fetchVODBridge(planet_id, vod_series)
+        vods = None
+        if fetchVOD:
+            vod_nos = list(vb_obj["vod_media"])
+            fetched = await asyncio.gather(*[self.FetchVOD(planet_id, vod_no) for vod_no in vod_nos])
+            vods = dict(zip(vod_nos, fetched))
+
+        return self.ProcessVODBridge(planet_id, vod_series, vb_obj, vods)
+
+    async def FetchVOD(self, planet_id, vod_no):
+        """ (AsyncVODModule, Int, Int) -> VOD
+        Coroutine version of VODModule.FetchVOD.
+        """
+        code, vod_obj, _ = await self.__SESS.Get("https://api.universe-official.io/media/vodview", {
+            "planet_id": planet_id,
+            "media_no": vod_no
+        })
+
+        if code != 0:
+            raise Exception("Error while fetching vod")
+
+        return self.ParseVOD(vod_no, vod_obj)
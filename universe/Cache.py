@@ -0,0 +1,184 @@
+import os
+import json
+import hashlib
+
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from urllib.parse import urlparse
+
+class ResponseCache():
+    """
+    Class ResponseCache
+
+    LRU cache of decrypted API responses, with a TTL per endpoint.
+    Entries are keyed by account_no, target and query, so a response is never
+    served to another account. Optionally backed by a directory on disk.
+    Cached objects are shared between callers and must not be modified.
+    """
+
+    # Read endpoints which rarely change, in seconds
+    DEFAULT_TTLS = {
+        "/media/vodseries": 600,
+        "/media/vodbridge": 600,
+        "/media/vodview": 600,
+        "/planet/home": 60
+    }
+
+    __ENTRIES = None    # OrderedDict<(Int, String, String), (Float, Object)>
+    __LOCK = None
+    __MAX_ENTRIES = 0
+    __TTL = 0
+    __TTLS = None
+    __DIRECTORY = None
+
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    def __init__(self, max_entries = 1024, ttls = None, ttl = 0, directory = None):
+        """ (ResponseCache, Int, Dictionary<String, Float>?, Float, String?) -> NoneType
+        Create a cache keeping at most max_entries responses in memory.
+        ttls maps an endpoint path to its TTL in seconds (DEFAULT_TTLS if not given),
+        other endpoints use ttl, and are not cached if it is 0.
+        If directory is given, responses are also written there and survive restarts.
+        """
+        self.__ENTRIES = OrderedDict()
+        self.__LOCK = Lock()
+        self.__MAX_ENTRIES = max_entries
+        self.__TTL = ttl
+        self.__TTLS = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.__DIRECTORY = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __ttl(self, target):
+        """ PRIVATE (ResponseCache, String) -> Float
+        Find the TTL of target endpoint.
+        """
+        return self.__TTLS.get(urlparse(target).path.rstrip("/"), self.__TTL)
+
+    def __path(self, key):
+        """ PRIVATE (ResponseCache, (Int, String, String)) -> String
+        Path of the file storing key on disk.
+        """
+        name = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.__DIRECTORY, name + ".json")
+
+    def __readDisk(self, key, now):
+        """ PRIVATE (ResponseCache, (Int, String, String), Float) -> (Float, Object)?
+        Read a live entry of key from disk, removing it if expired.
+        """
+        path = self.__path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry["key"] != list(key):
+            return None
+        if entry["expire"] <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry["expire"], entry["data"]
+
+    def __writeDisk(self, key, expire, data):
+        """ PRIVATE (ResponseCache, (Int, String, String), Float, Object) -> NoneType
+        Write an entry to disk atomically.
+        """
+        path = self.__path(key)
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump({"key": key, "expire": expire, "data": data}, f)
+        os.replace(tmp, path)
+
+    def Get(self, account_no, target, query = {}):
+        """ (ResponseCache, Int, String, Object) -> (Boolean, Object)
+        Look up the response of target and query for account_no.
+        Returns (True, data) if a live entry is found, (False, None) otherwise.
+        """
+        if self.__ttl(target) <= 0:
+            return False, None
+
+        key = (account_no, target, json.dumps(query, sort_keys = True))
+        now = time()
+        with self.__LOCK:
+            entry = self.__ENTRIES.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.__ENTRIES.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self.__ENTRIES[key]
+
+        entry = None
+        if self.__DIRECTORY is not None:
+            entry = self.__readDisk(key, now)
+
+        with self.__LOCK:
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.__put(key, entry)
+        return True, entry[1]
+
+    def __put(self, key, entry):
+        """ PRIVATE (ResponseCache, (Int, String, String), (Float, Object)) -> NoneType
+        Insert an entry in memory, evicting the least recently used ones.
+        Must be called with the lock held.
+        """
+        self.__ENTRIES[key] = entry
+        self.__ENTRIES.move_to_end(key)
+        while len(self.__ENTRIES) > self.__MAX_ENTRIES:
+            self.__ENTRIES.popitem(last = False)
+            self.evictions += 1
+
+    def Put(self, account_no, target, query, data):
+        """ (ResponseCache, Int, String, Object, Object) -> NoneType
+        Store the response data of target and query for account_no.
+        Nothing is stored if the endpoint is not cached.
+        """
+        ttl = self.__ttl(target)
+        if ttl <= 0:
+            return
+
+        key = (account_no, target, json.dumps(query, sort_keys = True))
+        expire = time() + ttl
+        with self.__LOCK:
+            self.__put(key, (expire, data))
+
+        if self.__DIRECTORY is not None:
+            self.__writeDisk(key, expire, data)
+
+    def Clear(self):
+        """ (ResponseCache) -> NoneType
+        Remove every entry, in memory and on disk.
+        """
+        with self.__LOCK:
+            self.__ENTRIES.clear()
+
+        if self.__DIRECTORY is not None:
+            for name in os.listdir(self.__DIRECTORY):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.__DIRECTORY, name))
+
+    def Stats(self):
+        """ (ResponseCache) -> Dictionary<String, Int>
+        Returns hit, miss and eviction counts and the number of entries in memory.
+        """
+        with self.__LOCK:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.__ENTRIES)
+            }
@@ -0,0 +1,206 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import perf_counter
+from .UserSession import UserSession
+from .UserSessionPool import UserSessionPool
+
+# Session of each worker process, created by _initWorker
+_SESS = None
+
+def _initWorker(tokens, http_options):
+    """ (List<(String, String)>, Dictionary<String, Object>) -> NoneType
+    Create the session of a worker process, a UserSessionPool if there are many accounts.
+    """
+    global _SESS
+    if len(tokens) > 1:
+        _SESS = UserSessionPool(tokens = tokens, **http_options)
+    else:
+        _SESS = UserSession(tokens[0][0], tokens[0][1], **http_options)
+
+def _get(target, query, error):
+    """ (String, Object, String) -> Object
+    Get target with the session of the worker, raise error if it fails.
+    """
+    code, data, _ = _SESS.Get(target, query)
+    if code != 0:
+        raise Exception(error)
+    return data
+
+def _crawlFeeds(planet_id, artist_id, page_size, max_pages):
+    """ (Int, Int, Int, Int?) -> (List<Object>, (Int, Int, Float))
+    Fetch every page of FNS feeds of an artist id, following the next search parameter.
+    Returns the "fns" objects and the (pid, requests, seconds) of the work.
+    """
+    start = perf_counter()
+    pages = []
+    next = 0.0
+    while max_pages is None or len(pages) < max_pages:
+        fns_obj = _get("https://api.universe-official.io/fns/feeds", {
+            "planet_id": planet_id, "artist_id": artist_id, "next": next,
+            "search_user": "", "size": page_size, "tags": ""
+        }, "Error while fetching FNS feed")["fns"]
+        pages.append(fns_obj)
+        if not fns_obj["feeds"] or not fns_obj["next"] or fns_obj["next"] == next:
+            break
+        next = fns_obj["next"]
+    return pages, (os.getpid(), len(pages), perf_counter() - start)
+
+def _crawlSeries(planet_id):
+    """ (Int) -> (Object, (Int, Int, Float))
+    Fetch the "media" object of the VOD series of a planet.
+    """
+    start = perf_counter()
+    media_obj = _get("https://api.universe-official.io/media/vodseries", {
+        "planet_id": planet_id
+    }, "Error while fetching vod series")["media"]
+    return media_obj, (os.getpid(), 1, perf_counter() - start)
+
+def _crawlBridge(planet_id, vod_series, fetchVOD, threads):
+    """ (Int, Int, Boolean, Int) -> ((Object, Dictionary<vod_no, Object | Exception>), (Int, Int, Float))
+    Fetch the "vod_bridge" object of a VOD series, and the VOD view of each of its VOD
+    on threads threads if fetchVOD is True. A failed VOD view is returned as its exception.
+    """
+    start = perf_counter()
+    vb_obj = _get("https://api.universe-official.io/media/vodbridge", {
+        "planet_id": planet_id,
+        "vod_series_no": vod_series
+    }, "Error while fetching vod series")["media"]["vod_bridge"]
+
+    views = {}
+    if fetchVOD:
+        def view(vod_no):
+            try:
+                return _get("https://api.universe-official.io/media/vodview", {
+                    "planet_id": planet_id,
+                    "media_no": vod_no
+                }, "Error while fetching vod")
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers = threads) as executor:
+            views = dict(zip(vb_obj["vod_media"], executor.map(view, vb_obj["vod_media"])))
+    return (vb_obj, views), (os.getpid(), 1 + len(views), perf_counter() - start)
+
+class Crawler():
+    """
+    Class Crawler
+
+    Load planets on a pool of processes, so that decrypting and parsing responses
+    use every core instead of the one the GIL allows.
+    Work is sharded by FNS artist id, by planet for VOD series and by VOD series for VOD;
+    each worker process has its own session, built from the tokens, and returns raw API
+    objects. They are processed in the parent by given FNSModule and VODModule,
+    skipping ids already processed by the crawl.
+    """
+
+    __TOKENS = None
+    __HTTP_OPTIONS = None
+    __PROCESSES = None
+    __THREADS = 4
+
+    errors = []     # List<(task, Exception)>
+    workers = {}    # Dictionary<pid, Dictionary<String, Int | Float>>
+
+    def __init__(self, tokens, processes = None, threads = 4, **http_options):
+        """ (Crawler, List<(String, String)>, Int?, Int, ...) -> NoneType
+        Crawl with processes worker processes (one per core if not given), each one using
+        every (access token, refresh token) of tokens through a UserSessionPool,
+        and fetching VOD views on threads threads.
+        http_options are passed to the sessions of the workers and must be picklable.
+        """
+        if not tokens:
+            raise Exception("No token given")
+
+        self.__TOKENS = list(tokens)
+        self.__HTTP_OPTIONS = http_options
+        self.__PROCESSES = processes
+        self.__THREADS = threads
+        self.errors = []
+        self.workers = {}
+
+    def __record(self, stats):
+        """ PRIVATE (Crawler, (Int, Int, Float)) -> NoneType
+        Add the (pid, requests, seconds) of a task to the statistics of its worker.
+        """
+        pid, requests, seconds = stats
+        w = self.workers.setdefault(pid, {"tasks": 0, "requests": 0, "seconds": 0.0})
+        w["tasks"] += 1
+        w["requests"] += requests
+        w["seconds"] += seconds
+
+    def Crawl(self, planets, fns = None, vod = None, artist_ids = (1,), page_size = 20, max_pages = None,
+              fetchVOD = True):
+        """ (Crawler, List<Int>, FNSModule?, VODModule?, List<Int>, Int, Int?, Boolean) -> Dictionary<String, Int>
+        Load the FNS feeds of every artist id of given planets into fns,
+        and their VOD series and VOD into vod (each only if given).
+        Failed tasks are collected into errors instead of being raised.
+        Returns the number of "feeds", "vod_series" and "vods" added.
+        """
+        self.errors = []
+        self.workers = {}
+        counts = {"feeds": 0, "vod_series": 0, "vods": 0}
+        seen_feeds = {}     # Dictionary<planet_id, Set<feed_id>>
+        seen_vods = {}      # Dictionary<planet_id, Set<vod_no>>
+
+        with ProcessPoolExecutor(max_workers = self.__PROCESSES, initializer = _initWorker,
+                                 initargs = (self.__TOKENS, self.__HTTP_OPTIONS)) as executor:
+            pending = {}
+            if fns is not None:
+                for planet_id in planets:
+                    for artist_id in artist_ids:
+                        future = executor.submit(_crawlFeeds, planet_id, artist_id, page_size, max_pages)
+                        pending[future] = ("feeds", planet_id, artist_id)
+            if vod is not None:
+                for planet_id in planets:
+                    pending[executor.submit(_crawlSeries, planet_id)] = ("vod_series", planet_id, None)
+
+            while pending:
+                done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    task = pending.pop(future)
+                    kind, planet_id, key = task
+                    try:
+                        result, stats = future.result()
+                    except Exception as e:
+                        self.errors.append((task, e))
+                        continue
+                    self.__record(stats)
+
+                    if kind == "feeds":
+                        seen = seen_feeds.setdefault(planet_id, set())
+                        for fns_obj in result:
+                            feeds = [f for f in fns_obj["feeds"] if not f["id"] in seen]
+                            seen.update(f["id"] for f in feeds)
+                            added, _ = fns.ProcessFeeds(planet_id, {"feeds": feeds, "next": fns_obj["next"]})
+                            counts["feeds"] += len(added)
+
+                    elif kind == "vod_series":
+                        counts["vod_series"] += vod.ProcessSeries(planet_id, result)
+                        seen_vods[planet_id] = set()
+                        for vod_series in vod.vod_series[planet_id]:
+                            future = executor.submit(_crawlBridge, planet_id, vod_series, fetchVOD, self.__THREADS)
+                            pending[future] = ("vods", planet_id, vod_series)
+
+                    else:
+                        vb_obj, views = result
+                        vods = {}
+                        for vod_no, vod_obj in views.items():
+                            if isinstance(vod_obj, Exception):
+                                self.errors.append((("vod", planet_id, vod_no), vod_obj))
+                            else:
+                                vods[vod_no] = vod.ParseVOD(vod_no, vod_obj)
+                        seen = seen_vods[planet_id]
+                        vb_obj = {"vod_media": {no: m for no, m in vb_obj["vod_media"].items() if not no in seen}}
+                        seen.update(vb_obj["vod_media"])
+                        counts["vods"] += vod.ProcessVODBridge(planet_id, key, vb_obj, vods)
+
+        return counts
+
+    def Throughput(self):
+        """ (Crawler) -> Dictionary<pid, Dictionary<String, Int | Float>>
+        Returns for each worker process of the last crawl its number of tasks and requests,
+        the seconds it spent on them and its requests per second.
+        """
+        return {pid: dict(w, rate = w["requests"] / w["seconds"] if w["seconds"] else 0.0)
+                for pid, w in self.workers.items()}
@@ -0,0 +1,255 @@
+import os
+import json
+import hashlib
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+class Downloader():
+    """
+    Class Downloader
+
+    Download media of FNS attachments and VOD (thumbnails, subtitles) into a directory.
+    Files are streamed to disk in chunks on a bounded pool of workers sharing
+    one connection pool. An interrupted download is kept as a partial file
+    and resumed with a Range request. Files are stored once per content,
+    under their SHA-256, and a manifest remembers the file of each url with
+    its ETag and Last-Modified, so unchanged files are not downloaded again.
+    """
+
+    __DIRECTORY = None
+    __SESSION = None
+    __MAX_WORKERS = 0
+    __CHUNK_SIZE = 0
+    __TIMEOUT = None
+    __MANIFEST = None   # Dictionary<url, Object>
+    __LOCK = None
+    __DIRTY = 0
+
+    errors = []         # List<(url, Exception)>
+    downloaded = 0      # number of files downloaded
+    resumed = 0         # number of downloads resumed from a partial file
+    unchanged = 0       # number of files found unchanged
+    received = 0        # number of bytes received
+
+    def __init__(self, directory, max_workers = 8, chunk_size = 65536, timeout = (5, 30)):
+        """ (Downloader, String, Int, Int, (Float, Float)?) -> NoneType
+        Download into directory on max_workers threads, keeping as many pooled connections per host.
+        Files are written chunk_size bytes at a time, timeout is the (connect, read) timeout.
+        """
+        self.__DIRECTORY = directory
+        self.__MAX_WORKERS = max_workers
+        self.__CHUNK_SIZE = chunk_size
+        self.__TIMEOUT = timeout
+        self.__LOCK = Lock()
+        self.__DIRTY = 0
+
+        self.__SESSION = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 4, pool_maxsize = max_workers)
+        self.__SESSION.mount("https://", adapter)
+        self.__SESSION.mount("http://", adapter)
+
+        os.makedirs(os.path.join(directory, "parts"), exist_ok = True)
+        os.makedirs(os.path.join(directory, "objects"), exist_ok = True)
+        try:
+            with open(os.path.join(directory, "manifest.json"), "r") as f:
+                self.__MANIFEST = json.load(f)
+        except FileNotFoundError:
+            self.__MANIFEST = {}
+
+        self.errors = []
+        self.downloaded = 0
+        self.resumed = 0
+        self.unchanged = 0
+        self.received = 0
+
+    def __saveManifest(self):
+        """ PRIVATE (Downloader) -> NoneType
+        Write the manifest atomically.
+        """
+        path = os.path.join(self.__DIRECTORY, "manifest.json")
+        with self.__LOCK:
+            tmp = "{}.{}.tmp".format(path, id(self))
+            with open(tmp, "w") as f:
+                json.dump(self.__MANIFEST, f)
+            os.replace(tmp, path)
+            self.__DIRTY = 0
+
+    def __count(self, name, value = 1):
+        """ PRIVATE (Downloader, String, Int) -> NoneType
+        Increase a statistic counter.
+        """
+        with self.__LOCK:
+            setattr(self, name, getattr(self, name) + value)
+
+    def Path(self, url):
+        """ (Downloader, String) -> String?
+        Returns the path of the downloaded file of url, None if it is not downloaded.
+        """
+        with self.__LOCK:
+            entry = self.__MANIFEST.get(url)
+        if entry is None:
+            return None
+        return os.path.join(self.__DIRECTORY, entry["path"])
+
+    def Download(self, url, revalidate = True):
+        """ (Downloader, String, Boolean) -> String
+        Download url unless it is already downloaded, and returns the path of its file.
+        An already downloaded file is checked with a conditional request if revalidate is True,
+        and replaced if it changed.
+        A partial file left by an interrupted download is resumed.
+        """
+        path = self.__download(url, revalidate)
+        self.__saveManifest()
+        return path
+
+    def __download(self, url, revalidate):
+        """ PRIVATE (Downloader, String, Boolean) -> String
+        Download url without saving the manifest.
+        """
+        with self.__LOCK:
+            entry = self.__MANIFEST.get(url)
+
+        # keep the bytes as they are on the server, so that ranges match the file
+        headers = {"Accept-Encoding": "identity"}
+        if entry is not None and os.path.exists(os.path.join(self.__DIRECTORY, entry["path"])):
+            if not revalidate:
+                self.__count("unchanged")
+                return os.path.join(self.__DIRECTORY, entry["path"])
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        name = hashlib.sha256(url.encode()).hexdigest()
+        part = os.path.join(self.__DIRECTORY, "parts", name + ".part")
+        meta = None
+        offset = 0
+        if os.path.exists(part):
+            try:
+                with open(part + ".json", "r") as f:
+                    meta = json.load(f)
+                offset = os.path.getsize(part)
+            except (OSError, ValueError):
+                offset = 0
+        if offset > 0 and (meta.get("etag") or meta.get("last_modified")):
+            headers["Range"] = "bytes={}-".format(offset)
+            headers["If-Range"] = meta.get("etag") or meta["last_modified"]
+        else:
+            offset = 0
+
+        with self.__SESSION.get(url, headers = headers, stream = True, timeout = self.__TIMEOUT) as resp:
+            if resp.status_code == 304:
+                self.__count("unchanged")
+                return os.path.join(self.__DIRECTORY, entry["path"])
+            if resp.status_code == 416:
+                # the partial file is not a prefix of the current one
+                os.remove(part)
+                return self.__download(url, revalidate)
+            if resp.status_code not in (200, 206):
+                raise Exception("Error while downloading {}: HTTP {}".format(url, resp.status_code))
+
+            if resp.status_code == 206:
+                self.__count("resumed")
+            else:
+                offset = 0
+            meta = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+            with open(part + ".json", "w") as f:
+                json.dump(meta, f)
+
+            digest = hashlib.sha256()
+            with open(part, "r+b" if offset else "wb") as f:
+                # hash the resumed prefix again
+                while f.tell() < offset:
+                    digest.update(f.read(min(self.__CHUNK_SIZE, offset - f.tell())))
+                f.truncate(offset)
+                for chunk in resp.iter_content(chunk_size = self.__CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    self.__count("received", len(chunk))
+                size = f.tell()
+
+        expected = resp.headers.get("Content-Length")
+        if expected is not None and size - offset != int(expected):
+            raise Exception("Error while downloading {}: incomplete body".format(url))
+
+        # keep a single file per content
+        digest = digest.hexdigest()
+        ext = os.path.splitext(urlparse(url).path)[1]
+        path = os.path.join("objects", digest[:2], digest + ext)
+        os.makedirs(os.path.join(self.__DIRECTORY, "objects", digest[:2]), exist_ok = True)
+        if os.path.exists(os.path.join(self.__DIRECTORY, path)):
+            os.remove(part)
+        else:
+            os.replace(part, os.path.join(self.__DIRECTORY, path))
+        os.remove(part + ".json")
+
+        with self.__LOCK:
+            self.__MANIFEST[url] = {"path": path, "sha256": digest, "size": size,
+                                    "etag": meta["etag"], "last_modified": meta["last_modified"]}
+            self.__DIRTY += 1
+            self.downloaded += 1
+        return os.path.join(self.__DIRECTORY, path)
+
+    def DownloadAll(self, urls, revalidate = True):
+        """ (Downloader, List<String>, Boolean) -> Dictionary<String, String>
+        Download every url on the worker pool. See Download.
+        Failures are collected into errors instead of being raised, and can be resumed by calling again.
+        Returns the path of the file of every url downloaded.
+        """
+        self.errors = []
+        urls = list(dict.fromkeys(u for u in urls if u))
+        paths = {}
+
+        with ThreadPoolExecutor(max_workers = self.__MAX_WORKERS) as executor:
+            futures = [(url, executor.submit(self.__download, url, revalidate)) for url in urls]
+            for url, future in futures:
+                try:
+                    paths[url] = future.result()
+                except Exception as e:
+                    self.errors.append((url, e))
+                if self.__DIRTY >= 100:
+                    self.__saveManifest()
+
+        self.__saveManifest()
+        return paths
+
+    def DownloadAttachments(self, attachments, revalidate = True):
+        """ (Downloader, List<FNSAttachment>, Boolean) -> Dictionary<UUID, String>
+        Download the files of FNSAttachment, see DownloadAll.
+        Returns the path of the file of every attachment id downloaded.
+        """
+        attachments = list(attachments)
+        paths = self.DownloadAll([a.file for a in attachments], revalidate)
+        return {a.attachment_id: paths[a.file] for a in attachments if a.file in paths}
+
+    def DownloadVOD(self, vods, thumbnails = True, subtitles = True, revalidate = True):
+        """ (Downloader, List<VOD>, Boolean, Boolean, Boolean) -> Dictionary<(vod_no, String), String>
+        Download the thumbnails and subtitles of VOD, see DownloadAll.
+        Returns the path of every file downloaded by VOD no and attribute name ("thumb_square", "subtitle_ko", ...).
+        """
+        fields = []
+        if thumbnails:
+            fields += ["thumb_landscape", "thumb_portrait", "thumb_square"]
+        if subtitles:
+            fields += ["subtitle_ko", "subtitle_en", "subtitle_ja", "subtitle_cn", "subtitle_tw"]
+
+        targets = [(v.vod_no, name, getattr(v, name)) for v in vods for name in fields if getattr(v, name)]
+        paths = self.DownloadAll([url for _, _, url in targets], revalidate)
+        return {(vod_no, name): paths[url] for vod_no, name, url in targets if url in paths}
+
+    def Close(self):
+        """ (Downloader) -> NoneType
+        Save the manifest and close every pooled connection.
+        """
+        self.__saveManifest()
+        self.__SESSION.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
@@ -0,0 +1,283 @@
+import os
+import io
+import csv
+import json
+import gzip
+
+from .util import convert_epoch
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+class Exporter():
+    """
+    Class Exporter
+
+    Stream FNS feeds, attachments, artists, VOD series and VOD to files in a
+    directory while they are loaded, one file per kind of record.
+    Records are written as JSON lines or CSV (optionally gzipped), or as
+    Parquet part files when pyarrow is installed. Only the records of the
+    last batch are held in memory: feeds are exported from the raw pages
+    without being processed by the FNSModule, and the VOD of each series
+    are released from the VODModule once exported.
+    Progress is saved in a checkpoint with the FNS next cursor and the VOD
+    series already done, so an interrupted export resumes where it left off
+    without duplicating records.
+    """
+
+    FORMATS = ("jsonl", "csv", "parquet")
+
+    # Columns of every kind of record, with their type
+    FIELDS = {
+        "feeds": (("planet_id", "int"), ("feed_id", "string"), ("account_no", "int"), ("body", "string"),
+                  ("create_date", "int"), ("modify_date", "int"), ("publish_date", "int"),
+                  ("tags", "list"), ("attachment_count", "int")),
+        "attachments": (("planet_id", "int"), ("attachment_id", "string"), ("feed_id", "string"),
+                        ("account_no", "int"), ("type", "string"), ("file", "string"), ("publish_date", "int")),
+        "artists": (("planet_id", "int"), ("account_no", "int"), ("artist_id", "int"),
+                    ("nickname", "string"), ("profile_picture", "string")),
+        "vod_series": (("planet_id", "int"), ("vod_series_no", "int"), ("title", "string"),
+                       ("thumb_landscape", "string"), ("thumb_portrait", "string"), ("thumb_square", "string")),
+        "vods": (("planet_id", "int"), ("vod_series_no", "int"), ("vod_no", "string"), ("FETCHED", "bool"),
+                 ("title", "string"), ("duration", "int"), ("thumb_landscape", "string"),
+                 ("thumb_portrait", "string"), ("thumb_square", "string"), ("filename", "string"),
+                 ("CDN_assertion", "string"), ("CDN_playready", "string"), ("CDN_widevine", "string"),
+                 ("CDN_fairplay", "string"), ("DRM_playready", "string"), ("DRM_widevine", "string"),
+                 ("DRM_fairplay", "string"), ("DRM_fairplay_cert", "string"), ("subtitle_ko", "string"),
+                 ("subtitle_en", "string"), ("subtitle_ja", "string"), ("subtitle_cn", "string"),
+                 ("subtitle_tw", "string"))
+    }
+
+    __DIRECTORY = None
+    __FORMAT = None
+    __COMPRESS = False
+    __BATCH_SIZE = 0
+    __ROWS = None           # Dictionary<kind, List<Dictionary<String, Object>>>
+    __BUFFERED = 0
+    __CHECKPOINT = None     # Object
+    __ARTISTS = None        # Set<(planet_id, account_no)>
+
+    def __init__(self, directory, format = "jsonl", compress = False, batch_size = 1000):
+        """ (Exporter, String, String, Boolean, Int) -> NoneType
+        Export to directory in format "jsonl", "csv" or "parquet", gzipped if compress (not for Parquet).
+        Records are written, and the checkpoint saved, every batch_size records.
+        If directory holds a previous export, records written after its last checkpoint are discarded.
+        """
+        if not format in self.FORMATS:
+            raise Exception("Unknown export format {}".format(format))
+        if format == "parquet" and pyarrow is None:
+            raise Exception("pyarrow is not installed")
+
+        self.__DIRECTORY = directory
+        self.__FORMAT = format
+        self.__COMPRESS = compress and format != "parquet"
+        self.__BATCH_SIZE = batch_size
+        self.__ROWS = {kind: [] for kind in self.FIELDS}
+        self.__BUFFERED = 0
+        os.makedirs(directory, exist_ok = True)
+
+        try:
+            with open(os.path.join(directory, "checkpoint.json"), "r") as f:
+                self.__CHECKPOINT = json.load(f)
+        except FileNotFoundError:
+            self.__CHECKPOINT = {"files": {}, "parts": 0, "artists": [], "tasks": {}}
+        self.__ARTISTS = set(tuple(a) for a in self.__CHECKPOINT["artists"])
+        self.__recover()
+
+    def __path(self, kind, part = None):
+        """ PRIVATE (Exporter, String, Int?) -> String
+        Path of the file of kind, or of its Parquet part.
+        """
+        if self.__FORMAT == "parquet":
+            return os.path.join(self.__DIRECTORY, "{}.{:05d}.parquet".format(kind, part))
+        return os.path.join(self.__DIRECTORY, "{}.{}{}".format(kind, self.__FORMAT, ".gz" if self.__COMPRESS else ""))
+
+    def __recover(self):
+        """ PRIVATE (Exporter) -> NoneType
+        Discard what was written after the last checkpoint.
+        """
+        if self.__FORMAT == "parquet":
+            parts = self.__CHECKPOINT["parts"]
+            for name in os.listdir(self.__DIRECTORY):
+                if name.endswith(".tmp") or (name.endswith(".parquet") and int(name.split(".")[-2]) > parts):
+                    os.remove(os.path.join(self.__DIRECTORY, name))
+            return
+
+        for kind in self.FIELDS:
+            path = self.__path(kind)
+            if os.path.exists(path):
+                with open(path, "r+b") as f:
+                    f.truncate(self.__CHECKPOINT["files"].get(kind, 0))
+
+    def __add(self, kind, row):
+        """ PRIVATE (Exporter, String, Dictionary<String, Object>) -> NoneType
+        Buffer a record of kind.
+        """
+        self.__ROWS[kind].append(row)
+        self.__BUFFERED += 1
+
+    def __writeText(self, kind, rows):
+        """ PRIVATE (Exporter, String, List<Dictionary<String, Object>>) -> NoneType
+        Append records to the JSON lines or CSV file of kind.
+        Each batch is a separate gzip member, so the file can be truncated between batches.
+        """
+        path = self.__path(kind)
+        if self.__FORMAT == "jsonl":
+            text = "".join(json.dumps(row, ensure_ascii = False) + "\n" for row in rows)
+        else:
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                writer.writerow([name for name, _ in self.FIELDS[kind]])
+            for row in rows:
+                writer.writerow([json.dumps(row[name], ensure_ascii = False) if type == "list" else row[name]
+                                 for name, type in self.FIELDS[kind]])
+            text = buf.getvalue()
+
+        with open(path, "ab") as f:
+            if self.__COMPRESS:
+                with gzip.GzipFile(fileobj = f, mode = "wb") as gz:
+                    gz.write(text.encode("utf-8"))
+            else:
+                f.write(text.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            self.__CHECKPOINT["files"][kind] = f.tell()
+
+    def __writeParquet(self, kind, rows, part):
+        """ PRIVATE (Exporter, String, List<Dictionary<String, Object>>, Int) -> NoneType
+        Write records of kind as a new Parquet part file.
+        """
+        types = {"int": pyarrow.int64(), "string": pyarrow.string(),
+                 "bool": pyarrow.bool_(), "list": pyarrow.list_(pyarrow.string())}
+        schema = pyarrow.schema([(name, types[type]) for name, type in self.FIELDS[kind]])
+
+        path = self.__path(kind, part)
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows, schema = schema), path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def __commit(self, task, state):
+        """ PRIVATE (Exporter, String, Object) -> NoneType
+        Write buffered records, then save state as the progress of task in the checkpoint.
+        """
+        if self.__BUFFERED:
+            part = self.__CHECKPOINT["parts"] + 1
+            for kind, rows in self.__ROWS.items():
+                if not rows:
+                    continue
+                if self.__FORMAT == "parquet":
+                    self.__writeParquet(kind, rows, part)
+                else:
+                    self.__writeText(kind, rows)
+                self.__ROWS[kind] = []
+            self.__CHECKPOINT["parts"] = part
+            self.__BUFFERED = 0
+
+        self.__CHECKPOINT["tasks"][task] = state
+        self.__CHECKPOINT["artists"] = sorted(self.__ARTISTS)
+        path = os.path.join(self.__DIRECTORY, "checkpoint.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.__CHECKPOINT, f)
+        os.replace(path + ".tmp", path)
+
+    def __addFeed(self, planet_id, f):
+        """ PRIVATE (Exporter, Int, Object) -> NoneType
+        Buffer the records of a parsed FNS Feed JSON object, its attachments and its artist if not exported yet.
+        """
+        if not (planet_id, f["account_no"]) in self.__ARTISTS:
+            self.__ARTISTS.add((planet_id, f["account_no"]))
+            self.__add("artists", {
+                "planet_id": planet_id, "account_no": f["account_no"], "artist_id": f["artist_id"],
+                "nickname": f["nickname"], "profile_picture": f["profile_picture"]
+            })
+
+        create, modify, publish = (f.get(name) for name in ("create_date", "modify_date", "publish_date"))
+        publish = convert_epoch(publish) if publish else None
+        self.__add("feeds", {
+            "planet_id": planet_id, "feed_id": f["id"], "account_no": f["account_no"], "body": f["body"],
+            "create_date": convert_epoch(create) if create else None,
+            "modify_date": convert_epoch(modify) if modify else None, "publish_date": publish,
+            "tags": list(f.get("tags", [])), "attachment_count": len(f["attach_urls"])
+        })
+        for a in f["attach_urls"]:
+            self.__add("attachments", {
+                "planet_id": planet_id, "attachment_id": a["id"], "feed_id": f["id"],
+                "account_no": a["account_no"], "type": a["type"], "file": a["file"], "publish_date": publish
+            })
+
+    def ExportFeeds(self, fns, planet_id, artist_id = 1, search_user = '', tags = '', page_size = 10):
+        """ (Exporter, FNSModule, Int, Int, String, String, Int) -> Int
+        Load every page of FNS feeds of the query with fns, exporting each page as it is fetched.
+        Feeds are not processed by fns, so its memory does not grow with the export.
+        A query already exported completely is skipped, an interrupted one resumes from its next cursor.
+        Returns the number of feeds exported.
+        """
+        task = "fns:{}:{}:{}:{}".format(planet_id, artist_id, tags, search_user)
+        state = self.__CHECKPOINT["tasks"].get(task, {"next": 0.0, "done": False})
+        if state["done"]:
+            return 0
+
+        count = 0
+        for feeds, next in fns.IterFeedPages(planet_id, artist_id, state["next"], search_user, page_size, tags,
+                                              raw = True):
+            for feed in feeds:
+                self.__addFeed(planet_id, feed)
+            count += len(feeds)
+
+            state = {"next": next, "done": False}
+            if self.__BUFFERED >= self.__BATCH_SIZE:
+                self.__commit(task, state)
+
+        self.__commit(task, {"next": state["next"], "done": True})
+        return count
+
+    def ExportVOD(self, vod, planet_id, fetchVOD = True, max_workers = None):
+        """ (Exporter, VODModule, Int, Boolean, Int?) -> Int
+        Load the VOD series of a planet with vod if not loaded yet, then the VOD of each series,
+        exporting each series once processed, then releasing its VOD from vod.
+        See VODModule.LoadVODFromSeries.
+        A planet already exported completely is skipped, an interrupted one resumes after its last series done.
+        Returns the number of VOD exported.
+        """
+        task = "vod:{}".format(planet_id)
+        state = self.__CHECKPOINT["tasks"].get(task, {"series": [], "done": False})
+        if state["done"]:
+            return 0
+
+        if not planet_id in vod.vod_series:
+            vod.LoadSeries(planet_id)
+
+        if not task in self.__CHECKPOINT["tasks"]:
+            for vs in vod.vod_series[planet_id].values():
+                self.__add("vod_series", {
+                    "planet_id": planet_id, "vod_series_no": vs.vod_series_no, "title": vs.title,
+                    "thumb_landscape": vs.thumb_landscape, "thumb_portrait": vs.thumb_portrait,
+                    "thumb_square": vs.thumb_square
+                })
+            self.__commit(task, state)
+
+        count = 0
+        done = list(state["series"])
+        for vod_series in list(vod.vod_series[planet_id]):
+            if vod_series in done:
+                continue
+
+            vod.LoadVODFromSeries(planet_id, vod_series, fetchVOD = fetchVOD, max_workers = max_workers)
+            series = vod.vod_series[planet_id][vod_series]
+            for v in series.vods.values():
+                row = {"planet_id": planet_id, "vod_series_no": vod_series, "vod_no": str(v.vod_no)}
+                row.update((name, getattr(v, name)) for name, _ in self.FIELDS["vods"][3:])
+                self.__add("vods", row)
+                vod.vod[planet_id].pop(v.vod_no, None)
+                count += 1
+            series.vods = {}
+
+            done.append(vod_series)
+            if self.__BUFFERED >= self.__BATCH_SIZE:
+                self.__commit(task, {"series": list(done), "done": False})
+
+        self.__commit(task, {"series": done, "done": True})
+        return count
@@ -1,11 +1,18 @@
-from .util import convert_timestr
+from heapq import nlargest
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from .util import convert_epoch, format_epoch, split_url, intern_str
+from .Index import Timeline, TextIndex, normalize
 
 class FNSArtist():
     """
     Class FNSArtist
     
     Save information of an artist.
+    Feeds of the artist are also kept in a Timeline, newest first,
+    once FNSModule built it for a query.
     """
+    __slots__ = ("feeds", "attachments", "timeline", "account_no", "artist_id", "nickname", "profile_picture")
 
     def __init__(self, account_no, artist_id, nickname, profile_picture):
         """ (FNSAttachment, String, Int, String,String) -> NoneType
@@ -13,9 +20,10 @@ class FNSArtist():
         """
         self.feeds = {}
         self.attachments = {}
+        self.timeline = None
         self.account_no = account_no
         self.artist_id = artist_id
-        self.nickname = nickname
+        self.nickname = intern_str(nickname)
         self.profile_picture = profile_picture
     
     def AddFeed(self, feed):
@@ -24,6 +32,8 @@ class FNSArtist():
         Must be called from FNSFeed
         """
         self.feeds[feed.feed_id] = feed
+        if self.timeline is not None:
+            self.timeline.Add(feed.publish_ts, feed.feed_id)
     
     def AddAttachment(self, attachment):
         """ (FNSArtist, FNSAttachment) -> NoneType
@@ -40,29 +50,66 @@ class FNSAttachment():
     Class FNSAttachment
     
     Save information of a single FNS feed attachment.
+    The file url is kept as its interned CDN directory and its file name.
     """
+    __slots__ = ("attachment_id", "type", "create_ts", "publish_ts", "artist",
+                 "__FILE_PREFIX", "__FILE_NAME")
 
     def __init__(self, attachment_id):
         """ (FNSAttachment, UUID) -> NoneType
         Initialize FNSAttachment Object
         """
         self.attachment_id = attachment_id
+        self.type = None
+        self.create_ts = None
+        self.publish_ts = None
+        self.artist = None
+        self.__FILE_PREFIX = None
+        self.__FILE_NAME = None
+
+    @property
+    def file(self):
+        """ (FNSAttachment) -> String?
+        The url of the attachment
+        """
+        if self.__FILE_NAME is None:
+            return None
+        return self.__FILE_PREFIX + self.__FILE_NAME
+
+    @file.setter
+    def file(self, url):
+        self.__FILE_PREFIX, self.__FILE_NAME = split_url(url)
     
     def SetFile(self, url, type):
         """ (FNSFeed, string, string) -> NoneType
         Set the type and data of an attachment
         """
-        self.file = url
-        self.type = type
+        self.__FILE_PREFIX, self.__FILE_NAME = split_url(url)
+        self.type = intern_str(type)
+
+    @property
+    def create_date(self):
+        """ (FNSAttachment) -> String?
+        The create datetime, formatted in local time
+        """
+        return format_epoch(self.create_ts) if self.create_ts is not None else None
+
+    @property
+    def publish_date(self):
+        """ (FNSAttachment) -> String?
+        The publish datetime, formatted in local time
+        """
+        return format_epoch(self.publish_ts) if self.publish_ts is not None else None
 
     def SetDate(self, create = '', publish = ''):
         """ (FNSFeed, datetime?, datetime?) -> NoneType
         Set the create and publish datetime.
+        They are stored as epoch seconds in create_ts and publish_ts.
         """
         if create:
-            self.create_date = convert_timestr(create)
+            self.create_ts = convert_epoch(create)
         if publish:
-            self.publish_date = convert_timestr(publish)
+            self.publish_ts = convert_epoch(publish)
 
     def SetArtist(self, artist):
         """ (FNSFeed, FNSArtist) -> NoneType
@@ -81,6 +128,8 @@ class FNSFeed():
     Save information of a single FNS feed.
     This doesn't include comment information.
     """
+    __slots__ = ("feed_id", "attachments", "tags", "body",
+                 "create_ts", "modify_ts", "publish_ts", "artist")
 
     def __init__(self, feed_id):
         """ (FNSFeed, UUID) -> NoneType
@@ -89,6 +138,11 @@ class FNSFeed():
         self.feed_id = feed_id
         self.attachments = dict()
         self.tags = []
+        self.body = None
+        self.create_ts = None
+        self.modify_ts = None
+        self.publish_ts = None
+        self.artist = None
 
     def AddAttachment(self, attachment):
         """ (FNSFeed, FNSAttachment) -> NoneType
@@ -99,16 +153,38 @@ class FNSFeed():
     def SetBody(self, body):
         self.body = body
 
+    @property
+    def create_date(self):
+        """ (FNSFeed) -> String?
+        The create datetime, formatted in local time
+        """
+        return format_epoch(self.create_ts) if self.create_ts is not None else None
+
+    @property
+    def modify_date(self):
+        """ (FNSFeed) -> String?
+        The modify datetime, formatted in local time
+        """
+        return format_epoch(self.modify_ts) if self.modify_ts is not None else None
+
+    @property
+    def publish_date(self):
+        """ (FNSFeed) -> String?
+        The publish datetime, formatted in local time
+        """
+        return format_epoch(self.publish_ts) if self.publish_ts is not None else None
+
     def SetDate(self, create = '', modify = '', publish = ''):
         """ (FNSFeed, datetime?, datetime?, datetime?) -> NoneType
         Set the create, modify, and publish datetime.
+        They are stored as epoch seconds in create_ts, modify_ts and publish_ts.
         """
         if create:
-            self.create_date = convert_timestr(create)
+            self.create_ts = convert_epoch(create)
         if modify:
-            self.modify_date = convert_timestr(modify)
+            self.modify_ts = convert_epoch(modify)
         if publish:
-            self.publish_date = convert_timestr(publish)
+            self.publish_ts = convert_epoch(publish)
     
     def SetArtist(self, artist):
         """ (FNSFeed, FNSArtist) -> NoneType
@@ -121,7 +197,7 @@ class FNSFeed():
         """ (FNSFeed, String) -> NoneType
         Add a tag to current FNSFeed
         """
-        self.tags.append(tag)
+        self.tags.append(intern_str(tag))
 
     def __str__(self):
         return "<FNSFeed: ({}) \"{}\">".format(self.feed_id, self.artist.nickname)
@@ -132,10 +208,15 @@ class FNSFeed():
 
 class FNSModule():
     __SESS = None
+    __STORE = None
     artists = {}      # Dictionary<planet_id, Dictionary<account_no, FNSArtist>>
     attachments = {}  # Dictionary<planet_id, Dictionary<attachment_id, FNSAttachment>>
     feeds = {}        # Dictionary<planet_id, Dictionary<feed_id, FNSFeed>>
-    tags = {}         # Dictionary<planet_id, Dictionary<tag, List<FNSFeed>>>
+    tags = {}         # Dictionary<planet_id, Dictionary<tag, Set<feed_id>>>
+    timelines = {}    # Dictionary<planet_id, Timeline>, built by the first query
+    attachment_timelines = {}  # Dictionary<planet_id, Dictionary<type, Timeline>>, built by the first query
+    texts = {}        # Dictionary<planet_id, TextIndex>, built by the first search
+    sync_marks = {}   # Dictionary<(planet_id, artist_id, tags, search_user), FNSFeed>
 
     def __addArtist(self, planet_id, account_no, artist):
         """ PRIVATE (FNSModule, string, FNSArtist) -> NoneType
@@ -149,6 +230,8 @@ class FNSModule():
         """
         if not feed_id in self.feeds:
             self.feeds[planet_id][feed_id] = feed
+            if planet_id in self.timelines:
+                self.timelines[planet_id].Add(feed.publish_ts, feed_id)
     
     def __addAttachment(self, planet_id, attachment_id, attachment):
         """ PRIVATE (FNSModule, string, FNSAttachment) -> NoneType
@@ -156,6 +239,50 @@ class FNSModule():
         """
         if not attachment_id in self.attachments:
             self.attachments[planet_id][attachment_id] = attachment
+            self.__indexAttachment(planet_id, attachment)
+
+    def __indexAttachment(self, planet_id, attachment, old_type = None):
+        """ PRIVATE (FNSModule, Int, FNSAttachment, String?) -> NoneType
+        Add attachment to the timeline of its type, removing it from the one of old_type,
+        if the timelines of the planet are built.
+        """
+        timelines = self.attachment_timelines.get(planet_id)
+        if timelines is None:
+            return
+        if old_type is not None and old_type in timelines:
+            timelines[old_type].Remove(attachment.publish_ts, attachment.attachment_id)
+        if not attachment.type in timelines:
+            timelines[attachment.type] = Timeline()
+        timelines[attachment.type].Add(attachment.publish_ts, attachment.attachment_id)
+
+    def __indexTags(self, planet_id, feed, old_tags = ()):
+        """ PRIVATE (FNSModule, Int, FNSFeed, List<String>) -> NoneType
+        Update the tag index with the tags of feed, replacing its old_tags
+        """
+        index = self.tags[planet_id]
+        for tag in old_tags:
+            if tag in index:
+                index[tag].discard(feed.feed_id)
+        for tag in feed.tags:
+            if not tag in index:
+                index[tag] = set()
+            index[tag].add(feed.feed_id)
+
+    def __processAttachment(self, planet_id, f, a):
+        """ PRIVATE (FNSModule, Int, Object, Object) -> FNSAttachment
+        Process parsed attachment JSON object a of FNS Feed JSON object f
+        """
+        if not a["account_no"] in self.artists[planet_id]:
+            # add dummy artist
+            self.__addArtist(planet_id, a["account_no"],
+                FNSArtist(a["account_no"], -1, "", "")
+            )
+        attach = FNSAttachment(a["id"])
+        attach.SetDate(f.get("create_date", ""), f.get("publish_date", ""))
+        attach.SetFile(a["file"], a["type"])
+        attach.SetArtist(self.artists[planet_id][a["account_no"]])
+        self.__addAttachment(planet_id, attach.attachment_id, attach)
+        return attach
 
     def __processFeed(self, planet_id, f):
         """ PRIVATE (FNSModule, Object) -> FNSFeed
@@ -167,7 +294,14 @@ class FNSModule():
         if f["id"] in self.feeds[planet_id]:
             # Should update the attachment
             for a in f["attach_urls"]:
-                self.attachments[planet_id][a["id"]].SetFile(a["file"], a["type"])
+                if a["id"] in self.attachments[planet_id]:
+                    attach = self.attachments[planet_id][a["id"]]
+                    old_type = attach.type
+                    attach.SetFile(a["file"], a["type"])
+                    if attach.type != old_type:
+                        self.__indexAttachment(planet_id, attach, old_type)
+                else:
+                    self.feeds[planet_id][f["id"]].AddAttachment(self.__processAttachment(planet_id, f, a))
             escape = True
             
         # parse the artist first
@@ -179,14 +313,14 @@ class FNSModule():
         elif self.artists[planet_id][f["account_no"]].artist_id == -1:
             # update
             self.artists[planet_id][f["account_no"]].artist_id = f["artist_id"]
-            self.artists[planet_id][f["account_no"]].nickname = f["nickname"]
+            self.artists[planet_id][f["account_no"]].nickname = intern_str(f["nickname"])
             self.artists[planet_id][f["account_no"]].profile_picture = f["profile_picture"]
         else:
             if self.artists[planet_id][f["account_no"]].profile_picture != f["profile_picture"]:
                 self.artists[planet_id][f["account_no"]].profile_picture = f["profile_picture"]
 
             if self.artists[planet_id][f["account_no"]].nickname != f["nickname"]:
-                self.artists[planet_id][f["account_no"]].nickname = f["nickname"]
+                self.artists[planet_id][f["account_no"]].nickname = intern_str(f["nickname"])
 
         if escape:
             return self.feeds[planet_id][f["id"]]
@@ -196,43 +330,43 @@ class FNSModule():
         feed.SetDate(f.get("create_date", ""), f.get("modify_date", ""), f.get("publish_date", ""))
         
         for a in f["attach_urls"]:
-            if not a["account_no"] in self.artists[planet_id]:
-                # add dummy artist
-                self.__addArtist(planet_id, a["account_no"],
-                    FNSArtist(a["account_no"], -1, "", "")
-                )
-            attach = FNSAttachment(a["id"])
-            attach.SetDate(f.get("create_date", ""), f.get("publish_date", ""))
-            attach.SetFile(a["file"], a["type"])
-            attach.SetArtist(self.artists[planet_id][a["account_no"]])
-            self.__addAttachment(planet_id, attach.attachment_id, attach)
-            feed.AddAttachment(attach)
+            feed.AddAttachment(self.__processAttachment(planet_id, f, a))
 
         for tag in f.get("tags", []):
             feed.AddTag(tag)
-            if not tag in self.tags:
-                self.tags[planet_id][tag] = []
-            self.tags[planet_id][tag].append(feed)
+        self.__indexTags(planet_id, feed)
 
         feed.SetArtist(self.artists[planet_id][f["account_no"]])
         self.__addFeed(planet_id, feed.feed_id, feed)
+        if planet_id in self.texts:
+            self.texts[planet_id].Add(feed.feed_id, feed.body)
         return feed
     
-    def __init__(self, sess):
-        """ (FNSModule, UserSession) -> NoneType
+    def __init__(self, sess, store = None):
+        """ (FNSModule, UserSession, Store?) -> NoneType
         Initialize FNSModule with given UserSession
+        If a Store is given, feeds saved in it are loaded first,
+        and every processed page of feeds is saved to it.
         """
         self.__SESS = sess
+        self.__STORE = store
         self.artists = {}
         self.feeds = {}
         self.attachments = {}
         self.tags = {}
+        self.timelines = {}
+        self.attachment_timelines = {}
+        self.texts = {}
+        self.sync_marks = {}
 
-    def LoadFeed(self, planet_id, artist_id = 1, next = 0.0, search_user = '', size = 10, tags = ''):
-        """ (FNSModule, Int, Int, Float, String, Int, String) -> (List<FNSFeed>, Float)
-        Load FNS feeds from given planet id and information.
-        Also, process feeds internally.
-        Returns a tuple of the list of feeds proceed and the next search parameter.
+        if store is not None:
+            for planet_id, f in store.LoadFeeds():
+                self.__initPlanet(planet_id)
+                self.__processFeed(planet_id, f)
+
+    def __initPlanet(self, planet_id):
+        """ PRIVATE (FNSModule, Int) -> NoneType
+        Prepare the dictionaries of given planet id.
         """
         if not planet_id in self.artists:
             self.artists[planet_id] = dict()
@@ -240,6 +374,28 @@ class FNSModule():
             self.attachments[planet_id] = dict()
             self.tags[planet_id] = dict()
 
+    def ProcessFeeds(self, planet_id, fns_obj):
+        """ (FNSModule, Int, Object) -> (List<FNSFeed>, Float)
+        Process the "fns" object of a FNS feed response.
+        Returns a tuple of the list of feeds proceed and the next search parameter.
+        """
+        self.__initPlanet(planet_id)
+
+        added = []
+        for feed in fns_obj["feeds"]:
+            f =  self.__processFeed(planet_id, feed)
+            if f is not None:
+                added.append(f)
+
+        if self.__STORE is not None:
+            self.__STORE.SaveFeeds(planet_id, fns_obj["feeds"])
+        
+        return added, fns_obj["next"]
+
+    def __fetchFeed(self, planet_id, artist_id, next, search_user, size, tags):
+        """ PRIVATE (FNSModule, Int, Int, Float, String, Int, String) -> Object
+        Fetch the "fns" object of a FNS feed page without processing it.
+        """
         code, fns_obj, _ = self.__SESS.Get("https://api.universe-official.io/fns/feeds", {
             "planet_id": planet_id, "artist_id": artist_id, "next": next,
             "search_user": search_user, "size": size, "tags": tags
@@ -248,12 +404,281 @@ class FNSModule():
         if code != 0:
             raise Exception("Error while fetching FNS feed")
 
-        fns_obj = fns_obj["fns"]
+        return fns_obj["fns"]
 
-        added = []
-        for feed in fns_obj["feeds"]:
-            f =  self.__processFeed(planet_id, feed)
-            if f is not None:
-                added.append(f)
-        
-        return added, fns_obj["next"]
+    def LoadFeed(self, planet_id, artist_id = 1, next = 0.0, search_user = '', size = 10, tags = ''):
+        """ (FNSModule, Int, Int, Float, String, Int, String) -> (List<FNSFeed>, Float)
+        Load FNS feeds from given planet id and information.
+        Also, process feeds internally.
+        Returns a tuple of the list of feeds proceed and the next search parameter.
+        """
+        fns_obj = self.__fetchFeed(planet_id, artist_id, next, search_user, size, tags)
+        return self.ProcessFeeds(planet_id, fns_obj)
+
+    def IterFeedPages(self, planet_id, artist_id = 1, next = 0.0, search_user = '', page_size = 10, tags = '', limit = None,
+                      raw = False):
+        """ (FNSModule, Int, Int, Float, String, Int, String, Int?, Boolean) -> Generator<(List<FNSFeed>, Float)>
+        Load FNS feeds page by page, following the next search parameter until the last page,
+        or until limit feeds are loaded. Yields the same tuples as LoadFeed.
+        If raw, the parsed FNS Feed JSON objects of each page are yielded instead, without processing them.
+        The following page is fetched on a worker thread while the current one is consumed,
+        so at most two pages are held by the generator.
+        """
+        loaded = 0
+        executor = ThreadPoolExecutor(max_workers = 1)
+        future = executor.submit(self.__fetchFeed, planet_id, artist_id, next, search_user, page_size, tags)
+        try:
+            while future is not None:
+                fns_obj = future.result()
+                cursor = fns_obj["next"]
+                loaded += len(fns_obj["feeds"])
+
+                future = None
+                if fns_obj["feeds"] and cursor and cursor != next and (limit is None or loaded < limit):
+                    future = executor.submit(self.__fetchFeed, planet_id, artist_id, cursor, search_user, page_size, tags)
+                next = cursor
+
+                yield (fns_obj["feeds"], cursor) if raw else self.ProcessFeeds(planet_id, fns_obj)
+        finally:
+            # the consumer may have stopped early, do not wait for an unused page
+            executor.shutdown(wait = False, cancel_futures = True)
+
+    def IterFeeds(self, planet_id, artist_id = 1, limit = None, page_size = 10, search_user = '', tags = '', next = 0.0):
+        """ (FNSModule, Int, Int, Int?, Int, String, String, Float) -> Generator<FNSFeed>
+        Load FNS feeds one by one, following the next search parameter automatically.
+        At most limit feeds are yielded if given. See IterFeedPages.
+        """
+        count = 0
+        for feeds, _ in self.IterFeedPages(planet_id, artist_id, next, search_user, page_size, tags, limit):
+            for feed in feeds:
+                if limit is not None and count >= limit:
+                    return
+                count += 1
+                yield feed
+
+    def SyncFeeds(self, planet_id, artist_id = 1, search_user = '', tags = '', page_size = 10, max_pages = None):
+        """ (FNSModule, Int, Int, String, String, Int, Int?) -> List<FNSFeed>
+        Load the FNS feeds changed since the last SyncFeeds with the same query.
+        The newest feed of each query is kept as its high-water mark, and pagination stops
+        after the page reaching a loaded, unmodified feed published no later than the mark.
+        The first sync of a query has no mark and scans every page (up to max_pages).
+        Returns the list of new and modified feeds, newest first.
+        """
+        key = (planet_id, artist_id, tags, search_user)
+        mark = self.sync_marks.get(key)
+        newest = None
+        changed = []
+
+        next = 0.0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            fns_obj = self.__fetchFeed(planet_id, artist_id, next, search_user, page_size, tags)
+            pages += 1
+
+            page_changed, page_newest, reached = self.ProcessSyncPage(planet_id, fns_obj, mark)
+            changed += page_changed
+            if newest is None:
+                newest = page_newest
+
+            cursor = fns_obj["next"]
+            if reached or not fns_obj["feeds"] or not cursor or cursor == next:
+                break
+            next = cursor
+
+        if newest is not None:
+            self.sync_marks[key] = newest
+        return changed
+
+    def ProcessSyncPage(self, planet_id, fns_obj, mark = None):
+        """ (FNSModule, Int, Object, FNSFeed?) -> (List<FNSFeed>, FNSFeed?, Boolean)
+        Process the "fns" object of a FNS feed response for SyncFeeds:
+        feeds modified since they were loaded get their body, dates and tags updated.
+        Returns the new and modified feeds of the page, its first feed,
+        and whether it reached the high-water mark of the sync.
+        """
+        self.__initPlanet(planet_id)
+
+        newest = None
+        changed = []
+        reached = False
+        for f in fns_obj["feeds"]:
+            known = self.feeds[planet_id].get(f["id"])
+            feed = self.__processFeed(planet_id, f)
+            if newest is None:
+                newest = feed
+
+            if known is None:
+                changed.append(feed)
+            elif f.get("modify_date", "") and known.modify_ts != convert_epoch(f["modify_date"]):
+                text = self.texts.get(planet_id)
+                if text is not None:
+                    text.Remove(feed.feed_id, feed.body)
+                feed.SetBody(f["body"])
+                if text is not None:
+                    text.Add(feed.feed_id, feed.body)
+                feed.SetDate(modify = f["modify_date"])
+                old_tags, feed.tags = feed.tags, []
+                for tag in f.get("tags", []):
+                    feed.AddTag(tag)
+                self.__indexTags(planet_id, feed, old_tags)
+                changed.append(feed)
+            elif mark is not None and (feed is mark or (feed.publish_ts or 0) <= (mark.publish_ts or 0)):
+                reached = True
+
+        if self.__STORE is not None:
+            self.__STORE.SaveFeeds(planet_id, fns_obj["feeds"])
+        return changed, newest, reached
+
+    def QueryTags(self, planet_id, all_of = (), any_of = (), none_of = (), account_no = None, since = None, until = None,
+                  limit = None):
+        """ (FNSModule, Int, List<String>, List<String>, List<String>, Int?, Int?, Int?, Int?) -> List<FNSFeed>
+        Find loaded feeds of a planet by tags, without calling the API.
+        Feeds must have every tag of all_of, at least one tag of any_of if given, and no tag of none_of.
+        They can be filtered further by artist account_no and publish date range [since, until] in epoch seconds.
+        Returns the list of feeds, newest first, with at most limit feeds if given.
+        """
+        if not planet_id in self.tags:
+            return []
+        index = self.tags[planet_id]
+
+        if all_of:
+            # intersect from the rarest tag
+            sets = sorted((index.get(tag, set()) for tag in all_of), key = len)
+            ids = set(sets[0])
+            for other in sets[1:]:
+                ids &= other
+        elif any_of:
+            ids = set()
+        else:
+            ids = set(self.feeds[planet_id])
+
+        if any_of:
+            matched = set().union(*(index.get(tag, set()) for tag in any_of))
+            ids = ids & matched if all_of else matched
+
+        for tag in none_of:
+            ids -= index.get(tag, set())
+
+        result = []
+        for feed_id in ids:
+            feed = self.feeds[planet_id][feed_id]
+            if account_no is not None and feed.artist.account_no != account_no:
+                continue
+            if since is not None and (feed.publish_ts is None or feed.publish_ts < since):
+                continue
+            if until is not None and (feed.publish_ts is None or feed.publish_ts > until):
+                continue
+            result.append(feed)
+
+        if limit is not None:
+            return nlargest(limit, result, key = lambda feed: feed.publish_ts or 0)
+        result.sort(key = lambda feed: feed.publish_ts or 0, reverse = True)
+        return result
+
+    def SearchFeeds(self, planet_id, query, phrase = False, prefix = False, account_no = None, limit = None):
+        """ (FNSModule, Int, String, Boolean, Boolean, Int?, Int?) -> List<FNSFeed>
+        Search loaded feeds of a planet by their body, without calling the API.
+        Feeds must contain every word of query, or the exact query (ignoring case and spaces) if phrase is True.
+        If prefix is True, the last word of query may also be the beginning of a longer word.
+        Korean, Japanese and Chinese text are matched by character bigrams, see Index.tokenize.
+        The text index of the planet is built by the first search, and kept up to date after it.
+        Returns the list of feeds, newest first, with at most limit feeds if given.
+        """
+        if not planet_id in self.feeds:
+            return []
+        if not planet_id in self.texts:
+            text = self.texts[planet_id] = TextIndex()
+            for feed in self.feeds[planet_id].values():
+                text.Add(feed.feed_id, feed.body)
+        ids = self.texts[planet_id].Find(query, prefix)
+        timeline = self.__timeline(planet_id, account_no)
+        if not ids or timeline is None:
+            return []
+
+        feeds = self.feeds[planet_id]
+        if limit is not None and len(ids) * 64 >= len(timeline):
+            # frequent terms, walk the timeline from the newest instead of ranking every candidate
+            result = (feeds[feed_id] for feed_id in timeline if feed_id in ids)
+        else:
+            result = [feeds[feed_id] for feed_id in ids]
+            if account_no is not None:
+                result = [feed for feed in result if feed.artist.account_no == account_no]
+            if limit is not None and not phrase:
+                return nlargest(limit, result, key = lambda feed: feed.publish_ts or 0)
+            result.sort(key = lambda feed: feed.publish_ts or 0, reverse = True)
+
+        if phrase:
+            text = normalize(query)
+            result = (feed for feed in result if text in normalize(feed.body or ""))
+        return list(islice(result, limit))
+
+    def FeedsBetween(self, planet_id, since = None, until = None, account_no = None, limit = None):
+        """ (FNSModule, Int, Int?, Int?, Int?, Int?) -> List<FNSFeed>
+        Find loaded feeds of a planet published between since and until in epoch seconds (both inclusive),
+        of the artist account_no if given, without calling the API.
+        Returns the list of feeds, newest first, with at most limit feeds if given.
+        """
+        timeline = self.__timeline(planet_id, account_no)
+        if timeline is None:
+            return []
+        return [self.feeds[planet_id][feed_id] for feed_id in timeline.Range(since, until, limit)]
+
+    def LatestFeeds(self, planet_id, n, account_no = None):
+        """ (FNSModule, Int, Int, Int?) -> List<FNSFeed>
+        Returns the n newest loaded feeds of a planet, or of the artist account_no if given.
+        """
+        timeline = self.__timeline(planet_id, account_no)
+        if timeline is None:
+            return []
+        return [self.feeds[planet_id][feed_id] for feed_id in timeline.Latest(n)]
+
+    def PageFeeds(self, planet_id, cursor = None, size = 20, account_no = None):
+        """ (FNSModule, Int, Object?, Int, Int?) -> (List<FNSFeed>, Object?)
+        Page through loaded feeds of a planet, or of the artist account_no if given, newest first.
+        Returns a page of at most size feeds and the cursor of the following page, None on the last page.
+        Feeds loaded between two calls are included only if they are older than the cursor.
+        """
+        timeline = self.__timeline(planet_id, account_no)
+        if timeline is None:
+            return [], None
+        feed_ids, cursor = timeline.Page(cursor, size)
+        return [self.feeds[planet_id][feed_id] for feed_id in feed_ids], cursor
+
+    def LatestAttachments(self, planet_id, n, type = None):
+        """ (FNSModule, Int, Int, String?) -> List<FNSAttachment>
+        Returns the n newest loaded attachments of a planet, of given type ("image", "video", ...) if given.
+        """
+        if not planet_id in self.attachments:
+            return []
+        attachments = self.attachments[planet_id]
+        timelines = self.attachment_timelines.get(planet_id)
+        if timelines is None:
+            entries = {}
+            for a in attachments.values():
+                entries.setdefault(a.type, []).append((a.publish_ts, a.attachment_id))
+            timelines = self.attachment_timelines[planet_id] = {t: Timeline(e) for t, e in entries.items()}
+        if type is not None:
+            if not type in timelines:
+                return []
+            return [attachments[a] for a in timelines[type].Latest(n)]
+
+        # the newest n of every type contain the newest n overall
+        latest = [attachments[a] for t in timelines.values() for a in t.Latest(n)]
+        return nlargest(n, latest, key = lambda a: a.publish_ts or 0)
+
+    def __timeline(self, planet_id, account_no = None):
+        """ PRIVATE (FNSModule, Int, Int?) -> Timeline?
+        Find the feed timeline of a planet, or of an artist of the planet, building it on first use.
+        """
+        if not planet_id in self.feeds:
+            return None
+        if account_no is None:
+            if not planet_id in self.timelines:
+                self.timelines[planet_id] = Timeline((f.publish_ts, f.feed_id) for f in self.feeds[planet_id].values())
+            return self.timelines[planet_id]
+        if not account_no in self.artists[planet_id]:
+            return None
+        artist = self.artists[planet_id][account_no]
+        if artist.timeline is None:
+            artist.timeline = Timeline((f.publish_ts, f.feed_id) for f in artist.feeds.values())
+        return artist.timeline
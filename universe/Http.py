@@ -1,9 +1,20 @@
 import requests
 import json
+import hmac
+import hashlib
 
-from authlib.jose import JsonWebEncryption, jwt 
-from time import time
-from .util import merge, parse_bearer_token
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from authlib.common.encoding import json_b64encode, json_dumps, urlsafe_b64encode, urlsafe_b64decode
+from authlib.jose import JsonWebEncryption, OctKey
+from authlib.jose.errors import DecodeError
+from authlib.jose.util import extract_header
+from time import time, perf_counter, sleep
+from .util import merge, parse_bearer_token, json_loads, SingleFlight
+from .Metrics import endpoint_of
+from .Limiter import retry_after_seconds
 
 class Http():
     """
@@ -21,57 +32,214 @@ class Http():
     JWE = None
     KEK = ""
 
-    __PROXY = None
-    __VERIFY = True
+    # headers of the inner JWT and of the JWE wrapping it
+    JWT_HEADER = {"alg": "HS256", "typ": "JWT"}
+    JWE_HEADER = {"alg": "A256KW", "enc": "A256CBC-HS512", "zip": "DEF", "typ": "JWT"}
+
+    __KEY = b""
+    __JWT_SEGMENT = b""
+    __JWT_MAC = None
+    __JWE_KEY = None
+    __JWE_SEGMENT = b""
+    __JWE_ALG = None
+    __JWE_ENC = None
+    __JWE_ZIP = None
+    __JWE_HEADERS = None    # Dictionary<bytes, (alg, enc, zip, header)> of response protected headers
+
+    __JWE_CACHE = None
+    __JWE_CACHE_SIZE = 0
+    __JWE_LOCK = None
+
+    __CACHE = None
+    __FLIGHT = None
+
+    __SESSION = None
+    __ADAPTER = None
+    __TIMEOUT = None
+    __KEEP_ALIVE = None
+    __LAST_USED = 0
+    __HOSTS = None
+    __METRICS = None
+    __LIMITER = None
+    __CONCURRENCY = None
+    __RETRY = None
+    __HEDGE = None
+    __EXECUTOR = None       # runs hedged Get
+    __STATS = None
+    __STATS_LOCK = None
+
+    def __prepareKey(self, key):
+        """ PRIVATE (Http, List<Int>) -> NoneType
+        Prepare the key material, protected headers and algorithms once,
+        so that generating a JWE does not have to do it every time.
+        """
+        self.__KEY = bytes(bytearray(key))
+
+        self.__JWT_SEGMENT = json_b64encode(self.JWT_HEADER)
+        self.__JWT_MAC = hmac.new(self.__KEY, digestmod = hashlib.sha256)
+
+        self.__JWE_KEY = OctKey.import_key(self.__KEY)
+        self.__JWE_SEGMENT = json_b64encode(self.JWE_HEADER)
+        self.__JWE_ALG = JsonWebEncryption.ALG_REGISTRY[self.JWE_HEADER["alg"]]
+        self.__JWE_ENC = JsonWebEncryption.ENC_REGISTRY[self.JWE_HEADER["enc"]]
+        self.__JWE_ZIP = JsonWebEncryption.ZIP_REGISTRY[self.JWE_HEADER["zip"]]
+        self.__JWE_HEADERS = {}
+
+    def __encodeJWE(self, real_payload):
+        """ PRIVATE (Http, Object) -> String
+        Sign real_payload as a HS256 JWT, then encrypt it as a compact JWE.
+        This is what jwt.encode and JWE.serialize_compact do, with the prepared headers and key.
+        """
+        # inner JWT (will be JWE payload)
+        signing_input = self.__JWT_SEGMENT + b"." + urlsafe_b64encode(json_dumps(real_payload).encode("utf-8"))
+        mac = self.__JWT_MAC.copy()
+        mac.update(signing_input)
+        jwt_str = signing_input + b"." + urlsafe_b64encode(mac.digest())
+
+        # generate real JWE
+        payload = b"\xef\xbb\xbf" + jwt_str # BOM is required
+        wrapped = self.__JWE_ALG.wrap(self.__JWE_ENC, self.JWE_HEADER, self.__JWE_KEY)
+        iv = self.__JWE_ENC.generate_iv()
+        ciphertext, tag = self.__JWE_ENC.encrypt(self.__JWE_ZIP.compress(payload),
+                                                 self.__JWE_SEGMENT, iv, wrapped["cek"])
+        return b".".join([
+            self.__JWE_SEGMENT,
+            urlsafe_b64encode(wrapped["ek"]),
+            urlsafe_b64encode(iv),
+            urlsafe_b64encode(ciphertext),
+            urlsafe_b64encode(tag)
+        ]).decode()
+
+    def __decodeJWE(self, compact):
+        """ PRIVATE (Http, bytes) -> bytes
+        Decrypt a compact JWE and returns its payload, working on bytes only.
+        This is what JWE.deserialize_compact does, with the algorithms of each
+        protected header looked up once and the prepared key.
+        """
+        protected_s, ek_s, iv_s, ciphertext_s, tag_s = compact.split(b".")
+        algorithms = self.__JWE_HEADERS.get(protected_s)
+        if algorithms is None:
+            protected = extract_header(protected_s, DecodeError)
+            algorithms = (self.JWE.get_header_alg(protected), self.JWE.get_header_enc(protected),
+                          self.JWE.get_header_zip(protected), protected)
+            if len(self.__JWE_HEADERS) < 16:
+                self.__JWE_HEADERS[protected_s] = algorithms
+
+        alg, enc, zip_alg, protected = algorithms
+        cek = alg.unwrap(enc, urlsafe_b64decode(ek_s), protected, self.__JWE_KEY)
+        msg = enc.decrypt(urlsafe_b64decode(ciphertext_s), protected_s, urlsafe_b64decode(iv_s),
+                          urlsafe_b64decode(tag_s), cek)
+        return zip_alg.decompress(msg) if zip_alg else msg
 
     def __generateJWE(self, jwe_payload):
         """ PRIVATE (Http, Object) -> String
         Create a JWE string with given jwe_payload and user authorities.
+        If the JWE cache is enabled, the same payload of the same account reuses its JWE.
         """
-        real_payload = merge({
+        if self.__JWE_CACHE_SIZE <= 0:
+            return self.__encodeJWE(merge({
+                "account_no": self.ACCOUNT_NO,
+                "np_game_account_id": self.NP_GAME_ACCOUNT_ID
+            }, jwe_payload))
+
+        key = (self.ACCOUNT_NO, json.dumps(jwe_payload, sort_keys = True))
+        with self.__JWE_LOCK:
+            if key in self.__JWE_CACHE:
+                self.__JWE_CACHE.move_to_end(key)
+                return self.__JWE_CACHE[key]
+
+        jwe_str = self.__encodeJWE(merge({
             "account_no": self.ACCOUNT_NO,
             "np_game_account_id": self.NP_GAME_ACCOUNT_ID
-        }, jwe_payload)
-
-        # inner JWT (will be JWE payload)
-        header = {
-            "alg": "HS256",
-            "typ": "JWT"
-        }
-        jwt_str = jwt.encode(header, real_payload, bytes(bytearray(self.KEK))).decode()
+        }, jwe_payload))
 
-        # generate real JWE
-        header = {
-            "alg": "A256KW",
-            "enc": "A256CBC-HS512",
-            "zip": "DEF",
-            "typ": "JWT"
-        }
-        payload = jwt_str.encode("utf-8-sig") # BOM is required
-        return self.JWE.serialize_compact(header, payload, self.KEK).decode()
+        with self.__JWE_LOCK:
+            self.__JWE_CACHE[key] = jwe_str
+            while len(self.__JWE_CACHE) > self.__JWE_CACHE_SIZE:
+                self.__JWE_CACHE.popitem(last = False)
+        return jwe_str
 
-    def __handleResponse(self, resp):
-        """ PRIVATE (Http, requests.Response) -> (Int, Object | String, NoneType | Object | String)
-        Process the given HTTP Response object properly, then try to decrypt and parse.
+    def __handleResponse(self, resp, phases = None):
+        """ PRIVATE (Http, requests.Response, Dictionary<String, Float>?) -> (Int, Object | String, NoneType | Object | String)
+        Process the given HTTP Response object properly, then try to decrypt and parse its raw bytes.
         If there isn't any problem, (0, Object, None) will be returned.
         Otherwise, (Int, String, Object) will be returned.
+        If phases is given, the decrypt and parse time are stored in it.
         """
+        if resp.status_code == 429:
+            return 1097, "Too many requests", resp
         if resp.status_code != 200:
             return 1098, "HTTP request failed", resp
+
+        start = perf_counter() if phases is not None else 0
         try:
-            decrypted = self.JWE.deserialize_compact(resp.text, self.KEK)
-            try:
-                return 0, json.loads(decrypted["payload"].decode())["data"], None
-            except:
-                return 1002, "Abnormal API response", decrypted["payload"]
+            payload = self.__decodeJWE(resp.content)
         except:
             return 1001, "Decryption failed", resp.text
-        
-        
 
-    def __init__(self, bearer, key):
-        """ (Http, String, List<Int>) -> NoneType
+        if phases is not None:
+            now = perf_counter()
+            phases["decrypt"] = now - start
+            start = now
+        try:
+            data = json_loads(payload)["data"]
+        except:
+            return 1002, "Abnormal API response", payload
+
+        if phases is not None:
+            phases["parse"] = perf_counter() - start
+        return 0, data, None
+
+    def __mountPool(self, pool_connections, pool_maxsize, pool_block):
+        """ PRIVATE (Http, Int, Int, Boolean) -> NoneType
+        Create the keep-alive connection pool and mount it for both schemes.
+        pool_connections is the number of hosts kept pooled, pool_maxsize
+        is the number of connections kept per host. If pool_block is True,
+        pool_maxsize is a hard per-host limit and callers wait for a free connection.
+        """
+        self.__ADAPTER = HTTPAdapter(pool_connections = pool_connections,
+                                     pool_maxsize = pool_maxsize,
+                                     pool_block = pool_block)
+        self.__SESSION.mount("https://", self.__ADAPTER)
+        self.__SESSION.mount("http://", self.__ADAPTER)
+
+    def __request(self, method, target, **kwargs):
+        """ PRIVATE (Http, String, String, ...) -> requests.Response
+        Send a request through the connection pool.
+        Connections idle for longer than keep_alive seconds are dropped first,
+        since the server has most likely closed them already.
+        """
+        if self.__HOSTS:
+            for origin, replacement in self.__HOSTS.items():
+                if target.startswith(origin):
+                    target = replacement + target[len(origin):]
+                    break
+
+        now = time()
+        if self.__KEEP_ALIVE is not None and now - self.__LAST_USED > self.__KEEP_ALIVE:
+            self.__ADAPTER.poolmanager.clear()
+        self.__LAST_USED = now
+
+        return self.__SESSION.request(method, target, timeout = self.__TIMEOUT, **kwargs)
+
+    def __init__(self, bearer, key, pool_connections = 4, pool_maxsize = 10, pool_block = False,
+                 keep_alive = 60, timeout = (5, 30), jwe_cache_size = 0, cache = None, coalesce = True, hosts = None,
+                 metrics = None, limiter = None, concurrency = None, retry = None, hedge = None):
+        """ (Http, String, List<Int>, Int, Int, Boolean, Int?, (Float, Float)?, Int, ResponseCache?, Boolean, Dictionary<String, String>?, Metrics?, RateLimiter?, AIMDController?, RetryPolicy?, HedgePolicy?) -> NoneType
         Create new Http instance with specific bearer token and JWE KEK.
+        Every request goes through a persistent connection pool owned by this instance.
+        keep_alive is the maximum idle time of a pooled connection in seconds (None to keep forever),
+        timeout is the (connect, read) timeout of each request (None to wait forever).
+        If jwe_cache_size is positive, up to that many Payload JWE are kept and reused
+        for identical queries until the token is updated.
+        If a ResponseCache is given, successful Get responses are served from it while fresh.
+        Unless coalesce is False, concurrent Get of the same target and query share one request.
+        hosts maps origins to the ones requests are sent to instead,
+        e.g. {"https://api.universe-official.io": "http://127.0.0.1:8080"} for a local server.
+        If Metrics is given, every request is timed and recorded into it.
+        A RateLimiter and an AIMDController, which can be shared between instances and threads,
+        limit the rate and the number in flight of requests; throttled responses (429) return code 1097.
+        A RetryPolicy sends transiently failed requests again, a HedgePolicy duplicates slow Get.
         """
         # check the validity of bearer token
         exp, no, id, _ = parse_bearer_token(bearer)
@@ -84,6 +252,28 @@ class Http():
         self.NP_GAME_ACCOUNT_ID = id
         self.JWE = JsonWebEncryption()
         self.KEK = key
+        self.__prepareKey(key)
+
+        self.__JWE_CACHE = OrderedDict()
+        self.__JWE_CACHE_SIZE = jwe_cache_size
+        self.__JWE_LOCK = Lock()
+        self.__CACHE = cache
+        self.__FLIGHT = SingleFlight() if coalesce else None
+
+        self.__SESSION = requests.Session()
+        self.__mountPool(pool_connections, pool_maxsize, pool_block)
+        self.__TIMEOUT = timeout
+        self.__KEEP_ALIVE = keep_alive
+        self.__HOSTS = dict(hosts or {})
+        self.__METRICS = metrics
+        self.__LIMITER = limiter
+        self.__CONCURRENCY = concurrency
+        self.__RETRY = retry
+        self.__HEDGE = hedge
+        if hedge is not None:
+            self.__EXECUTOR = ThreadPoolExecutor(max_workers = max(16, pool_maxsize * 4))
+        self.__STATS = {"retries": 0, "hedges": 0, "hedges_won": 0}
+        self.__STATS_LOCK = Lock()
 
     def UpdateToken(self, new_bearer, preserve_user = True):
         """ (Http, String, Boolean) -> NoneType
@@ -110,28 +300,217 @@ class Http():
         self.BEARER = new_bearer
         self.EXP = exp
 
+        with self.__JWE_LOCK:
+            self.__JWE_CACHE.clear()
+
     def Get(self, target, query = {}):
         """ (Http, String, Object) -> (Int, Object | String, NoneType | Object | String)
         Attemp to call API GET request to target, and parse it.
         Returns code 0 and parsed result if succeed.
         Otherwise, returns a positive number with message.
         """
+        if self.__CACHE is not None:
+            hit, data = self.__CACHE.Get(self.ACCOUNT_NO, target, query)
+            if hit:
+                if self.__METRICS is not None:
+                    self.__METRICS.Event(endpoint_of(target), "cache_hit")
+                return 0, data, None
         
         if self.EXP < time():
             return 9999, "Token has been expired", None
 
-        payload = self.__generateJWE(query)
-        resp = requests.get(target, headers = {
-            "Payload": payload,
+        if self.__FLIGHT is None:
+            return self.__get(target, query)
+        key = (self.ACCOUNT_NO, target, json.dumps(query, sort_keys = True))
+        return self.__FLIGHT.Do(key, self.__get, target, query)
+
+    def __get(self, target, query):
+        """ PRIVATE (Http, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        Send API GET request to target, then parse and cache the response.
+        """
+        code, data, msg = self.__retrying("GET", target, query)
+        if code == 0 and self.__CACHE is not None:
+            self.__CACHE.Put(self.ACCOUNT_NO, target, query, data)
+        return code, data, msg
+
+    def __retrying(self, method, target, query, data = None):
+        """ PRIVATE (Http, String, String, Object, Object?) -> (Int, Object | String, NoneType | Object | String)
+        Send API request to target (hedged if it is a Get and a HedgePolicy is given),
+        and send it again after a delay while it fails transiently, as the RetryPolicy allows.
+        """
+        endpoint = endpoint_of(target)
+        send = self.__send
+        if method == "GET" and self.__HEDGE is not None and self.__HEDGE.Hedged(endpoint):
+            send = self.__hedged
+
+        policy = self.__RETRY
+        if policy is None:
+            return send(method, target, query, data)
+
+        attempts = policy.Attempts(method, endpoint)
+        for attempt in range(attempts):
+            try:
+                code, result, msg = send(method, target, query, data)
+            except requests.RequestException:
+                if attempt + 1 >= attempts:
+                    raise
+                delay = policy.Delay(attempt)
+            else:
+                status = msg.status_code if isinstance(msg, requests.Response) else None
+                if attempt + 1 >= attempts or not policy.Retryable(code, status):
+                    return code, result, msg
+                retry_after = retry_after_seconds(msg.headers.get("Retry-After")) if status is not None else None
+                delay = policy.Delay(attempt, retry_after)
+
+            self.__count("retries", endpoint, "retry")
+            sleep(delay)
+
+    def __hedged(self, method, target, query, data = None):
+        """ PRIVATE (Http, String, String, Object, Object?) -> (Int, Object | String, NoneType | Object | String)
+        Send API request to target, and a duplicate if no response came within the hedge delay.
+        The first successful response is returned, the other request is left to finish unused.
+        """
+        endpoint = endpoint_of(target)
+        delay = self.__HEDGE.Delay(endpoint)
+        if delay is None:
+            return self.__observed(endpoint, method, target, query, data)
+
+        primary = self.__EXECUTOR.submit(self.__observed, endpoint, method, target, query, data)
+        done, _ = wait([primary], timeout = delay)
+        if done:
+            return primary.result()
+
+        self.__count("hedges", endpoint, "hedge")
+        hedge = self.__EXECUTOR.submit(self.__observed, endpoint, method, target, query, data)
+        pending = {primary, hedge}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when = FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and future.result()[0] == 0:
+                    winner = future
+                    break
+
+        if winner is None:
+            # both failed, report the original request
+            return primary.result()
+        if winner is hedge:
+            self.__count("hedges_won", endpoint, "hedge_won")
+        return winner.result()
+
+    def __observed(self, endpoint, method, target, query, data):
+        """ PRIVATE (Http, String, String, String, Object, Object?) -> (Int, Object | String, NoneType | Object | String)
+        Send API request to target, adding its latency to the HedgePolicy if it succeeds.
+        """
+        start = perf_counter()
+        result = self.__send(method, target, query, data)
+        if result[0] == 0:
+            self.__HEDGE.Observe(endpoint, perf_counter() - start)
+        return result
+
+    def __count(self, counter, endpoint, event):
+        """ PRIVATE (Http, String, String, String) -> NoneType
+        Increment a retry statistic, and count the event of endpoint in metrics if enabled.
+        """
+        with self.__STATS_LOCK:
+            self.__STATS[counter] += 1
+        if self.__METRICS is not None:
+            self.__METRICS.Event(endpoint, event)
+
+    def RetryStats(self):
+        """ (Http) -> Dictionary<String, Int>
+        Returns the number of retried requests, of hedged Get and of hedges which returned first.
+        """
+        with self.__STATS_LOCK:
+            return dict(self.__STATS)
+
+    def __send(self, method, target, query, data = None):
+        """ PRIVATE (Http, String, String, Object, Object?) -> (Int, Object | String, NoneType | Object | String)
+        Send API request to target with query as Payload JWE, and data as JWE body for POST.
+        Then handle the response, timing each phase if metrics are enabled.
+        """
+        metrics = self.__METRICS
+        if metrics is not None:
+            start = perf_counter()
+
+        headers = {
+            "Payload": self.__generateJWE(query),
             "Accept": "text/plain",
             "Authorization": "Bearer {}".format(self.BEARER),
             "User-Agent": None
-            },
-            proxies = self.__PROXY,
-            verify = self.__VERIFY
-        )
+        }
+        body = None
+        if method == "POST":
+            headers["Content-Type"] = "application/json; charset=utf-8"
+            body = self.__generateJWE(data)
+
+        if metrics is None and self.__LIMITER is None and self.__CONCURRENCY is None:
+            return self.__handleResponse(self.__request(method, target, headers = headers, data = body))
+
+        endpoint = endpoint_of(target)
+        phases = None
+        if metrics is not None:
+            phases = {"encrypt": perf_counter() - start}
 
-        return self.__handleResponse(resp)
+        queued = perf_counter()
+        self.__admit(endpoint)
+        sent = perf_counter()
+        if phases is not None and (self.__LIMITER is not None or self.__CONCURRENCY is not None):
+            phases["queue"] = sent - queued
+
+        resp = None
+        try:
+            resp = self.__request(method, target, headers = headers, data = body, stream = metrics is not None)
+            received = perf_counter()
+            content = resp.content
+        except Exception:
+            if metrics is not None:
+                metrics.Record({"endpoint": endpoint, "method": method, "status": None, "code": "error",
+                                "phases": phases, "request_bytes": len(headers["Payload"]) + len(body or ""),
+                                "response_bytes": 0})
+            raise
+        finally:
+            self.__release(endpoint, resp, perf_counter() - sent)
+
+        if phases is None:
+            return self.__handleResponse(resp)
+
+        phases["connect_wait"] = received - sent
+        phases["read"] = perf_counter() - received
+        result = self.__handleResponse(resp, phases)
+        metrics.Record({"endpoint": endpoint, "method": method, "status": resp.status_code,
+                        "code": result[0], "phases": phases,
+                        "request_bytes": len(headers["Payload"]) + len(body or ""), "response_bytes": len(content)})
+        return result
+
+    def __admit(self, endpoint):
+        """ PRIVATE (Http, String) -> NoneType
+        Wait for the rate limiter and the concurrency limit before sending a request to endpoint.
+        """
+        if self.__LIMITER is not None:
+            self.__LIMITER.Acquire(endpoint)
+        if self.__CONCURRENCY is not None:
+            self.__CONCURRENCY.Acquire()
+
+    def __release(self, endpoint, resp, latency):
+        """ PRIVATE (Http, String, requests.Response?, Float) -> NoneType
+        Report the outcome of a request to endpoint to the limiters.
+        resp is None if the request failed on the network.
+        A 429 or 503 response blocks the endpoint for the time given by its Retry-After header.
+        """
+        status = resp.status_code if resp is not None else None
+        if self.__LIMITER is not None and status in (429, 503):
+            seconds = retry_after_seconds(resp.headers.get("Retry-After"))
+            if seconds:
+                self.__LIMITER.Penalize(endpoint, seconds)
+        if self.__CONCURRENCY is not None:
+            self.__CONCURRENCY.Release(latency, ok = status is not None and status != 429 and status < 500)
+
+    def CoalescedCount(self):
+        """ (Http) -> Int
+        Returns the number of Get calls which shared the request of another call.
+        """
+        return self.__FLIGHT.shared if self.__FLIGHT is not None else 0
 
     def Post(self, target, query = {}, data = {}):
         """ (Http, String, Object, Object) -> (Int, Object | String, NoneType | Object | String)
@@ -142,35 +521,47 @@ class Http():
         if self.EXP < time():
             return 9999, "Token has been expired", None
 
-        payload = self.__generateJWE(query)
-        body = self.__generateJWE(data)
-        resp = requests.post(target, headers = {
-            "Payload": payload,
-            "Accept": "text/plain",
-            "Content-Type": "application/json; charset=utf-8",
-            "Authorization": "Bearer {}".format(self.BEARER),
-            "User-Agent": None
-            },
-            data = body,
-            proxies = self.__PROXY,
-            verify = self.__VERIFY
-        )
-
-        return self.__handleResponse(resp)
+        return self.__retrying("POST", target, query, data)
 
     def setProxy(self, https_proxy = ""):
         """ (Http, String) -> NoneType
         Set HTTPS proxy as given url.
         In addition, disable TLS ceritifcate verification.
         """
-        self.__PROXY = {"https": https_proxy}
-        self.__VERIFY = False
+        self.__SESSION.proxies = {"https": https_proxy}
+        self.__SESSION.verify = False
 
     def unsetProxy(self):
         """ (Http) -> NoneType
         Unset HTTPS proxy.
         In addition, enable TLS certificate verification.
         """
-        self.__PROXY = None
-        self.__VERIFY = True
+        self.__SESSION.proxies = {}
+        self.__SESSION.verify = True
+        self.__ADAPTER.close() # drop connections made through the proxy
+
+    def setPool(self, pool_connections = 4, pool_maxsize = 10, pool_block = False, keep_alive = 60, timeout = (5, 30)):
+        """ (Http, Int, Int, Boolean, Int?, (Float, Float)?) -> NoneType
+        Reconfigure the connection pool in place.
+        Connections of the previous pool are closed.
+        """
+        old = self.__ADAPTER
+        self.__mountPool(pool_connections, pool_maxsize, pool_block)
+        self.__TIMEOUT = timeout
+        self.__KEEP_ALIVE = keep_alive
+        old.close()
+
+    def Close(self):
+        """ (Http) -> NoneType
+        Close every pooled connection of current Http instance.
+        """
+        if self.__EXECUTOR is not None:
+            self.__EXECUTOR.shutdown(wait = False)
+        self.__SESSION.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
 
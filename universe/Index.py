@@ -0,0 +1,192 @@
+import re
+
+from bisect import bisect_left, bisect_right, insort
+
+class Timeline():
+    """
+    Class Timeline
+
+    Ids ordered by time, newest first, for range, top-N and cursor queries.
+    Entries are kept in a sorted list of (-epoch, id), so appending older
+    entries, as pages of feeds arrive, does not move the existing ones.
+    """
+
+    def __init__(self, entries = ()):
+        """ (Timeline, List<(Int?, String)>) -> NoneType
+        Initialize a Timeline with given (epoch seconds, id) entries of distinct ids,
+        sorted once instead of added one by one.
+        """
+        self.__KEYS = sorted((-(epoch or 0), id) for epoch, id in entries)    # List<(Int, String)>
+
+    def __len__(self):
+        return len(self.__KEYS)
+
+    def __iter__(self):
+        # newest first
+        return (id for _, id in self.__KEYS)
+
+    def Add(self, epoch, id):
+        """ (Timeline, Int?, String) -> NoneType
+        Add id at given epoch seconds, nothing happens if it is already there.
+        Entries without epoch are treated as the oldest.
+        """
+        key = (-(epoch or 0), id)
+        keys = self.__KEYS
+        if not keys or keys[-1] < key:
+            keys.append(key)
+            return
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            insort(keys, key, i, i)
+
+    def Remove(self, epoch, id):
+        """ (Timeline, Int?, String) -> NoneType
+        Remove id at given epoch seconds if it is there.
+        """
+        key = (-(epoch or 0), id)
+        i = bisect_left(self.__KEYS, key)
+        if i < len(self.__KEYS) and self.__KEYS[i] == key:
+            del self.__KEYS[i]
+
+    def Range(self, since = None, until = None, limit = None):
+        """ (Timeline, Int?, Int?, Int?) -> List<String>
+        Returns ids between since and until epoch seconds (both inclusive), newest first.
+        """
+        keys = self.__KEYS
+        start = 0 if until is None else bisect_left(keys, (-until,))
+        end = len(keys) if since is None else bisect_left(keys, (-since + 1,))
+        if limit is not None:
+            end = min(end, start + limit)
+        return [id for _, id in keys[start:end]]
+
+    def Latest(self, n):
+        """ (Timeline, Int) -> List<String>
+        Returns the n newest ids.
+        """
+        return [id for _, id in self.__KEYS[:n]]
+
+    def Page(self, cursor = None, size = 20):
+        """ (Timeline, (Int, String)?, Int) -> (List<String>, (Int, String)?)
+        Returns a page of size ids, newest first, following the entry of cursor,
+        and the cursor of the next page (None on the last page).
+        """
+        keys = self.__KEYS
+        start = 0 if cursor is None else bisect_right(keys, cursor)
+        page = keys[start:start + size]
+        next = page[-1] if start + size < len(keys) else None
+        return [id for _, id in page], next
+
+# Hangul, kana and CJK ideographs, indexed as character bigrams
+_CJK = "\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN = re.compile("([{0}]+)|([^\\W_{0}]+)".format(_CJK))
+
+def normalize(text):
+    """ (String) -> String
+    Lower case text with single spaces, as it is compared by phrase queries.
+    """
+    return " ".join(text.casefold().split())
+
+def tokenize(text):
+    """ (String) -> List<String>
+    Split text into index terms: lower case words of other scripts,
+    and bigrams of each run of CJK characters (the character itself if it is alone).
+    """
+    tokens = []
+    for cjk, word in _TOKEN.findall(text.casefold()):
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+def _index_terms(text):
+    """ (String) -> Set<String>
+    Terms under which text is indexed: its tokens, and every character of its CJK runs,
+    so that a single character is found wherever it is in a run.
+    """
+    terms = set(tokenize(text))
+    for cjk, _ in _TOKEN.findall(text.casefold()):
+        terms.update(cjk)
+    return terms
+
+class TextIndex():
+    """
+    Class TextIndex
+
+    Inverted index of texts by their terms, see tokenize.
+    Queries find the ids of texts having every term, so they only return
+    candidates for phrase queries, which must be checked against the texts.
+    """
+
+    def __init__(self):
+        """ (TextIndex) -> NoneType
+        Initialize an empty TextIndex
+        """
+        self.__POSTINGS = {}    # Dictionary<String, Set<String>>
+        self.__TERMS = None     # List<String>, sorted, rebuilt when needed
+
+    def __len__(self):
+        return len(self.__POSTINGS)
+
+    def Add(self, id, text):
+        """ (TextIndex, String, String) -> NoneType
+        Index text as the text of id.
+        """
+        for token in _index_terms(text or ""):
+            if not token in self.__POSTINGS:
+                self.__POSTINGS[token] = set()
+                self.__TERMS = None
+            self.__POSTINGS[token].add(id)
+
+    def Remove(self, id, text):
+        """ (TextIndex, String, String) -> NoneType
+        Remove text, previously added as the text of id.
+        """
+        for token in _index_terms(text or ""):
+            if token in self.__POSTINGS:
+                self.__POSTINGS[token].discard(id)
+                if not self.__POSTINGS[token]:
+                    del self.__POSTINGS[token]
+                    self.__TERMS = None
+
+    def __expand(self, prefix):
+        """ PRIVATE (TextIndex, String) -> Set<String>
+        Returns the ids of texts having a term starting with prefix.
+        """
+        if self.__TERMS is None:
+            self.__TERMS = sorted(self.__POSTINGS)
+        terms = self.__TERMS
+        ids = set()
+        for i in range(bisect_left(terms, prefix), len(terms)):
+            if not terms[i].startswith(prefix):
+                break
+            ids |= self.__POSTINGS[terms[i]]
+        return ids
+
+    def Find(self, query, prefix = False):
+        """ (TextIndex, String, Boolean) -> Set<String>
+        Returns the ids of texts having every term of query.
+        If prefix is True, the last word of query may also be the beginning of a longer word.
+        A single CJK character matches wherever it is in a run of CJK characters.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return set()
+
+        sets = []
+        for i, token in enumerate(tokens):
+            if prefix and i == len(tokens) - 1:
+                sets.append(self.__expand(token))
+            else:
+                sets.append(self.__POSTINGS.get(token, set()))
+
+        # intersect from the rarest term
+        sets.sort(key = len)
+        ids = set(sets[0])
+        for other in sets[1:]:
+            if not ids:
+                break
+            ids &= other
+        return ids
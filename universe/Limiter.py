@@ -0,0 +1,167 @@
+from email.utils import parsedate_to_datetime
+from threading import Lock, Condition
+from time import time, monotonic, sleep
+
+def retry_after_seconds(value):
+    """ (String?) -> Float?
+    Parse a Retry-After header, given in seconds or as an HTTP date.
+    Returns the number of seconds to wait, None if value is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+class RateLimiter():
+    """
+    Class RateLimiter
+
+    Token buckets limiting the rate of requests per endpoint, shared by every
+    thread (and every Http) using it. Each endpoint refills at its rate and
+    holds at most burst tokens; an optional host-wide bucket limits the total.
+    A caller takes a token in advance and sleeps until it is due, so waiting
+    callers are served in order.
+    """
+
+    __LOCK = None
+    __RATE = 0.0
+    __BURST = 0
+    __RATES = None
+    __BUCKETS = None        # Dictionary<key, [Float, Float, Float]> (tokens, last refill, blocked until)
+    __TOTAL = None          # (rate, burst) of the host-wide bucket
+
+    waited = 0.0            # total seconds spent waiting for tokens
+
+    def __init__(self, rate = 10.0, burst = None, rates = None, total_rate = None, total_burst = None):
+        """ (RateLimiter, Float, Int?, Dictionary<String, Float>?, Float?, Int?) -> NoneType
+        Allow rate requests per second per endpoint, with bursts of burst requests (rate if not given).
+        rates gives the rate of specific endpoints ("/fns/feeds", ...).
+        If total_rate is given, requests to every endpoint together are limited to it too.
+        """
+        self.__LOCK = Lock()
+        self.__RATE = rate
+        self.__BURST = burst if burst is not None else max(1, rate)
+        self.__RATES = dict(rates or {})
+        self.__BUCKETS = {}
+        if total_rate is not None:
+            self.__TOTAL = (total_rate, total_burst if total_burst is not None else max(1, total_rate))
+        self.waited = 0.0
+
+    def __reserve(self, key, rate, burst, now):
+        """ PRIVATE (RateLimiter, String, Float, Float, Float) -> Float
+        Take a token of the bucket of key, returns the seconds until it is due.
+        Must be called with the lock held.
+        """
+        bucket = self.__BUCKETS.get(key)
+        if bucket is None:
+            bucket = self.__BUCKETS[key] = [burst, now, 0.0]
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        bucket[0] -= 1
+        return max(0.0, -bucket[0] / rate, bucket[2] - now)
+
+    def Acquire(self, endpoint):
+        """ (RateLimiter, String) -> Float
+        Wait until a request to endpoint is allowed.
+        Returns the number of seconds waited.
+        """
+        with self.__LOCK:
+            now = monotonic()
+            wait = self.__reserve(endpoint, self.__RATES.get(endpoint, self.__RATE), self.__BURST, now)
+            if self.__TOTAL is not None:
+                wait = max(wait, self.__reserve(None, self.__TOTAL[0], self.__TOTAL[1], now))
+            self.waited += wait
+
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    def Penalize(self, endpoint, seconds):
+        """ (RateLimiter, String, Float) -> NoneType
+        Block requests to endpoint for given seconds, as asked by a Retry-After header.
+        """
+        with self.__LOCK:
+            now = monotonic()
+            bucket = self.__BUCKETS.get(endpoint)
+            if bucket is None:
+                bucket = self.__BUCKETS[endpoint] = [self.__BURST, now, 0.0]
+            bucket[2] = max(bucket[2], now + seconds)
+
+class AIMDController():
+    """
+    Class AIMDController
+
+    Adaptive limit of requests in flight, shared by every thread using it.
+    The limit grows by one per window of successful requests (additive increase),
+    and is multiplied by backoff on a throttled or failed request, or when the latency
+    rises above latency_tolerance times its baseline (multiplicative decrease),
+    at most once per round trip.
+    """
+
+    __COND = None
+    __MIN = 1
+    __MAX = 64
+    __BACKOFF = 0.5
+    __TOLERANCE = 2.0
+    __BASELINE = None       # lowest recent latency, in seconds
+    __LAST_DECREASE = 0.0
+
+    limit = 0.0
+    in_flight = 0
+    decreases = 0
+
+    def __init__(self, initial = 4, min_limit = 1, max_limit = 64, backoff = 0.5, latency_tolerance = 2.0):
+        """ (AIMDController, Int, Int, Int, Float, Float?) -> NoneType
+        Start with initial requests in flight, kept between min_limit and max_limit.
+        If latency_tolerance is None, latency is not taken into account.
+        """
+        self.__COND = Condition(Lock())
+        self.__MIN = min_limit
+        self.__MAX = max_limit
+        self.__BACKOFF = backoff
+        self.__TOLERANCE = latency_tolerance
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.decreases = 0
+
+    def Acquire(self):
+        """ (AIMDController) -> NoneType
+        Wait until a request can be sent within the limit.
+        """
+        with self.__COND:
+            while self.in_flight >= int(self.limit):
+                self.__COND.wait()
+            self.in_flight += 1
+
+    def Release(self, latency, ok = True):
+        """ (AIMDController, Float, Boolean) -> NoneType
+        Report the end of a request which took latency seconds,
+        ok is False if it was throttled (429), failed on the server (5xx) or on the network.
+        """
+        with self.__COND:
+            self.in_flight -= 1
+
+            slow = False
+            if ok and self.__TOLERANCE is not None:
+                if self.__BASELINE is None or latency < self.__BASELINE:
+                    self.__BASELINE = latency
+                else:
+                    # follow slow changes of the network, not the queueing of a burst
+                    self.__BASELINE += (latency - self.__BASELINE) * 0.01
+                slow = latency > self.__BASELINE * self.__TOLERANCE
+
+            now = monotonic()
+            if not ok or slow:
+                if now - self.__LAST_DECREASE > latency:
+                    self.limit = max(self.__MIN, self.limit * self.__BACKOFF)
+                    self.__LAST_DECREASE = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.__MAX, self.limit + 1 / self.limit)
+            self.__COND.notify_all()
@@ -0,0 +1,170 @@
+from bisect import bisect_left
+from threading import Lock
+from urllib.parse import urlparse
+
+def endpoint_of(target):
+    """ (String) -> String
+    The endpoint label of a target url, its path without trailing slash.
+    """
+    return urlparse(target).path.rstrip("/") or "/"
+
+class Metrics():
+    """
+    Class Metrics
+
+    Aggregate the timing of API requests per endpoint and per phase:
+    encrypt (JWE generation), queue (rate and concurrency limits),
+    connect_wait (connect, send and wait for the response headers, which requests does not tell apart),
+    read (response body), decrypt (JWE) and parse (JSON), in histograms,
+    with the number of requests per code, payload sizes, and events such as
+    retries, refreshes and cache hits.
+    Given to Http (or UserSession) as the metrics option; Http does not time
+    anything without it.
+    Hooks are called with every record, to forward them to other sinks.
+    """
+
+    # upper bounds of histogram buckets, in seconds
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    PHASES = ("encrypt", "queue", "connect_wait", "read", "decrypt", "parse")
+
+    __LOCK = None
+    __BUCKETS = None
+    __HISTOGRAMS = None     # Dictionary<(endpoint, phase), [List<Int>, Float, Int]>
+    __CODES = None          # Dictionary<(endpoint, code), Int>
+    __SIZES = None          # Dictionary<(endpoint, "request" | "response"), Int>
+    __EVENTS = None         # Dictionary<(endpoint, event), Int>
+    __HOOKS = None          # List<Function>
+
+    def __init__(self, buckets = None):
+        """ (Metrics, List<Float>?) -> NoneType
+        Create empty metrics, with histograms of given bucket upper bounds (BUCKETS if not given).
+        """
+        self.__LOCK = Lock()
+        self.__BUCKETS = tuple(sorted(buckets if buckets is not None else self.BUCKETS))
+        self.__HOOKS = []
+        self.Reset()
+
+    def Reset(self):
+        """ (Metrics) -> NoneType
+        Clear every metric, hooks are kept.
+        """
+        with self.__LOCK:
+            self.__HISTOGRAMS = {}
+            self.__CODES = {}
+            self.__SIZES = {}
+            self.__EVENTS = {}
+
+    def AddHook(self, hook):
+        """ (Metrics, Function) -> NoneType
+        Call hook with every record: a request record is a dictionary of "endpoint", "method",
+        "status" (HTTP status or None), "code", "phases" (Dictionary<phase, seconds>),
+        "request_bytes" and "response_bytes"; an event record has "endpoint" and "event".
+        Hooks are called on the requesting thread and must not raise.
+        """
+        self.__HOOKS.append(hook)
+
+    def Record(self, record):
+        """ (Metrics, Dictionary<String, Object>) -> NoneType
+        Add a request record, see AddHook.
+        """
+        endpoint = record["endpoint"]
+        with self.__LOCK:
+            for phase, seconds in record["phases"].items():
+                h = self.__HISTOGRAMS.get((endpoint, phase))
+                if h is None:
+                    h = self.__HISTOGRAMS[(endpoint, phase)] = [[0] * (len(self.__BUCKETS) + 1), 0.0, 0]
+                h[0][bisect_left(self.__BUCKETS, seconds)] += 1
+                h[1] += seconds
+                h[2] += 1
+
+            key = (endpoint, record["code"])
+            self.__CODES[key] = self.__CODES.get(key, 0) + 1
+            for direction in ("request", "response"):
+                key = (endpoint, direction)
+                self.__SIZES[key] = self.__SIZES.get(key, 0) + record[direction + "_bytes"]
+
+        for hook in self.__HOOKS:
+            hook(record)
+
+    def Event(self, endpoint, event):
+        """ (Metrics, String, String) -> NoneType
+        Count an event ("retry", "refresh", "refresh_failure", "cache_hit", ...) of endpoint.
+        """
+        with self.__LOCK:
+            key = (endpoint, event)
+            self.__EVENTS[key] = self.__EVENTS.get(key, 0) + 1
+
+        for hook in self.__HOOKS:
+            hook({"endpoint": endpoint, "event": event})
+
+    def Snapshot(self):
+        """ (Metrics) -> Dictionary<String, Object>
+        Returns every metric by endpoint: "requests", "codes", "request_bytes", "response_bytes",
+        "events", and "phases" histograms with "count", "sum" and cumulative "buckets" by upper bound.
+        """
+        endpoints = {}
+
+        def entry(endpoint):
+            if not endpoint in endpoints:
+                endpoints[endpoint] = {"requests": 0, "codes": {}, "request_bytes": 0, "response_bytes": 0,
+                                       "events": {}, "phases": {}}
+            return endpoints[endpoint]
+
+        with self.__LOCK:
+            for (endpoint, code), n in self.__CODES.items():
+                entry(endpoint)["requests"] += n
+                entry(endpoint)["codes"][code] = n
+            for (endpoint, direction), n in self.__SIZES.items():
+                entry(endpoint)[direction + "_bytes"] = n
+            for (endpoint, event), n in self.__EVENTS.items():
+                entry(endpoint)["events"][event] = n
+            for (endpoint, phase), (counts, total, count) in self.__HISTOGRAMS.items():
+                buckets = {}
+                cumulative = 0
+                for bound, n in zip(self.__BUCKETS + (float("inf"),), counts):
+                    cumulative += n
+                    buckets[bound] = cumulative
+                entry(endpoint)["phases"][phase] = {"count": count, "sum": total, "buckets": buckets}
+        return endpoints
+
+    def Prometheus(self, prefix = "universe"):
+        """ (Metrics, String) -> String
+        Returns every metric in the Prometheus text exposition format.
+        """
+        def labels(**kwargs):
+            return "{" + ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+                                  for k, v in kwargs.items()) + "}"
+
+        snapshot = self.Snapshot()
+        lines = [
+            "# HELP {}_request_phase_seconds Time spent in each phase of API requests.".format(prefix),
+            "# TYPE {}_request_phase_seconds histogram".format(prefix)
+        ]
+        for endpoint, e in sorted(snapshot.items()):
+            for phase, h in e["phases"].items():
+                for bound, n in h["buckets"].items():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append("{}_request_phase_seconds_bucket{} {}".format(
+                        prefix, labels(endpoint = endpoint, phase = phase, le = le), n))
+                lines.append("{}_request_phase_seconds_sum{} {!r}".format(
+                    prefix, labels(endpoint = endpoint, phase = phase), h["sum"]))
+                lines.append("{}_request_phase_seconds_count{} {}".format(
+                    prefix, labels(endpoint = endpoint, phase = phase), h["count"]))
+
+        for name, help, key in (("requests_total", "API requests by result code.", "codes"),
+                                ("events_total", "Retries, refreshes and other events.", "events")):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help))
+            lines.append("# TYPE {}_{} counter".format(prefix, name))
+            label = "code" if key == "codes" else "event"
+            for endpoint, e in sorted(snapshot.items()):
+                for value, n in sorted(e[key].items(), key = lambda item: str(item[0])):
+                    lines.append("{}_{}{} {}".format(prefix, name, labels(endpoint = endpoint, **{label: value}), n))
+
+        for direction in ("request", "response"):
+            lines.append("# HELP {}_{}_bytes_total Bytes of API {} payloads.".format(prefix, direction, direction))
+            lines.append("# TYPE {}_{}_bytes_total counter".format(prefix, direction))
+            for endpoint, e in sorted(snapshot.items()):
+                lines.append("{}_{}_bytes_total{} {}".format(
+                    prefix, direction, labels(endpoint = endpoint), e[direction + "_bytes"]))
+
+        return "\n".join(lines) + "\n"
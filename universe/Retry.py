@@ -0,0 +1,122 @@
+import random
+
+from collections import deque
+from threading import Lock
+
+class RetryPolicy():
+    """
+    Class RetryPolicy
+
+    Which failed requests Http sends again, how many times and after how long.
+    Only idempotent methods (GET) are retried unless methods says otherwise.
+    Delays grow exponentially from backoff up to max_backoff, with full jitter,
+    and are never shorter than the Retry-After of a throttled response.
+    """
+
+    # transient results: throttled (1097), HTTP error (1098) and truncated body (1001)
+    CODES = (1001, 1097, 1098)
+    # HTTP statuses worth another attempt when the code is 1098
+    STATUSES = (408, 429, 500, 502, 503, 504)
+
+    __ATTEMPTS = 3
+    __ENDPOINTS = None
+    __METHODS = None
+    __BACKOFF = 0.2
+    __MAX_BACKOFF = 5.0
+
+    def __init__(self, attempts = 3, endpoints = None, methods = ("GET",), backoff = 0.2, max_backoff = 5.0):
+        """ (RetryPolicy, Int, Dictionary<String, Int>?, List<String>, Float, Float) -> NoneType
+        Send a request at most attempts times, or endpoints[endpoint] times for given endpoints.
+        """
+        self.__ATTEMPTS = attempts
+        self.__ENDPOINTS = dict(endpoints or {})
+        self.__METHODS = tuple(methods)
+        self.__BACKOFF = backoff
+        self.__MAX_BACKOFF = max_backoff
+
+    def Attempts(self, method, endpoint):
+        """ (RetryPolicy, String, String) -> Int
+        Returns the maximum number of attempts of a request.
+        """
+        if not method in self.__METHODS:
+            return 1
+        return max(1, self.__ENDPOINTS.get(endpoint, self.__ATTEMPTS))
+
+    def Retryable(self, code, status = None):
+        """ (RetryPolicy, Int, Int?) -> Boolean
+        Returns True if a request which returned code (and HTTP status) may succeed if sent again.
+        """
+        if not code in self.CODES:
+            return False
+        return code != 1098 or status in self.STATUSES
+
+    def Delay(self, attempt, retry_after = None):
+        """ (RetryPolicy, Int, Float?) -> Float
+        Returns the seconds to wait after the failure of attempt, counted from 0:
+        a random delay up to backoff * 2 ** attempt (at most max_backoff),
+        and at least retry_after if given.
+        """
+        delay = random.uniform(0, min(self.__MAX_BACKOFF, self.__BACKOFF * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+class HedgePolicy():
+    """
+    Class HedgePolicy
+
+    When Http sends a duplicate of a slow Get.
+    The latencies of each endpoint are kept in a window of recent requests; once it holds
+    min_samples of them, a duplicate is sent if no response came within their percentile,
+    and whichever response comes first is used.
+    """
+
+    __PERCENTILE = 95
+    __MIN_SAMPLES = 20
+    __MIN_DELAY = 0.0
+    __ENDPOINTS = None
+    __WINDOWS = None        # Dictionary<endpoint, deque<Float>>
+    __WINDOW = 200
+    __LOCK = None
+
+    def __init__(self, percentile = 95, min_samples = 20, min_delay = 0.0, endpoints = None, window = 200):
+        """ (HedgePolicy, Float, Int, Float, List<String>?, Int) -> NoneType
+        Hedge Get of every endpoint, or only of given endpoints ("/media/vodview", ...),
+        never sooner than min_delay seconds.
+        """
+        self.__PERCENTILE = percentile
+        self.__MIN_SAMPLES = min_samples
+        self.__MIN_DELAY = min_delay
+        self.__ENDPOINTS = set(endpoints) if endpoints is not None else None
+        self.__WINDOWS = {}
+        self.__WINDOW = window
+        self.__LOCK = Lock()
+
+    def Hedged(self, endpoint):
+        """ (HedgePolicy, String) -> Boolean
+        Returns True if Get of endpoint may be hedged.
+        """
+        return self.__ENDPOINTS is None or endpoint in self.__ENDPOINTS
+
+    def Observe(self, endpoint, latency):
+        """ (HedgePolicy, String, Float) -> NoneType
+        Add the latency of a successful request to endpoint.
+        """
+        with self.__LOCK:
+            window = self.__WINDOWS.get(endpoint)
+            if window is None:
+                window = self.__WINDOWS[endpoint] = deque(maxlen = self.__WINDOW)
+            window.append(latency)
+
+    def Delay(self, endpoint):
+        """ (HedgePolicy, String) -> Float?
+        Returns the seconds to wait before hedging a Get of endpoint,
+        None while there are not enough samples.
+        """
+        with self.__LOCK:
+            window = self.__WINDOWS.get(endpoint)
+            if window is None or len(window) < self.__MIN_SAMPLES:
+                return None
+            latencies = sorted(window)
+        index = min(len(latencies) - 1, int(len(latencies) * self.__PERCENTILE / 100))
+        return max(self.__MIN_DELAY, latencies[index])
@@ -0,0 +1,187 @@
+import json
+import sqlite3
+
+from threading import RLock
+from .util import convert_epoch
+
+class Store():
+    """
+    Class Store
+
+    Persist FNS feeds and VOD on disk with SQLite, so that FNSModule and
+    VODModule can warm-start from it instead of fetching everything again.
+    Feeds and VOD series are kept as the JSON objects received from the API
+    and replayed on load, VOD are kept as their attributes.
+    """
+
+    __CONN = None
+    __LOCK = None
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS feeds (
+        planet_id INTEGER NOT NULL,
+        feed_id TEXT NOT NULL,
+        account_no INTEGER NOT NULL,
+        publish_date INTEGER,
+        raw TEXT NOT NULL,
+        PRIMARY KEY (planet_id, feed_id)
+    );
+    CREATE INDEX IF NOT EXISTS feeds_by_publish ON feeds (planet_id, publish_date);
+    CREATE INDEX IF NOT EXISTS feeds_by_artist ON feeds (planet_id, account_no, publish_date);
+    CREATE TABLE IF NOT EXISTS feed_tags (
+        planet_id INTEGER NOT NULL,
+        tag TEXT NOT NULL,
+        feed_id TEXT NOT NULL,
+        PRIMARY KEY (planet_id, tag, feed_id)
+    );
+    CREATE INDEX IF NOT EXISTS feed_tags_by_feed ON feed_tags (planet_id, feed_id);
+    CREATE TABLE IF NOT EXISTS vod_series (
+        planet_id INTEGER NOT NULL,
+        vod_series_no INTEGER NOT NULL,
+        raw TEXT NOT NULL,
+        PRIMARY KEY (planet_id, vod_series_no)
+    );
+    CREATE TABLE IF NOT EXISTS vods (
+        planet_id INTEGER NOT NULL,
+        vod_no TEXT NOT NULL,
+        vod_series_no INTEGER NOT NULL,
+        record TEXT NOT NULL,
+        PRIMARY KEY (planet_id, vod_no)
+    );
+    CREATE INDEX IF NOT EXISTS vods_by_series ON vods (planet_id, vod_series_no);
+    """
+
+    def __init__(self, path):
+        """ (Store, String) -> NoneType
+        Open (or create) the SQLite database at path in WAL mode.
+        The connection is shared between threads, guarded by a lock.
+        """
+        self.__LOCK = RLock()
+        self.__CONN = sqlite3.connect(path, check_same_thread = False)
+        self.__CONN.execute("PRAGMA journal_mode=WAL")
+        self.__CONN.execute("PRAGMA synchronous=NORMAL")
+        self.__CONN.executescript(self.SCHEMA)
+
+    def SaveFeeds(self, planet_id, feeds):
+        """ (Store, Int, List<Object>) -> NoneType
+        Save parsed FNS Feed JSON objects of a page in a single transaction.
+        Saved feeds with the same id are replaced, along with their tags.
+        """
+        rows = []
+        tags = []
+        for f in feeds:
+            publish = f.get("publish_date", "")
+            rows.append((planet_id, f["id"], f["account_no"],
+                         convert_epoch(publish) if publish else None, json.dumps(f)))
+            for tag in f.get("tags", []):
+                tags.append((planet_id, tag, f["id"]))
+
+        with self.__LOCK, self.__CONN:
+            self.__CONN.executemany("INSERT OR REPLACE INTO feeds VALUES (?, ?, ?, ?, ?)", rows)
+            self.__CONN.executemany("DELETE FROM feed_tags WHERE planet_id = ? AND feed_id = ?",
+                                    [(planet_id, f["id"]) for f in feeds])
+            self.__CONN.executemany("INSERT OR IGNORE INTO feed_tags VALUES (?, ?, ?)", tags)
+
+    def LoadFeeds(self, planet_id = None):
+        """ (Store, Int?) -> List<(Int, Object)>
+        Load saved FNS Feed JSON objects with their planet id, oldest first.
+        Every planet is loaded unless planet_id is given.
+        """
+        with self.__LOCK:
+            if planet_id is None:
+                cur = self.__CONN.execute("SELECT planet_id, raw FROM feeds ORDER BY publish_date, rowid")
+            else:
+                cur = self.__CONN.execute("SELECT planet_id, raw FROM feeds WHERE planet_id = ? "
+                                          "ORDER BY publish_date, rowid", (planet_id,))
+            return [(p, json.loads(raw)) for p, raw in cur.fetchall()]
+
+    def FindFeeds(self, planet_id, account_no = None, tag = None, since = None, until = None, limit = None):
+        """ (Store, Int, Int?, String?, Int?, Int?, Int?) -> List<String>
+        Find the ids of saved feeds of a planet, newest first.
+        Filter by artist account_no, tag and publish date range [since, until] in epoch seconds.
+        """
+        sql = "SELECT feeds.feed_id FROM feeds"
+        args = []
+        if tag is not None:
+            sql += " JOIN feed_tags ON feed_tags.planet_id = feeds.planet_id AND feed_tags.feed_id = feeds.feed_id" \
+                   " AND feed_tags.tag = ?"
+            args.append(tag)
+        sql += " WHERE feeds.planet_id = ?"
+        args.append(planet_id)
+        if account_no is not None:
+            sql += " AND feeds.account_no = ?"
+            args.append(account_no)
+        if since is not None:
+            sql += " AND feeds.publish_date >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND feeds.publish_date <= ?"
+            args.append(until)
+        sql += " ORDER BY feeds.publish_date DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+
+        with self.__LOCK:
+            return [row[0] for row in self.__CONN.execute(sql, args).fetchall()]
+
+    def SaveVODSeries(self, planet_id, vod_series):
+        """ (Store, Int, List<Object>) -> NoneType
+        Replace the saved VOD series of a planet with parsed VOD series JSON objects.
+        Saved VOD of the planet are discarded, as VODModule.ProcessSeries does.
+        """
+        rows = [(planet_id, vs["vod_series_no"], json.dumps(vs)) for vs in vod_series]
+
+        with self.__LOCK, self.__CONN:
+            self.__CONN.execute("DELETE FROM vod_series WHERE planet_id = ?", (planet_id,))
+            self.__CONN.execute("DELETE FROM vods WHERE planet_id = ?", (planet_id,))
+            self.__CONN.executemany("INSERT OR REPLACE INTO vod_series VALUES (?, ?, ?)", rows)
+
+    def SaveVODs(self, planet_id, vod_series_no, vods):
+        """ (Store, Int, Int, List<VOD>) -> NoneType
+        Save VOD of a VOD series in a single transaction.
+        """
+        rows = []
+        for vod in vods:
+            record = {k: getattr(vod, k) for k in vod.__slots__ if k != "series"}
+            rows.append((planet_id, str(vod.vod_no), vod_series_no, json.dumps(record)))
+
+        with self.__LOCK, self.__CONN:
+            self.__CONN.executemany("INSERT OR REPLACE INTO vods VALUES (?, ?, ?, ?)", rows)
+
+    def LoadVODSeries(self, planet_id = None):
+        """ (Store, Int?) -> List<(Int, Object)>
+        Load saved VOD series JSON objects with their planet id.
+        """
+        with self.__LOCK:
+            if planet_id is None:
+                cur = self.__CONN.execute("SELECT planet_id, raw FROM vod_series ORDER BY rowid")
+            else:
+                cur = self.__CONN.execute("SELECT planet_id, raw FROM vod_series WHERE planet_id = ? "
+                                          "ORDER BY rowid", (planet_id,))
+            return [(p, json.loads(raw)) for p, raw in cur.fetchall()]
+
+    def LoadVODs(self, planet_id = None):
+        """ (Store, Int?) -> List<(Int, Int, Dictionary<String, Object>)>
+        Load saved VOD attributes with their planet id and VOD series no.
+        """
+        with self.__LOCK:
+            if planet_id is None:
+                cur = self.__CONN.execute("SELECT planet_id, vod_series_no, record FROM vods ORDER BY rowid")
+            else:
+                cur = self.__CONN.execute("SELECT planet_id, vod_series_no, record FROM vods WHERE planet_id = ? "
+                                          "ORDER BY rowid", (planet_id,))
+            return [(p, vs, json.loads(record)) for p, vs, record in cur.fetchall()]
+
+    def Close(self):
+        """ (Store) -> NoneType
+        Close the database.
+        """
+        with self.__LOCK:
+            self.__CONN.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
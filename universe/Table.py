@@ -0,0 +1,257 @@
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+class FeedTable():
+    """
+    Class FeedTable
+
+    Columnar copy of FNS feeds, attachments and artists for bulk analytics.
+    Numeric columns are stdlib arrays, converted to NumPy arrays or a pyarrow
+    table when they are installed. Tags and attachment types are stored as
+    codes into tag_names and type_names, the tags of feed i being
+    tag_codes[tag_offsets[i]:tag_offsets[i + 1]].
+    Missing epoch dates and artist ids are stored as -1.
+    Rows are appended as feeds are loaded, later changes of a feed are not reflected.
+    """
+
+    def __init__(self):
+        """ (FeedTable) -> NoneType
+        Initialize an empty FeedTable
+        """
+        # feeds
+        self.feed_id = []                       # List<String>
+        self.planet_id = array("q")
+        self.account_no = array("q")
+        self.create_ts = array("q")
+        self.modify_ts = array("q")
+        self.publish_ts = array("q")
+        self.attachment_count = array("q")
+        self.tag_offsets = array("q", [0])
+        self.tag_codes = array("q")
+        self.tag_names = []                     # List<String>
+
+        # attachments
+        self.attachment_id = []                 # List<String>
+        self.attachment_feed = array("q")       # row of the feed
+        self.attachment_type = array("q")
+        self.type_names = []                    # List<String>
+
+        # artists
+        self.artist_planet_id = array("q")
+        self.artist_account_no = array("q")
+        self.artist_id = array("q")
+        self.artist_nickname = []               # List<String>
+
+        self.__ROWS = {}        # Dictionary<(planet_id, feed_id), Int>
+        self.__ARTISTS = set()  # Set<(planet_id, account_no)>
+        self.__TAG_CODES = {}   # Dictionary<String, Int>
+        self.__TYPE_CODES = {}  # Dictionary<String, Int>
+
+    def __len__(self):
+        return len(self.feed_id)
+
+    @classmethod
+    def FromModule(cls, module, planet_id = None):
+        """ (Class FeedTable, FNSModule, Int?) -> FeedTable
+        Build a FeedTable of the feeds loaded in module, of every planet unless planet_id is given.
+        """
+        table = cls()
+        for p in module.feeds if planet_id is None else [planet_id]:
+            table.Append(p, module.feeds.get(p, {}).values())
+        return table
+
+    def __code(self, codes, names, name):
+        """ PRIVATE (FeedTable, Dictionary<String, Int>, List<String>, String) -> Int
+        Find the code of name, assigning the next one if it is new.
+        """
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def Append(self, planet_id, feeds):
+        """ (FeedTable, Int, List<FNSFeed>) -> Int
+        Append FNSFeed of a planet, with their attachments and artists, in one pass.
+        Feeds already in the table are skipped, so pages returned by
+        FNSModule.LoadFeed can be appended as they come.
+        Returns the number of feeds appended.
+        """
+        added = 0
+        for feed in feeds:
+            key = (planet_id, feed.feed_id)
+            if key in self.__ROWS:
+                continue
+
+            # compute the whole row first, so that a failure leaves every column the same length
+            artist = feed.artist
+            row = len(self.feed_id)
+            values = (feed.feed_id, planet_id, artist.account_no,
+                      -1 if feed.create_ts is None else feed.create_ts,
+                      -1 if feed.modify_ts is None else feed.modify_ts,
+                      -1 if feed.publish_ts is None else feed.publish_ts,
+                      len(feed.attachments))
+            tag_codes = [self.__code(self.__TAG_CODES, self.tag_names, tag) for tag in feed.tags]
+            attachments = [(attach.attachment_id, self.__code(self.__TYPE_CODES, self.type_names, attach.type))
+                           for attach in feed.attachments.values()]
+            new_artist = not (planet_id, artist.account_no) in self.__ARTISTS
+            artist_id = -1 if artist.artist_id is None else artist.artist_id
+
+            for column, value in zip((self.feed_id, self.planet_id, self.account_no, self.create_ts,
+                                      self.modify_ts, self.publish_ts, self.attachment_count), values):
+                column.append(value)
+            self.tag_codes.extend(tag_codes)
+            self.tag_offsets.append(len(self.tag_codes))
+            for attachment_id, type in attachments:
+                self.attachment_id.append(attachment_id)
+                self.attachment_feed.append(row)
+                self.attachment_type.append(type)
+
+            if new_artist:
+                self.__ARTISTS.add((planet_id, artist.account_no))
+                self.artist_planet_id.append(planet_id)
+                self.artist_account_no.append(artist.account_no)
+                self.artist_id.append(artist_id)
+                self.artist_nickname.append(artist.nickname)
+
+            self.__ROWS[key] = row
+            added += 1
+        return added
+
+    def __column(self, column):
+        """ PRIVATE (FeedTable, array) -> numpy.ndarray
+        Copy an int64 column into a NumPy array.
+        """
+        return numpy.frombuffer(column, dtype = numpy.int64).copy()
+
+    def ToNumpy(self):
+        """ (FeedTable) -> Dictionary<String, Dictionary<String, numpy.ndarray>>
+        Returns copies of the columns as NumPy arrays, grouped in "feeds", "attachments" and "artists".
+        Tags are given as the "tag_offsets" and "tag_codes" arrays of "feeds".
+        """
+        if numpy is None:
+            raise Exception("numpy is not installed")
+
+        return {
+            "feeds": {
+                "feed_id": numpy.array(self.feed_id, dtype = object),
+                "planet_id": self.__column(self.planet_id),
+                "account_no": self.__column(self.account_no),
+                "create_ts": self.__column(self.create_ts),
+                "modify_ts": self.__column(self.modify_ts),
+                "publish_ts": self.__column(self.publish_ts),
+                "attachment_count": self.__column(self.attachment_count),
+                "tag_offsets": self.__column(self.tag_offsets),
+                "tag_codes": self.__column(self.tag_codes)
+            },
+            "attachments": {
+                "attachment_id": numpy.array(self.attachment_id, dtype = object),
+                "feed": self.__column(self.attachment_feed),
+                "type": self.__column(self.attachment_type)
+            },
+            "artists": {
+                "planet_id": self.__column(self.artist_planet_id),
+                "account_no": self.__column(self.artist_account_no),
+                "artist_id": self.__column(self.artist_id),
+                "nickname": numpy.array(self.artist_nickname, dtype = object)
+            }
+        }
+
+    def ToArrow(self):
+        """ (FeedTable) -> Dictionary<String, pyarrow.Table>
+        Returns the "feeds", "attachments" and "artists" tables as pyarrow tables.
+        Tags are a list of dictionary encoded strings, attachment types are dictionary encoded,
+        and missing dates are null.
+        """
+        if pyarrow is None:
+            raise Exception("pyarrow is not installed")
+
+        def timestamps(column):
+            return pyarrow.array(column, pyarrow.int64(), mask = [ts < 0 for ts in column]).cast(pyarrow.timestamp("s"))
+
+        tags = pyarrow.DictionaryArray.from_arrays(
+            pyarrow.array(self.tag_codes, pyarrow.int32()), pyarrow.array(self.tag_names, pyarrow.string()))
+        return {
+            "feeds": pyarrow.table({
+                "feed_id": pyarrow.array(self.feed_id, pyarrow.string()),
+                "planet_id": pyarrow.array(self.planet_id, pyarrow.int64()),
+                "account_no": pyarrow.array(self.account_no, pyarrow.int64()),
+                "create_date": timestamps(self.create_ts),
+                "modify_date": timestamps(self.modify_ts),
+                "publish_date": timestamps(self.publish_ts),
+                "attachment_count": pyarrow.array(self.attachment_count, pyarrow.int32()),
+                "tags": pyarrow.ListArray.from_arrays(pyarrow.array(self.tag_offsets, pyarrow.int32()), tags)
+            }),
+            "attachments": pyarrow.table({
+                "attachment_id": pyarrow.array(self.attachment_id, pyarrow.string()),
+                "feed_id": pyarrow.array(self.feed_id, pyarrow.string()).take(
+                    pyarrow.array(self.attachment_feed, pyarrow.int64())),
+                "type": pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(self.attachment_type, pyarrow.int32()), pyarrow.array(self.type_names, pyarrow.string()))
+            }),
+            "artists": pyarrow.table({
+                "planet_id": pyarrow.array(self.artist_planet_id, pyarrow.int64()),
+                "account_no": pyarrow.array(self.artist_account_no, pyarrow.int64()),
+                "artist_id": pyarrow.array(self.artist_id, pyarrow.int64()),
+                "nickname": pyarrow.array(self.artist_nickname, pyarrow.string())
+            })
+        }
+
+    def PostsPerArtistPerDay(self, planet_id = None, utc_offset = 0):
+        """ (FeedTable, Int?, Int) -> Dictionary<(Int, date), Int>
+        Count feeds by artist account_no and publish day, of every planet unless planet_id is given.
+        Days are counted in the timezone utc_offset seconds ahead of UTC, feeds without publish date are ignored.
+        Vectorised with NumPy when it is installed.
+        """
+        epoch = date(1970, 1, 1)
+        if numpy is not None:
+            account_no = self.__column(self.account_no)
+            publish_ts = self.__column(self.publish_ts)
+            selected = publish_ts >= 0
+            if planet_id is not None:
+                selected &= self.__column(self.planet_id) == planet_id
+            account_no = account_no[selected]
+            days = (publish_ts[selected] + utc_offset) // 86400
+            if not len(days):
+                return {}
+            # count (account_no, day) pairs as single integer keys
+            first = days.min()
+            span = days.max() - first + 1
+            keys, counts = numpy.unique(account_no * span + (days - first), return_counts = True)
+            return {(int(k // span), epoch + timedelta(days = int(first + k % span))): int(c) for k, c in zip(keys, counts)}
+
+        counts = Counter()
+        for p, a, ts in zip(self.planet_id, self.account_no, self.publish_ts):
+            if ts >= 0 and (planet_id is None or p == planet_id):
+                counts[(a, (ts + utc_offset) // 86400)] += 1
+        return {(a, epoch + timedelta(days = d)): c for (a, d), c in counts.items()}
+
+    def AttachmentTypeMix(self, planet_id = None):
+        """ (FeedTable, Int?) -> Dictionary<String, Int>
+        Count attachments by type, of every planet unless planet_id is given.
+        Vectorised with NumPy when it is installed.
+        """
+        if numpy is not None:
+            types = self.__column(self.attachment_type)
+            if planet_id is not None:
+                planets = self.__column(self.planet_id)
+                types = types[planets[self.__column(self.attachment_feed)] == planet_id]
+            counts = numpy.bincount(types, minlength = len(self.type_names))
+            return {name: int(c) for name, c in zip(self.type_names, counts) if c}
+
+        counts = Counter()
+        for feed, type in zip(self.attachment_feed, self.attachment_type):
+            if planet_id is None or self.planet_id[feed] == planet_id:
+                counts[self.type_names[type]] += 1
+        return dict(counts)
@@ -1,7 +1,9 @@
-from time import time
+from time import time, perf_counter
+from threading import Lock
 from .config import JWE_KEY
 from .util import parse_bearer_token, warning
 from .Http import Http
+from .Metrics import endpoint_of
 
 class UserSession():
     """
@@ -12,45 +14,108 @@ class UserSession():
     """
 
     __HTTP = None
+    __REFRESH_HTTP = None
+    __HTTP_OPTIONS = {}
     __ACCESS_TOKEN = ""
     __REFRESH_TOKEN = ""
-
-    def __refreshToken(self):
-        """ PRIVATE (UserSession) -> Boolean
+    __REFRESH_EXP = None
+    __REFRESH_TYPE = None
+    __REFRESH_LOCK = None
+    __REFRESH_MARGIN = 0
+    __REFRESH_RETRY = 0     # no proactive refresh before this time after a failure
+    __TOKEN_RECEIVED = 0    # when the current access token was received
+    __METRICS = None
+
+    refresh_count = 0
+    refresh_failures = 0
+    refresh_latency = 0.0   # total seconds spent on refresh requests
+    last_refresh_latency = 0.0
+
+    def __refreshToken(self, stale_token = None):
+        """ PRIVATE (UserSession, String?) -> Boolean
         Refresh the access token using stored refresh token.
-        If refresh token is invalid, it will raise the exception.
-        If succeed 
+        Only one refresh runs at a time; if stale_token is given and another thread
+        has already replaced it, that new access token is used instead of refreshing again.
+        Returns True if a new access token is available.
         """
-        if self.__REFRESH_TOKEN == "":
-            return False
+        with self.__REFRESH_LOCK:
+            if stale_token is not None and stale_token != self.__ACCESS_TOKEN:
+                return True
 
-        try:
-            r_exp, _, _, r_type = parse_bearer_token(self.__REFRESH_TOKEN)
-            if r_type != "refresh":
+            if self.__REFRESH_TOKEN == "":
+                return False
+            if self.__REFRESH_TYPE != "refresh":
                 warning("Given token is not a refresh token")
                 return False
-        except:
-            warning("Failed to parse refresh token")
-            return False
-        if r_exp and r_exp <= time():
-            warning("Refresh token has been expired")
-            return False
-
-        if self.__HTTP is None:
-            self.__HTTP = Http(self.__REFRESH_TOKEN, JWE_KEY)
-        else:
-            self.__HTTP.UpdateToken(self.__REFRESH_TOKEN)
+            if self.__REFRESH_EXP and self.__REFRESH_EXP <= time():
+                warning("Refresh token has been expired")
+                return False
 
-        code, data, _ = self.__HTTP.Post("https://auth.universe-official.io/refresh/")
-        if code != 0:
+            # refresh on its own Http, so requests in flight keep the access token
+            if self.__REFRESH_HTTP is None:
+                self.__REFRESH_HTTP = Http(self.__REFRESH_TOKEN, JWE_KEY, **self.__HTTP_OPTIONS)
+
+            start = perf_counter()
+            code, data, _ = self.__REFRESH_HTTP.Post("https://auth.universe-official.io/refresh/")
+            self.last_refresh_latency = perf_counter() - start
+            self.refresh_latency += self.last_refresh_latency
+            if code != 0:
+                self.refresh_failures += 1
+                if self.__METRICS is not None:
+                    self.__METRICS.Event("/refresh", "refresh_failure")
                 return False
-        
-        self.__ACCESS_TOKEN = data["auth"]["access_token"]
-        self.__HTTP.UpdateToken(self.__ACCESS_TOKEN)
 
-        return True
+            access_token = data["auth"]["access_token"]
+            if self.__HTTP is None:
+                self.__HTTP = Http(access_token, JWE_KEY, **self.__HTTP_OPTIONS)
+            else:
+                self.__HTTP.UpdateToken(access_token)
+            self.__ACCESS_TOKEN = access_token
+            self.__TOKEN_RECEIVED = time()
+            self.refresh_count += 1
+            if self.__METRICS is not None:
+                self.__METRICS.Event("/refresh", "refresh")
+
+            return True
+
+    def __checkToken(self):
+        """ PRIVATE (UserSession) -> NoneType
+        Refresh the access token in advance if it expires within the refresh margin,
+        or within the second half of its lifetime if that is shorter than the margin.
+        A failed attempt is not retried for a while, the current token is used until it expires.
+        """
+        if self.__REFRESH_TOKEN == "":
+            return
+        exp = self.__HTTP.EXP
+        margin = min(self.__REFRESH_MARGIN, (exp - self.__TOKEN_RECEIVED) / 2)
+        if exp - margin > time():
+            return
+        if self.__REFRESH_RETRY > time():
+            return
+
+        try:
+            refreshed = self.__refreshToken(self.__ACCESS_TOKEN)
+        except Exception as e:
+            warning("Failed to refresh the access token in advance: {}".format(e))
+            refreshed = False
+
+        if refreshed:
+            warning("Refreshed! New access token -> {}".format(self.__ACCESS_TOKEN))
+        else:
+            self.__REFRESH_RETRY = time() + 10
+
+    def __init__(self, access_token = "", refresh_token = "", refresh_margin = 60, **http_options):
+        """ (UserSession, String, String, Float, ...) -> NoneType
+        Initialize UserSession with given tokens.
+        The access token is refreshed refresh_margin seconds before it expires.
+        http_options are passed to Http to configure its connection pool.
+        If a Metrics is given as the metrics option, refreshes and retries are also counted in it.
+        """
+        self.__HTTP_OPTIONS = http_options
+        self.__METRICS = http_options.get("metrics")
+        self.__REFRESH_LOCK = Lock()
+        self.__REFRESH_MARGIN = refresh_margin
 
-    def __init__(self, access_token = "", refresh_token = ""):
         a_exp, a_no, a_id, a_type = None, None, None, None
         r_exp, r_no, r_id, r_type = None, None, None, None
 
@@ -62,6 +127,8 @@ class UserSession():
         try:
             r_exp, r_no, r_id, r_type = parse_bearer_token(refresh_token)
             self.__REFRESH_TOKEN = refresh_token
+            self.__REFRESH_EXP = r_exp
+            self.__REFRESH_TYPE = r_type
         except:
             pass
 
@@ -92,7 +159,9 @@ class UserSession():
                 if r_id != a_id:
                     warning("The np_game_account_id is not matching: (at vs rt) : ({} vs {})\nRefresh token will be ignored".format(a_id, r_id))
                     self.__REFRESH_TOKEN = ""
-        self.__HTTP = Http(self.__ACCESS_TOKEN, JWE_KEY)
+        self.__HTTP = Http(self.__ACCESS_TOKEN, JWE_KEY, **self.__HTTP_OPTIONS)
+        self.__TOKEN_RECEIVED = time()
+        self.__checkToken()
 
     def Get(self, target, query = {}):
         """ (UserSession, String, Object) -> (Int, Object | String, NoneType | Object | String)
@@ -100,10 +169,15 @@ class UserSession():
         Extended to refresh access token.
         """
         assert(self.__HTTP is not None)
+        self.__checkToken()
         
+        token = self.__ACCESS_TOKEN
         code, data, msg = self.__HTTP.Get(target, query)
-        if code == 9999 and self.__refreshToken():
+        if code == 9999:
+            self.__retryEvent(target, "token_expired")
+        if code == 9999 and self.__refreshToken(token):
             warning("Refreshed! New access token -> {}".format(self.__ACCESS_TOKEN))
+            self.__retryEvent(target, "retry")
             return self.Get(target, query)
         return code, data, msg
     
@@ -113,15 +187,56 @@ class UserSession():
         Extended to refresh access token.
         """
         assert(self.__HTTP is not None)
+        self.__checkToken()
         
+        token = self.__ACCESS_TOKEN
         code, data, msg = self.__HTTP.Post(target, query)
-        if code == 9999 and self.__refreshToken():
+        if code == 9999:
+            self.__retryEvent(target, "token_expired")
+        if code == 9999 and self.__refreshToken(token):
             warning("Refreshed! New access token -> {}".format(self.__ACCESS_TOKEN))
-            return self.Get(target, query)
+            self.__retryEvent(target, "retry")
+            return self.Post(target, query)
         return code, data, msg
-    
 
+    def __retryEvent(self, target, event):
+        """ PRIVATE (UserSession, String, String) -> NoneType
+        Count an event of target in metrics, if enabled.
+        """
+        if self.__METRICS is not None:
+            self.__METRICS.Event(endpoint_of(target), event)
+
+    def RefreshStats(self):
+        """ (UserSession) -> Dictionary<String, Int | Float>
+        Returns the number of refreshes and failed refreshes,
+        and the total, average and last latency of refresh requests in seconds.
+        """
+        attempts = self.refresh_count + self.refresh_failures
+        return {
+            "count": self.refresh_count,
+            "failures": self.refresh_failures,
+            "latency_total": self.refresh_latency,
+            "latency_avg": self.refresh_latency / attempts if attempts else 0.0,
+            "latency_last": self.last_refresh_latency
+        }
+
+    def RetryStats(self):
+        """ (UserSession) -> Dictionary<String, Int>
+        Returns the retry and hedge statistics of the Http of current UserSession.
+        """
+        return self.__HTTP.RetryStats()
 
-                       
+    def Close(self):
+        """ (UserSession) -> NoneType
+        Close the connection pool of current UserSession.
+        """
+        if self.__HTTP is not None:
+            self.__HTTP.Close()
+        if self.__REFRESH_HTTP is not None:
+            self.__REFRESH_HTTP.Close()
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.Close()
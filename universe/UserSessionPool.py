@@ -0,0 +1,173 @@
+from time import time
+from threading import Lock
+from .util import warning
+from .UserSession import UserSession
+
+class UserSessionPool():
+    """
+    Class UserSessionPool
+
+    Spread API calls over the UserSession of many accounts.
+    Each call goes to the session with the fewest calls in flight
+    ("least_outstanding") or to the next one in turn ("round_robin").
+    A session whose expired token could not be refreshed is quarantined for a while
+    and its call is sent through another session.
+    Has the Get and Post of UserSession, so it can be given to FNSModule
+    and VODModule instead of one; every account must be able to see the
+    planets those modules load.
+    """
+
+    STRATEGIES = ("least_outstanding", "round_robin")
+
+    __SESSIONS = None       # List<UserSession>
+    __OUTSTANDING = None    # List<Int>, calls in flight per session
+    __REQUESTS = None       # List<Int>, calls sent per session
+    __QUARANTINE = None     # List<Float>, end of the quarantine per session
+    __QUARANTINE_TIME = 0
+    __STRATEGY = ""
+    __NEXT = 0
+    __LOCK = None
+
+    quarantines = 0
+
+    def __init__(self, sessions = None, tokens = None, strategy = "least_outstanding", quarantine = 300,
+                 **http_options):
+        """ (UserSessionPool, List<UserSession>?, List<(String, String)>?, String, Float, ...) -> NoneType
+        Create a pool of given sessions, and of a new UserSession for each (access token, refresh token)
+        of tokens, with http_options. Limiters given in http_options are shared by every account.
+        Accounts whose tokens are not usable are skipped with a warning.
+        A session is quarantined for quarantine seconds when its token expired and could not be refreshed.
+        """
+        if not strategy in self.STRATEGIES:
+            raise Exception("Unknown strategy: {}".format(strategy))
+
+        self.__SESSIONS = []
+        self.__OUTSTANDING = []
+        self.__REQUESTS = []
+        self.__QUARANTINE = []
+        self.__QUARANTINE_TIME = quarantine
+        self.__STRATEGY = strategy
+        self.__LOCK = Lock()
+        self.quarantines = 0
+
+        for sess in sessions or []:
+            self.Add(sess)
+        for access_token, refresh_token in tokens or []:
+            try:
+                self.Add(UserSession(access_token, refresh_token, **http_options))
+            except Exception as e:
+                warning("Account skipped: {}".format(e))
+
+        if not self.__SESSIONS:
+            raise Exception("No usable session")
+
+    def Add(self, sess):
+        """ (UserSessionPool, UserSession) -> NoneType
+        Add a session to the pool.
+        """
+        with self.__LOCK:
+            self.__SESSIONS.append(sess)
+            self.__OUTSTANDING.append(0)
+            self.__REQUESTS.append(0)
+            self.__QUARANTINE.append(0.0)
+
+    def __len__(self):
+        return len(self.__SESSIONS)
+
+    def __acquire(self, excluded):
+        """ PRIVATE (UserSessionPool, Set<Int>) -> Int?
+        Choose the session of the next call among the ones not excluded, and count the call as in flight.
+        Quarantined sessions are used only when every other one is; returns None if all are excluded.
+        """
+        with self.__LOCK:
+            now = time()
+            n = len(self.__SESSIONS)
+            candidates = [i for i in range(n) if not i in excluded and self.__QUARANTINE[i] <= now]
+            if not candidates:
+                # the quarantine ending first is cut short
+                candidates = sorted((i for i in range(n) if not i in excluded),
+                                    key = lambda i: self.__QUARANTINE[i])[:1]
+                if not candidates:
+                    return None
+
+            if self.__STRATEGY == "round_robin":
+                start = self.__NEXT
+                index = min(candidates, key = lambda i: (i - start) % n)
+                self.__NEXT = (index + 1) % n
+            else:
+                index = min(candidates, key = lambda i: (self.__OUTSTANDING[i], self.__REQUESTS[i]))
+
+            self.__OUTSTANDING[index] += 1
+            self.__REQUESTS[index] += 1
+            return index
+
+    def __call(self, method, target, query):
+        """ PRIVATE (UserSessionPool, String, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        Send the call through a session, and through the next one while the token
+        of the chosen session cannot be refreshed.
+        """
+        excluded = set()
+        code, data, msg = 9999, "Token has been expired", None
+        while True:
+            index = self.__acquire(excluded)
+            if index is None:
+                # every session failed, with the result of the last one
+                return code, data, msg
+
+            try:
+                code, data, msg = getattr(self.__SESSIONS[index], method)(target, query)
+            finally:
+                with self.__LOCK:
+                    self.__OUTSTANDING[index] -= 1
+
+            # 9999 once UserSession failed to refresh the expired token, the session is unusable;
+            # a failed refresh in advance leaves the current token, which is still valid
+            if code != 9999:
+                return code, data, msg
+
+            with self.__LOCK:
+                self.__QUARANTINE[index] = time() + self.__QUARANTINE_TIME
+                self.quarantines += 1
+            warning("Session {} quarantined: its token could not be refreshed".format(index))
+            excluded.add(index)
+
+    def Get(self, target, query = {}):
+        """ (UserSessionPool, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        UserSession.Get through a session of the pool.
+        """
+        return self.__call("Get", target, query)
+
+    def Post(self, target, query = {}):
+        """ (UserSessionPool, String, Object) -> (Int, Object | String, NoneType | Object | String)
+        UserSession.Post through a session of the pool.
+        """
+        return self.__call("Post", target, query)
+
+    def Stats(self):
+        """ (UserSessionPool) -> List<Dictionary<String, Object>>
+        Returns for each session the number of calls sent and in flight,
+        whether it is quarantined, and its refresh statistics.
+        """
+        now = time()
+        with self.__LOCK:
+            stats = [{
+                "requests": self.__REQUESTS[i],
+                "outstanding": self.__OUTSTANDING[i],
+                "quarantined": self.__QUARANTINE[i] > now
+            } for i in range(len(self.__SESSIONS))]
+        for sess, s in zip(self.__SESSIONS, stats):
+            s["refresh"] = sess.RefreshStats()
+        return stats
+
+    def Close(self):
+        """ (UserSessionPool) -> NoneType
+        Close every session of the pool.
+        """
+        for sess in self.__SESSIONS:
+            sess.Close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
@@ -1,4 +1,5 @@
-from .util import convert_timestr, warning
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .util import convert_timestr, intern_str, warning
 
 class VOD():
     """
@@ -6,11 +7,17 @@ class VOD():
     
     Save information of a VOD.
     """
-    FETCHED = False # Must be True if and only if everything is loaded.
+    __slots__ = ("vod_no", "FETCHED", "title", "duration", "series",
+                 "thumb_landscape", "thumb_portrait", "thumb_square",
+                 "filename", "CDN_assertion", "CDN_playready", "CDN_widevine", "CDN_fairplay",
+                 "DRM_playready", "DRM_widevine", "DRM_fairplay", "DRM_fairplay_cert",
+                 "subtitle_ko", "subtitle_en", "subtitle_ja", "subtitle_cn", "subtitle_tw")
 
     def __init__(self, vod_no):
+        for name in self.__slots__:
+            setattr(self, name, None)
         self.vod_no = vod_no
-        self.FETCHED = False
+        self.FETCHED = False # Must be True if and only if everything is loaded.
     
     def SetTitle(self, title):
         """ (VOD, String) -> NoneType
@@ -34,10 +41,11 @@ class VOD():
         self.CDN_fairplay = fairplay
 
     def SetDRMInfo(self, playready, widevine, fairplay, fairplay_cert):
-        self.DRM_playready = playready
-        self.DRM_widevine = widevine
-        self.DRM_fairplay = fairplay
-        self.DRM_fairplay_cert = fairplay_cert
+        # license servers are shared by every VOD
+        self.DRM_playready = intern_str(playready)
+        self.DRM_widevine = intern_str(widevine)
+        self.DRM_fairplay = intern_str(fairplay)
+        self.DRM_fairplay_cert = intern_str(fairplay_cert)
 
     def SetSubtitle(self, ko = '', en = '', ja = '', cn = '', tw = ''):
         self.subtitle_ko = ko
@@ -68,9 +76,15 @@ class VODSeries():
     
     Save information of a VOD series.
     """
+    __slots__ = ("vods", "vod_series_no", "title", "thumb_landscape", "thumb_portrait", "thumb_square")
+
     def __init__(self, vod_series_no):
         self.vods = {}
         self.vod_series_no = vod_series_no
+        self.title = None
+        self.thumb_landscape = None
+        self.thumb_portrait = None
+        self.thumb_square = None
     
     def AddVod(self, vod):
         """ (VODSeries, VOD) -> NoneType
@@ -106,8 +120,10 @@ class VODModule():
     A class to handle VOD
     """
     __SESS = None
+    __STORE = None
     vod = {}        # Dictonary<planet_id, Dictionary<vod_no, VOD>>
     vod_series = {} # Dictonary<planet_id, Dictionary<vod_series_no, VODSeries>>
+    errors = []     # List<(planet_id, vod_series_no, vod_no | NoneType, Exception)>
 
     def __processVODSeries(self, planet_id, video_series_obj):
         if video_series_obj["vod_series_no"] in self.vod_series[planet_id]:
@@ -122,42 +138,117 @@ class VODModule():
         self.vod_series[planet_id][series.vod_series_no] = series
         return True
         
-    def __processVOD(self, planet_id, vod_series, vod_no):
-        vod = self.FetchVOD(planet_id, vod_no)
+    def __addVOD(self, planet_id, vod_series, vod):
+        """ PRIVATE (VODModule, Int, Int, VOD) -> NoneType
+        Add a VOD to current VODModule and its VODSeries
+        """
         vod.SetSeries(self.vod_series[planet_id][vod_series])
-
-        self.vod[planet_id][vod_no] = vod
-        return True
+        self.vod[planet_id][vod.vod_no] = vod
     
-    def __processUnfetchedVOD(self, planet_id, vod_series, vod_no, vod_media):
+    def __processUnfetchedVOD(self, vod_no, vod_media):
         vod = VOD(vod_no)
         vod.SetTitle(vod_media["title"]["ko"])
         vod.SetDuration(vod_media["duration_time"])
         vod.SetThumbnail(landscape = vod_media["thumbnail"]["landscape"]["s3path"],
                             portrait = vod_media["thumbnail"]["portrait"]["s3path"],
                             square = vod_media["thumbnail"]["square"]["s3path"])
+        return vod
 
-        vod.SetSeries(self.vod_series[planet_id][vod_series])
-
-        self.vod[planet_id][vod_no] = vod
-        return True
-
-    def __init__(self, sess):
-        """ (VODModule, UserSession) -> NoneType
+    def __init__(self, sess, store = None):
+        """ (VODModule, UserSession, Store?) -> NoneType
         Initialize VODModule with given UserSession
+        If a Store is given, VOD series and VOD saved in it are loaded first,
+        and every processed VOD series and VOD bridge is saved to it.
         """
         self.__SESS = sess
+        self.__STORE = store
         self.vod = {}
         self.vod_series = {}
+        self.errors = []
+
+        if store is not None:
+            for planet_id, vs in store.LoadVODSeries():
+                if not planet_id in self.vod_series:
+                    self.vod[planet_id] = dict()
+                    self.vod_series[planet_id] = dict()
+                self.__processVODSeries(planet_id, vs)
+            for planet_id, vod_series, record in store.LoadVODs():
+                vod = VOD(record["vod_no"])
+                for k, v in record.items():
+                    setattr(vod, k, v)
+                self.__addVOD(planet_id, vod_series, vod)
+
+    def ProcessSeries(self, planet_id, media_obj):
+        """ (VODModule, Int, Object) -> Int
+        Process the "media" object of a VOD series response.
+        Previously loaded VOD series and VOD of the planet are discarded.
+        Return the number of loaded VOD series.
+        """
+        self.vod[planet_id] = dict()
+        self.vod_series[planet_id] = dict()
+
+        count = 0
+        for vod_series in media_obj["vod_series"]:
+            if self.__processVODSeries(planet_id, vod_series):
+                count += 1
+
+        if self.__STORE is not None:
+            self.__STORE.SaveVODSeries(planet_id, media_obj["vod_series"])
+        return count
+
+    def ProcessVODBridge(self, planet_id, vod_series, vb_obj, vods = None):
+        """ (VODModule, Int, Int, Object, Dictionary<vod_no, VOD>?) -> Int
+        Process the "vod_bridge" object of a VOD bridge response.
+        VOD found in vods are added as they are, others are built from the bridge itself.
+        Return the number of VOD added.
+        """
+        added = []
+        for vod_no, vod_media in vb_obj["vod_media"].items():
+            if vods is not None and vod_no in vods:
+                vod = vods[vod_no]
+            else:
+                vod = self.__processUnfetchedVOD(vod_no, vod_media)
+            self.__addVOD(planet_id, vod_series, vod)
+            added.append(vod)
+
+        if self.__STORE is not None:
+            self.__STORE.SaveVODs(planet_id, vod_series, added)
+        return len(added)
+
+    def ParseVOD(self, vod_no, vod_obj):
+        """ (VODModule, Integer, Object) -> VOD
+        Build a VOD from the data of a VOD view response.
+        """
+        v = vod_obj["media"]["vod_view"]
+        s3 = v["vod_s3path"]
+        vod = VOD(vod_no)
+        vod.SetTitle(v["title"]["ko"])
+        vod.SetDuration(s3["duration_time"])
+        vod.SetThumbnail(landscape = v["thumbnail"]["landscape"]["s3path"],
+                         portrait = v["thumbnail"]["portrait"]["s3path"],
+                         square = v["thumbnail"]["square"]["s3path"])
+        vod.SetDRMInfo(s3["playready_license_server_url"],
+                       s3["widevine_license_server_url"],
+                       s3["fairplay_license_server_url"],
+                       s3["fairplay_cert_url"])
+        vod.SetCDNInfo(s3["origin_filename"], s3["assertion"],
+                       s3["cloudfront_dash_playready_url"],
+                       s3["cloudfront_dash_widevine_url"],
+                       s3["cloudfront_hls_fairplay_url"])
+        vod.SetSubtitle(ko = v["vod_subtitle"]["ko"]["s3path"],
+                        en = v["vod_subtitle"]["en"]["s3path"],
+                        ja = v["vod_subtitle"]["ja"]["s3path"],
+                        cn = v["vod_subtitle"]["zh-cn"]["s3path"],
+                        tw = v["vod_subtitle"]["zh-tw"]["s3path"])
+        vod.FETCHED = True
+
+        return vod
 
     def LoadSeries(self, planet_id):
         """ (VODModule, Int) -> NoneType
         Load VOD Series of the given planet_id.
         Return the number of loaded VOD series.
         """
-        self.vod[planet_id] = dict()
-        self.vod_series[planet_id] = dict()
-
         code, fns_obj, _ = self.__SESS.Get("https://api.universe-official.io/media/vodseries", {
             "planet_id": planet_id
         })
@@ -165,28 +256,92 @@ class VODModule():
         if code != 0:
             raise Exception("Error while fetching vod series")
         
-        media_obj = fns_obj["media"]
+        return self.ProcessSeries(planet_id, fns_obj["media"])
+
+    def __fetchVODBridge(self, planet_id, vod_series):
+        """ PRIVATE (VODModule, Int, Int) -> Object
+        Fetch the "vod_bridge" object of given VOD series.
+        """
+        code, vb_obj, _ = self.__SESS.Get("https://api.universe-official.io/media/vodbridge", {
+            "planet_id": planet_id,
+            "vod_series_no": vod_series
+        })
+
+        if code != 0:
+            raise Exception("Error while fetching vod series")
+        
+        return vb_obj["media"]["vod_bridge"]
+
+    def __loadParallel(self, targets, fetchVOD, max_workers):
+        """ PRIVATE (VODModule, List<(Int, Int)>, Boolean, Int) -> Int
+        Load VOD of every (planet_id, vod_series) in targets on a pool of max_workers threads.
+        VOD are inserted in the order of targets and of each VOD bridge, whatever order requests finish in.
+        Failures are collected into errors instead of being raised;
+        a VOD whose detail failed is added from its VOD bridge data.
+        Return the total number of VOD added.
+        """
+        self.errors = []
+        bridges = {}    # Dictionary<(planet_id, vod_series), Object>
+        views = {}      # Dictionary<(planet_id, vod_series, vod_no), Future<VOD>>
+
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            pending = {}
+            for t in targets:
+                pending[executor.submit(self.__fetchVODBridge, *t)] = t
+
+            # fan details out as soon as each bridge arrives
+            for future in as_completed(pending):
+                planet_id, vod_series = pending[future]
+                try:
+                    vb_obj = future.result()
+                except Exception as e:
+                    self.errors.append((planet_id, vod_series, None, e))
+                    continue
+
+                bridges[(planet_id, vod_series)] = vb_obj
+                if fetchVOD:
+                    for vod_no in vb_obj["vod_media"]:
+                        views[(planet_id, vod_series, vod_no)] = executor.submit(self.FetchVOD, planet_id, vod_no)
+
+            count = 0
+            for planet_id, vod_series in targets:
+                if not (planet_id, vod_series) in bridges:
+                    continue
+
+                vb_obj = bridges[(planet_id, vod_series)]
+                vods = {}
+                if fetchVOD:
+                    for vod_no in vb_obj["vod_media"]:
+                        try:
+                            vods[vod_no] = views[(planet_id, vod_series, vod_no)].result()
+                        except Exception as e:
+                            self.errors.append((planet_id, vod_series, vod_no, e))
+                count += self.ProcessVODBridge(planet_id, vod_series, vb_obj, vods)
 
-        count = 0
-        for vod_series in media_obj["vod_series"]:
-            if self.__processVODSeries(planet_id, vod_series):
-                count += 1
         return count
 
-    def LoadAllVOD(self, fetchVOD = True):
-        """ (VODModule) -> NoneType
+    def LoadAllVOD(self, fetchVOD = True, max_workers = None):
+        """ (VODModule, Boolean, Int?) -> Int
         Load a list of VOD with all currently loaded VOD series.
+        If max_workers is given, VOD of every planet are fetched on that many threads
+        and failures are collected into errors.
         Return the total number of VOD added.
         """
+        if max_workers is not None:
+            targets = [(p, vs) for p in self.vod_series for vs in self.vod_series[p]]
+            return self.__loadParallel(targets, fetchVOD, max_workers)
+
         count = 0
         for p in self.vod_series:
             count += self.LoadVODFromPlanet(p, fetchVOD = fetchVOD)
 
         return count
 
-    def LoadVODFromPlanet(self, planet_id, fetchVOD = True):
-        """ (VODModule, Integer) -> NoneType
+    def LoadVODFromPlanet(self, planet_id, fetchVOD = True, max_workers = None):
+        """ (VODModule, Integer, Boolean, Int?) -> Int
         Load a list of VOD with specific planet id.
+        If max_workers is given, VOD are fetched on that many threads
+        and failures are collected into errors.
         Return the total number of VOD added.
         """
 
@@ -194,32 +349,34 @@ class VODModule():
         if not planet_id in self.vod_series:
             raise Exception("The planet {} is not loaded".format(planet_id))
 
+        if max_workers is not None:
+            targets = [(planet_id, vs) for vs in self.vod_series[planet_id]]
+            return self.__loadParallel(targets, fetchVOD, max_workers)
+
         count = 0
         for vs in self.vod_series[planet_id]:
             count += self.LoadVODFromSeries(planet_id, vs, fetchVOD = fetchVOD)
         
         return count
     
-    def LoadVODFromSeries(self, planet_id, vod_series, fetchVOD = True):
-        code, vb_obj, _ = self.__SESS.Get("https://api.universe-official.io/media/vodbridge", {
-            "planet_id": planet_id,
-            "vod_series_no": vod_series
-        })
-
-        if code != 0:
-            raise Exception("Error while fetching vod series")
-        
-        count = 0
-        vb_obj = vb_obj["media"]["vod_bridge"]
-        for vod_no, vod_media in vb_obj["vod_media"].items():
-            count += 1
-            if fetchVOD:
-                self.__processVOD(planet_id, vod_series, vod_no)
-            else:
-                self.__processUnfetchedVOD(planet_id, vod_series, vod_no, vod_media)
+    def LoadVODFromSeries(self, planet_id, vod_series, fetchVOD = True, max_workers = None):
+        """ (VODModule, Integer, Integer, Boolean, Int?) -> Int
+        Load a list of VOD with specific planet id and VOD series.
+        If max_workers is given, VOD are fetched on that many threads
+        and failures are collected into errors.
+        Return the total number of VOD added.
+        """
+        if max_workers is not None:
+            return self.__loadParallel([(planet_id, vod_series)], fetchVOD, max_workers)
 
-        return count
+        vb_obj = self.__fetchVODBridge(planet_id, vod_series)
+        vods = None
+        if fetchVOD:
+            vods = {}
+            for vod_no in vb_obj["vod_media"]:
+                vods[vod_no] = self.FetchVOD(planet_id, vod_no)
 
+        return self.ProcessVODBridge(planet_id, vod_series, vb_obj, vods)
 
     def FetchVOD(self, planet_id, vod_no):
         """ (VODModule, Integer, Integer) -> NoneType
@@ -233,26 +390,5 @@ class VODModule():
 
         if code != 0:
             raise Exception("Error while fetching vod")
-        v = vod_obj["media"]["vod_view"]
-        s3 = v["vod_s3path"]
-        vod = VOD(vod_no)
-        vod.SetTitle(v["title"]["ko"])
-        vod.SetDuration(s3["duration_time"])
-        vod.SetThumbnail(landscape = v["thumbnail"]["landscape"]["s3path"],
-                         portrait = v["thumbnail"]["portrait"]["s3path"],
-                         square = v["thumbnail"]["square"]["s3path"])
-        vod.SetDRMInfo(s3["playready_license_server_url"],
-                       s3["widevine_license_server_url"],
-                       s3["fairplay_license_server_url"],
-                       s3["fairplay_cert_url"])
-        vod.SetCDNInfo(s3["origin_filename"], s3["assertion"],
-                       s3["cloudfront_dash_playready_url"],
-                       s3["cloudfront_dash_widevine_url"],
-                       s3["cloudfront_hls_fairplay_url"])
-        vod.SetSubtitle(ko = v["vod_subtitle"]["ko"]["s3path"],
-                        en = v["vod_subtitle"]["en"]["s3path"],
-                        ja = v["vod_subtitle"]["ja"]["s3path"],
-                        cn = v["vod_subtitle"]["zh-cn"]["s3path"],
-                        tw = v["vod_subtitle"]["zh-tw"]["s3path"])
 
-        return vod
\ No newline at end of file
+        return self.ParseVOD(vod_no, vod_obj)
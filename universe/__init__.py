@@ -1,4 +1,15 @@
 from .Http import Http
 from .UserSession import UserSession
+from .UserSessionPool import UserSessionPool
 from .FNS import FNSArtist, FNSAttachment, FNSFeed, FNSModule
 from .VOD import VOD, VODSeries, VODModule
+from .Store import Store
+from .Cache import ResponseCache
+from .Async import AsyncHttp, AsyncUserSession, AsyncFNSModule, AsyncVODModule
+from .Table import FeedTable
+from .Export import Exporter
+from .Download import Downloader
+from .Metrics import Metrics
+from .Limiter import RateLimiter, AIMDController
+from .Retry import RetryPolicy, HedgePolicy
+from .Crawler import Crawler
@@ -1,9 +1,38 @@
+import sys
 import base64
 import json
+from calendar import timegm
+from concurrent.futures import Future
 from datetime import datetime
+from functools import lru_cache
+from threading import Lock
 
 from . import config
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# fastest JSON parser installed, all of them accept bytes
+if orjson is not None:
+    JSON_BACKEND, _json_loads = "orjson", orjson.loads
+elif ujson is not None:
+    JSON_BACKEND, _json_loads = "ujson", ujson.loads
+else:
+    JSON_BACKEND, _json_loads = "json", json.loads
+
+def json_loads(data):
+    """ (bytes | String) -> Object
+    Parse a JSON document, decoding UTF-8 bytes directly with orjson or ujson if installed.
+    """
+    return _json_loads(data)
+
 def parse_bearer_token(bearer):
     parts = bearer.split('.')
     if len(parts) != 3:
@@ -23,6 +52,41 @@ def convert_timestr(timestr):
     return datetime.fromisoformat(timestr) \
                    .astimezone().strftime("%Y/%m/%d (%a) %H:%M:%S")
 
+# epoch seconds of a "YYYY-MM-DD" day in UTC
+@lru_cache(maxsize = 4096)
+def _day_epoch(day):
+    return timegm((int(day[0:4]), int(day[5:7]), int(day[8:10]), 0, 0, 0))
+
+# seconds east of UTC of a "+HHMM" or "+HH:MM" offset
+@lru_cache(maxsize = 64)
+def _offset_seconds(offset):
+    seconds = int(offset[1:3]) * 3600 + int(offset[-2:]) * 60
+    return -seconds if offset[0] == "-" else seconds
+
+# epoch seconds of any ISO 8601 datetime with a "+HHMM", "+HH:MM" or "Z" offset
+def _iso_epoch(timestr):
+    if timestr[-1] == "Z":
+        timestr = timestr[:-1] + "+00:00"
+    elif timestr[-3] != ":":
+        timestr = timestr[:-2] + ":" + timestr[-2:]
+    return int(datetime.fromisoformat(timestr).timestamp())
+
+def convert_epoch(timestr):
+    # fast path for "YYYY-MM-DDTHH:MM:SS[.f](+|-)HH[:]MM" or "...Z", as the API sends
+    if timestr[-1] == "Z":
+        offset, size = "+0000", 1
+    else:
+        offset = timestr[-6:] if timestr[-3] == ":" else timestr[-5:]
+        size = len(offset)
+    if offset[0] in "+-" and len(timestr) >= 19 + size and timestr[10] == "T":
+        return _day_epoch(timestr[:10]) - _offset_seconds(offset) \
+             + int(timestr[11:13]) * 3600 + int(timestr[14:16]) * 60 + int(timestr[17:19])
+
+    return _iso_epoch(timestr)
+
+def format_epoch(epoch):
+    return datetime.fromtimestamp(epoch).strftime("%Y/%m/%d (%a) %H:%M:%S")
+
 def b64e(plaintext, charset='latin-1'):
     return base64.b64encode(plaintext.encode(charset)).decode()
 
@@ -37,12 +101,65 @@ def ub64e(plaintext, charset='latin-1'):
 def ub64d(base64text, charset='latin-1'):
     return base64.urlsafe_b64decode(base64text + '=' * (4 - len(base64text) % 4)).decode(charset)
 
+# intern strings repeated across objects, other values (None) are kept as they are
+def intern_str(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+# split url into its interned directory and the file name,
+# so that urls sharing a CDN directory share its string
+def split_url(url):
+    if url is None:
+        return None, None
+    i = url.rfind("/") + 1
+    return sys.intern(url[:i]), url[i:]
+
 # https://stackoverflow.com/a/26853961
 def merge(x, y):
     z = x.copy()   # start with keys and values of x
     z.update(y)    # modifies z with keys and values of y
     return z
 
+class SingleFlight():
+    """
+    Class SingleFlight
+
+    Share a single call among concurrent callers using the same key.
+    Callers arriving while the call is in flight wait for it,
+    and receive its result or exception.
+    """
+
+    def __init__(self):
+        self.__LOCK = Lock()
+        self.__CALLS = {}   # Dictionary<key, Future>
+        self.shared = 0     # number of callers which did not make their own call
+
+    def Do(self, key, func, *args):
+        """ (SingleFlight, Object, Function, ...) -> Object
+        Call func(*args), unless a call with the same key is already in flight.
+        """
+        with self.__LOCK:
+            future = self.__CALLS.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.__CALLS[key] = future
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__LOCK:
+                del self.__CALLS[key]
+        future.set_result(result)
+        return result
+
 # Logging related
 def warning(msg):
     if not config.SHOW_WARNING: # Check warning log level